@@ -1,39 +1,313 @@
 import os
+import time
+_process_started = time.perf_counter()
 # Set Keras to use TensorFlow backend BEFORE importing
 os.environ['KERAS_BACKEND'] = 'tensorflow'
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
-from flask import Flask, request, jsonify
+# Split the CPU between workers before NumPy/OpenCV/TensorFlow size their pools
+from serving_config import configure as configure_threads, configure_tensorflow
+THREAD_BUDGET = configure_threads()
+
+# TensorFlow/Keras are imported on first model load (see load_ai_model), so
+# TFLite/ONNX workers never pay for them and the import shows up as boot time
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
-import tensorflow as tf
-from tensorflow import keras # Use tensorflow.keras for compatibility
 from PIL import Image
 import numpy as np
-import io
 import hashlib
+import hmac
 import json
-import cv2
-from scipy import stats
-from skimage import filters
+import glob
+import atexit
+import threading
+import tempfile
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from micro_batcher import MicroBatcher, BatcherOverloaded
+from inference_engine import InferenceEngine, resolve_backend, load_runtime_engine
+from forensics import analyze_image_statistics
+from result_cache import ResultCache
+from perceptual_hash import dhash, PerceptualHashIndex
+from embedding_index import EmbeddingIndex, corpus_signature, embed_images
+from hash_store import HashStore
+from preprocessing import prepare_image, decode_image, to_model_input, stats_proxy_size, crop_boxes, multi_crop_inputs
+from video_analysis import analyze_video, SAMPLE_MODES
+from decision import hybrid_decision, aggregate_scores, load_decision_config, safe_model_exit
+from decision_store import DecisionLog
+from jobs import JobManager, IMAGE_EXTENSIONS
+from metrics import MetricsRegistry, phase_timer, server_timing_header
+from cascade import CASCADE_STAGES as CASCADE_STAGE_NAMES, CascadeTrace, StageCosts, parse_stages, is_decisive
 
 app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "*"}}) # Explicitly allow all origins for production
+CORS(app, resources={r"/*": {"origins": "*"}}, expose_headers=['Server-Timing']) # Explicitly allow all origins for production
+
+# Upload limits, enforced while the body is streamed and before any decode
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 100 * 1024 * 1024))
+MAX_IMAGE_PIXELS = int(os.environ.get('MAX_IMAGE_PIXELS', 80_000_000))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Werkzeug stops reading the request past this (plus room for the multipart envelope)
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES + 64 * 1024
+# PIL raises DecompressionBombError for images far beyond the limit
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+class UploadRejected(Exception):
+    """Upload refused before analysis; carries the HTTP status to return"""
+
+    def __init__(self, message, status=413):
+        super().__init__(message)
+        self.status = status
 
-MODEL_PATH = 'model_fixed.h5'
+MODEL_PATH = os.environ.get('MODEL_PATH', 'model_fixed.h5')
+# 'keras', 'tflite' or 'onnx'; 'auto' picks from the MODEL_PATH extension
+# (.tflite/.onnx files come from export_model.py)
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'auto')
 FAKE_HASHES_PATH = 'fake_images_hashes.json'
-model = None
-fake_hashes = set()  # Set of SHA256 hashes for known fake images
+FAKE_HASHES_DB_PATH = 'fake_images_hashes.bin'  # Memory-mapped store, preferred over the JSON file
+HASH_DB_RELOAD_INTERVAL = float(os.environ.get('HASH_DB_RELOAD_INTERVAL', 5))
+PHASH_INDEX_PATH = 'fake_images_phash.npz'
+# Max Hamming distance (of 64 bits) for a perceptual near-duplicate match
+PHASH_MAX_DISTANCE = int(os.environ.get('PHASH_MAX_DISTANCE', 6))
+# Active model. Replaced as a whole on reload: a request takes this dict once
+# and uses it for its cache key, forward pass (queued to the micro-batcher
+# keyed by engine) and embedding search, so a reload mid-request never mixes
+# the two models.
+active_model = {
+    'engine': None,        # Compiled forward pass (InferenceEngine, TFLiteEngine or OnnxEngine)
+    'fingerprint': None,   # SHA256 of the model file
+    'path': None,
+    'load_seconds': None,
+    'loaded_at': None,
+    'embedding_index': EmbeddingIndex(),  # Known-fake embeddings computed with this model
+    'fast_engine': None    # Exported copy used by the cascade's fast_model stage
+}
+fake_hashes = set()  # SHA256 hashes of known fake images (set or memory-mapped HashStore)
+phash_index = PerceptualHashIndex()  # dHash index of known fake images
+phash_fingerprint = None  # SHA256 of the loaded index file, for the result cache key
+
+# Embedding search: the VGG16 base output from the normal forward pass is
+# matched against the same features of the known-fake corpus, catching crops,
+# edits and other variants the hashes miss. The index is computed per model
+# and cached next to the model artifacts; EMBEDDING_IVF_LISTS > 0 partitions
+# it for large corpora, probing EMBEDDING_IVF_PROBE lists per query.
+EMBEDDING_CORPUS_DIR = os.environ.get('EMBEDDING_CORPUS_DIR', 'Fake')  # Empty disables the search
+EMBEDDING_MATCH_THRESHOLD = float(os.environ.get('EMBEDDING_MATCH_THRESHOLD', 0.9))  # Centred cosine similarity
+EMBEDDING_IVF_LISTS = int(os.environ.get('EMBEDDING_IVF_LISTS', 0))
+EMBEDDING_IVF_PROBE = int(os.environ.get('EMBEDDING_IVF_PROBE', 4))
+
+# Cross-request micro-batching: trade a few ms of latency for batched inference
+BATCH_WINDOW_MS = float(os.environ.get('BATCH_WINDOW_MS', 5))
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 16))
+BATCH_QUEUE_DEPTH = int(os.environ.get('BATCH_QUEUE_DEPTH', 64))
+
+# Inference engine: optional XLA compilation and warm-up batch sizes
+INFERENCE_XLA = os.environ.get('INFERENCE_XLA', '0') == '1'
+INFERENCE_WARMUP_SIZES = [
+    int(s) for s in os.environ.get('INFERENCE_WARMUP_SIZES', '1,2,4,8,16').split(',') if s.strip()
+]
+
+# Run the statistics while the model works on the same upload, with the
+# features (or tiles) spread over a pool of SERVING_ANALYSIS_THREADS threads
+# shared by all requests, so latency is about max(model, stats)
+CONCURRENT_ANALYSIS = os.environ.get('CONCURRENT_ANALYSIS', '1') == '1'
+
+# Statistics phase pixel budget: larger uploads are analyzed on sampled tiles
+# ('tiles') or a downsampled proxy ('downsample'); 0 analyzes full resolution
+STATS_PIXEL_BUDGET = int(os.environ.get('STATS_PIXEL_BUDGET', 1024 * 1024))
+STATS_BUDGET_MODE = os.environ.get('STATS_BUDGET_MODE', 'tiles')
+
+# Multi-crop inference: besides the 128x128 resize, score MULTI_CROP_COUNT
+# 128x128 crops taken at full resolution (where generator artifacts survive)
+# queued with it as one group, and combine the scores ('mean', 'max' or 'vote').
+# MULTI_CROP_BUDGET_MS caps the crops to what fits the inference time budget
+# at the engine's measured per-image cost, so the cost of an upload depends
+# on the batch size, not on the image size.
+MULTI_CROP_COUNT = int(os.environ.get('MULTI_CROP_COUNT', 0))  # 0 disables
+MULTI_CROP_AGGREGATION = os.environ.get('MULTI_CROP_AGGREGATION', 'mean')
+MULTI_CROP_BUDGET_MS = float(os.environ.get('MULTI_CROP_BUDGET_MS', 0))  # 0: always MULTI_CROP_COUNT
+# The global view and its crops are queued to the micro-batcher as one group
+MULTI_CROP_MAX = max(0, min(BATCH_MAX_SIZE, BATCH_QUEUE_DEPTH) - 1)
+if MULTI_CROP_COUNT > MULTI_CROP_MAX:
+    print(f"Warning: MULTI_CROP_COUNT={MULTI_CROP_COUNT} capped at {MULTI_CROP_MAX} to fit BATCH_MAX_SIZE")
+
+# Hybrid decision weights and thresholds: a JSON file of overrides of
+# decision.DEFAULT_DECISION_CONFIG (try them first with replay_decisions.py)
+DECISION_CONFIG = load_decision_config(os.environ.get('DECISION_CONFIG', ''))
+
+# Detection cascade (CASCADE_MODE=1): stages run cheapest first and the first
+# decisive one answers (see cascade.py). A model exit at or above
+# CASCADE_MODEL_EXIT_SAFE never changes a verdict: from there the fusion
+# decision under DECISION_CONFIG returns the model's verdict whatever the
+# statistics say (0.58 with the default 0.7/0.3 weights), so skipping them
+# only changes the reported confidence. CASCADE_MODEL_EXIT defaults to that
+# bound (at least 0.6); a lower value is allowed but logged. The stats and
+# fast_model exits do trade accuracy for speed; CASCADE_BUDGET_MS caps the
+# time spent once a model score is available.
+CASCADE_MODE = os.environ.get('CASCADE_MODE', '0') == '1'
+CASCADE_STAGES = parse_stages(os.environ.get('CASCADE_STAGES', ','.join(CASCADE_STAGE_NAMES)))
+CASCADE_STATS_PIXELS = int(os.environ.get('CASCADE_STATS_PIXELS', 256 * 256))
+CASCADE_STATS_EXIT = float(os.environ.get('CASCADE_STATS_EXIT', 0.9))
+CASCADE_FAST_MODEL_PATH = os.environ.get('CASCADE_FAST_MODEL_PATH', '')  # e.g. model_fixed_int8.tflite
+CASCADE_FAST_EXIT = float(os.environ.get('CASCADE_FAST_EXIT', 0.95))
+CASCADE_MODEL_EXIT_SAFE = safe_model_exit(DECISION_CONFIG)
+CASCADE_MODEL_EXIT = float(os.environ.get('CASCADE_MODEL_EXIT', min(1.0, max(0.6, CASCADE_MODEL_EXIT_SAFE))))
+if CASCADE_MODE and CASCADE_MODEL_EXIT < CASCADE_MODEL_EXIT_SAFE:
+    print(f"[!] CASCADE_MODEL_EXIT={CASCADE_MODEL_EXIT} is below {CASCADE_MODEL_EXIT_SAFE:.3f}, the safe bound "
+          f"for DECISION_CONFIG: model exits may return verdicts the fusion would have changed")
+CASCADE_BUDGET_MS = float(os.environ.get('CASCADE_BUDGET_MS', 0))
+cascade_costs = StageCosts()
+
+# Result cache keyed by upload SHA256 + model/pipeline fingerprint.
+# Bump RESULT_PIPELINE_VERSION whenever the analysis output changes.
+RESULT_PIPELINE_VERSION = '2'
+RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 1024))
+RESULT_CACHE_TTL = float(os.environ.get('RESULT_CACHE_TTL', 3600))
+RESULT_CACHE_DIR = os.environ.get('RESULT_CACHE_DIR', '')
 
-def load_ai_model():
-    global model
-    if not os.path.exists(MODEL_PATH):
-        print("[!] Model file not found:", MODEL_PATH)
+# Decode backend: 'pil' (full decode), 'draft' (JPEG DCT downscaling) or 'cv2'
+# (IMREAD_REDUCED_*). Reduced backends decode once at the stats proxy size and
+# feed both the model and the statistics from that image.
+PREPROCESS_BACKEND = os.environ.get('PREPROCESS_BACKEND', 'pil')
+
+# /predict/batch: many uploads in one request. Up to BATCH_PREDICT_CONCURRENCY
+# files are analyzed at once so their forward passes share micro-batches.
+BATCH_PREDICT_MAX_FILES = int(os.environ.get('BATCH_PREDICT_MAX_FILES', 64))
+BATCH_PREDICT_MAX_BYTES = int(os.environ.get('BATCH_PREDICT_MAX_BYTES', 512 * 1024 * 1024))
+BATCH_PREDICT_CONCURRENCY = int(os.environ.get('BATCH_PREDICT_CONCURRENCY', BATCH_MAX_SIZE))
+
+# Raw model scores, statistics features and hash outcomes of every analysis
+# are appended to a columnar store here for replay_decisions.py; empty disables
+DECISION_LOG_DIR = os.environ.get('DECISION_LOG_DIR', '')
+DECISION_LOG_FLUSH_ROWS = int(os.environ.get('DECISION_LOG_FLUSH_ROWS', 4096))
+DECISION_LOG_FLUSH_SECONDS = float(os.environ.get('DECISION_LOG_FLUSH_SECONDS', 60))
+
+# Video analysis: frames sampled per second ('rate') or on scene changes ('scene')
+VIDEO_SAMPLE_FPS = float(os.environ.get('VIDEO_SAMPLE_FPS', 1.0))
+VIDEO_SAMPLE_MODE = os.environ.get('VIDEO_SAMPLE_MODE', 'rate')
+VIDEO_SCENE_THRESHOLD = float(os.environ.get('VIDEO_SCENE_THRESHOLD', 0.12))
+VIDEO_MAX_FRAMES = int(os.environ.get('VIDEO_MAX_FRAMES', 300))
+
+# Background batch jobs, queued on local disk so they survive worker restarts.
+# JOB_FOLDER_ROOT enables server-side folder jobs for folders under that path.
+JOBS_DIR = os.environ.get('JOBS_DIR', 'jobs')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 4))
+JOB_FOLDER_ROOT = os.environ.get('JOB_FOLDER_ROOT', '')
+# Finished jobs (uploads and results) are deleted this long after they finish; 0 keeps them
+JOB_RETENTION_SECONDS = float(os.environ.get('JOB_RETENTION_SECONDS', 7 * 24 * 3600))
+# Total upload size of one POST /jobs, above the single-upload limit
+JOBS_MAX_BYTES = int(os.environ.get('JOBS_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+
+# Hot reload: ADMIN_TOKEN enables POST /admin/reload; MODEL_WATCH_INTERVAL > 0
+# polls the model and hash files and reloads them when they are replaced
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '').strip()
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 0))
+# Reference images a new model must score sanely before it is swapped in
+MODEL_VALIDATION_DIR = 'Fake'
+MODEL_VALIDATION_IMAGES = int(os.environ.get('MODEL_VALIDATION_IMAGES', 4))
+# Optional: minimum fraction of the (fake) reference images scored FAKE
+MODEL_VALIDATION_MIN_FAKE = float(os.environ.get('MODEL_VALIDATION_MIN_FAKE', 0))
+
+reload_status = {'state': 'idle'}
+_reload_lock = threading.Lock()
+
+# Cold start. BOOT_MODE 'sync' loads the model and hash databases while the
+# module is imported; 'background' serves /health/live at once and loads in a
+# thread, with /health/ready returning 503 until the model is warm.
+BOOT_MODE = os.environ.get('BOOT_MODE', 'sync')
+# Set by gunicorn.conf.py when the master imports the app before forking
+SERVING_PRELOAD = os.environ.get('SERVING_PRELOAD', '0') == '1'
+# Validated Keras models are saved here keyed by the .h5 SHA256, so later
+# boots load them directly and the reconstruction fallback runs at most once
+MODEL_ARTIFACT_CACHE = os.environ.get('MODEL_ARTIFACT_CACHE', 'model_cache')
+boot_status = {'state': 'booting', 'mode': BOOT_MODE, 'phases': {}, 'seconds': None}
+_boot_done = threading.Event()
+
+# Prometheus metrics, scraped from /metrics
+metrics = MetricsRegistry()
+phase_seconds = metrics.histogram('rebel_predict_phase_seconds', 'Time spent in each /predict phase', ['phase'])
+request_seconds = metrics.histogram('rebel_request_duration_seconds', 'Request latency by endpoint and status', ['endpoint', 'status'])
+upload_bytes = metrics.histogram(
+    'rebel_upload_size_bytes', 'Size of accepted image uploads',
+    buckets=(16 * 1024, 64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2, 64 * 1024 ** 2)
+)
+requests_in_flight = metrics.gauge('rebel_requests_in_flight', 'Requests currently being handled', ['endpoint'])
+detections = metrics.counter('rebel_detections', 'Analysis verdicts by detection method', ['method', 'result'])
+hash_lookups = metrics.counter('rebel_hash_db_lookups', 'Known-fake database lookups', ['db', 'outcome'])
+cache_lookups = metrics.counter('rebel_result_cache_lookups', 'Result cache lookups', ['status'])
+cascade_decisions = metrics.counter('rebel_cascade_decisions', 'Analyses decided by each cascade stage', ['stage'])
+model_loads = metrics.counter('rebel_model_loads', 'Model activation attempts', ['outcome'])
+model_load_seconds = metrics.gauge('rebel_model_load_seconds', 'Load, warm-up and validation time of the active model')
+
+def file_fingerprint(path):
+    """SHA256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def model_artifact_path(fingerprint):
+    return os.path.join(MODEL_ARTIFACT_CACHE, f"{fingerprint}.keras")
+
+def store_model_artifact(model, fingerprint):
+    """Save a validated Keras model under its source checksum (no-op if already cached)"""
+    if not MODEL_ARTIFACT_CACHE or os.path.exists(model_artifact_path(fingerprint)):
         return
+    path = model_artifact_path(fingerprint)
+    tmp_path = f"{path}.{os.getpid()}.tmp.keras"  # Keras picks the format from the extension
+    try:
+        os.makedirs(MODEL_ARTIFACT_CACHE, exist_ok=True)
+        model.save(tmp_path)
+        os.replace(tmp_path, path)
+        print(f"[+] Cached model artifact {path}")
+    except Exception as e:
+        print(f"[-] Could not cache model artifact: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def load_ai_model(path=MODEL_PATH, backend=MODEL_BACKEND, fingerprint=None):
+    """
+    Load the model at `path` with the selected backend. Returns None on failure.
+
+    Keras models come from the artifact cache when `fingerprint` has a cached
+    entry, and are rebuilt from the expected architecture if a direct load
+    fails; TFLite/ONNX exports come back as a ready runtime engine.
+    """
+    model = None
+    if not os.path.exists(path):
+        print("[!] Model file not found:", path)
+        return None
+
+    backend = resolve_backend(path, backend)
+    if backend != 'keras':
+        try:
+            print(f"[*] Neural Engine: Loading {path} ({backend} runtime)...")
+            model = load_runtime_engine(
+                path, backend, input_shape=(128, 128, 3), num_threads=THREAD_BUDGET['intra_op_threads']
+            )
+            print(f"[+] {backend} model loaded in {model.compile_ms:.0f}ms")
+        except Exception as e:
+            print(f"[-] Critical Error: Could not load {backend} model: {str(e)}")
+            print("TIP: Run 'python export_model.py' to regenerate the exported models.")
+        return model
+
+    from tensorflow import keras # Use tensorflow.keras for compatibility
+    configure_tensorflow()
+
+    artifact = model_artifact_path(fingerprint) if fingerprint and MODEL_ARTIFACT_CACHE else None
+    if artifact and os.path.exists(artifact):
+        try:
+            print(f"[*] Neural Engine: Loading cached artifact {artifact}...")
+            model = keras.models.load_model(artifact, compile=False)
+            print("[+] AI Model Loaded Successfully!")
+            return model
+        except Exception as e:
+            print(f"[-] Cached artifact unusable, loading {path}: {str(e)}")
 
     try:
-        print(f"[*] Neural Engine: Loading {MODEL_PATH}...")
+        print(f"[*] Neural Engine: Loading {path}...")
         # Attempt to load the model normally
-        model = keras.models.load_model(MODEL_PATH, compile=False)
+        model = keras.models.load_model(path, compile=False)
         print("[+] AI Model Loaded Successfully!")
     except Exception as e:
         print(f"[-] Direct load failed: {str(e)}")
@@ -58,15 +332,150 @@ def load_ai_model():
             ])
             
             # Try to load weights into this structure
-            model.load_weights(MODEL_PATH)
+            model.load_weights(path)
             print("[+] AI Model Reconstructed and Weights Loaded Successfully!")
         except Exception as e2:
             print(f"[-] Critical Error: Could not load or reconstruct model: {str(e2)}")
             print("TIP: Run 'python fix_model_final.py' to regenerate the model file.")
+            model = None
+    return model
+
+def build_inference_engine(loaded_model):
+    """Compile and warm up the forward pass for a loaded model"""
+    if hasattr(loaded_model, 'infer'):
+        candidate = loaded_model  # Exported model, already wrapped by its runtime
+    else:
+        candidate = InferenceEngine(loaded_model, input_shape=(128, 128, 3), jit_compile=INFERENCE_XLA)
+        print(f"[+] Inference engine compiled in {candidate.compile_ms:.0f}ms (XLA: {INFERENCE_XLA})")
+    candidate.warmup(INFERENCE_WARMUP_SIZES)
+    return candidate
+
+def validate_engine(candidate):
+    """Score a few reference images; raise ValueError if the outputs are not sane"""
+    paths = sorted(glob.glob(os.path.join(MODEL_VALIDATION_DIR, '*.jpg')))[:MODEL_VALIDATION_IMAGES]
+    if not paths:
+        return
+
+    batch = np.concatenate([prepare_image(Image.open(p)) for p in paths])
+    output = candidate.infer(batch)
+    if output.shape != (len(paths), 1):
+        raise ValueError(f"unexpected output shape {output.shape}")
+    if not np.all(np.isfinite(output)) or output.min() < 0 or output.max() > 1:
+        raise ValueError("scores outside [0, 1] on reference images")
+
+    fake_fraction = float(np.mean(output[:, 0] > 0.5))
+    if fake_fraction < MODEL_VALIDATION_MIN_FAKE:
+        raise ValueError(f"only {fake_fraction:.0%} of reference fakes scored FAKE")
+    print(f"[+] Model validated on {len(paths)} reference images ({fake_fraction:.0%} scored FAKE)")
+
+def embedding_index_path(fingerprint):
+    return os.path.join(MODEL_ARTIFACT_CACHE, f"{fingerprint}.embeddings.npz")
+
+def load_embedding_index(engine, fingerprint):
+    """
+    Embedding index of the known-fake corpus for a model, from the artifact
+    cache when it matches the corpus and IVF settings, else computed with the
+    model's own forward pass and cached. Empty if the engine has no embeddings.
+    """
+    if not engine.embedding_dim or not EMBEDDING_CORPUS_DIR:
+        return EmbeddingIndex()
+    paths = sorted(
+        p for p in glob.glob(os.path.join(EMBEDDING_CORPUS_DIR, '*'))
+        if p.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    signature = corpus_signature(paths)
+    cached = embedding_index_path(fingerprint) if MODEL_ARTIFACT_CACHE else None
+    if cached and os.path.exists(cached):
+        try:
+            index = EmbeddingIndex.load(cached, n_probe=EMBEDDING_IVF_PROBE)
+            if index.metadata.get('corpus') == signature and index.metadata.get('ivf_lists') == str(EMBEDDING_IVF_LISTS):
+                print(f"[+] Loaded {len(index)} reference embeddings from {cached}")
+                return index
+        except Exception as e:
+            print(f"[-] Cached embedding index unusable, rebuilding: {str(e)}")
+
+    start = time.perf_counter()
+    vectors = embed_images(engine, paths, lambda p: prepare_image(Image.open(p)), batch_size=BATCH_MAX_SIZE)
+    index = EmbeddingIndex(
+        vectors, [os.path.basename(p) for p in paths],
+        n_lists=EMBEDDING_IVF_LISTS, n_probe=EMBEDDING_IVF_PROBE,
+        metadata={'model': fingerprint, 'corpus': signature, 'ivf_lists': EMBEDDING_IVF_LISTS}
+    )
+    print(f"[+] Embedded {len(index)} reference images in {time.perf_counter() - start:.1f}s "
+          f"({index.n_lists or 'exact'} lists)")
+    if cached:
+        try:
+            os.makedirs(MODEL_ARTIFACT_CACHE, exist_ok=True)
+            index.save(cached)
+        except Exception as e:
+            print(f"[-] Could not cache embedding index: {str(e)}")
+    return index
+
+def load_fast_engine():
+    """The cascade's fast model (CASCADE_FAST_MODEL_PATH), warmed up and validated, or None"""
+    if not CASCADE_MODE or not CASCADE_FAST_MODEL_PATH:
+        return None
+    try:
+        loaded = load_ai_model(CASCADE_FAST_MODEL_PATH)
+        if loaded is None:
+            return None
+        engine = build_inference_engine(loaded)
+        validate_engine(engine)
+        return engine
+    except Exception as e:
+        print(f"[-] Cascade fast model unavailable: {str(e)}")
+        return None
+
+def activate_model(path=MODEL_PATH):
+    """
+    Load, warm up and validate the model at `path`, then swap it in.
+
+    The current model keeps serving until the swap; requests already holding
+    it finish on it. On any failure the current model stays active.
+    """
+    global active_model
+    start = time.perf_counter()
+    try:
+        fingerprint = file_fingerprint(path)
+        loaded_model = load_ai_model(path, fingerprint=fingerprint)
+        if loaded_model is None:
+            return False
+        candidate = build_inference_engine(loaded_model)
+        validate_engine(candidate)
+        if candidate is not loaded_model:  # Keras model: keep the known-good version
+            store_model_artifact(loaded_model, fingerprint)
+        embedding_index = load_embedding_index(candidate, fingerprint)
+        fast_engine = load_fast_engine()
+    except Exception as e:
+        print(f"[-] Model activation failed, keeping current model: {str(e)}")
+        model_loads.inc(outcome='failure')
+        return False
+
+    active_model = {
+        'engine': candidate,
+        'fingerprint': fingerprint,
+        'path': path,
+        'load_seconds': round(time.perf_counter() - start, 3),
+        'loaded_at': time.time(),
+        'embedding_index': embedding_index,
+        'fast_engine': fast_engine
+    }
+    print(f"[+] Model {fingerprint[:12]} active after {active_model['load_seconds']:.1f}s")
+    model_loads.inc(outcome='success')
+    model_load_seconds.set(active_model['load_seconds'])
+    return True
 
 def load_fake_hashes():
     """Load the database of known fake image hashes"""
     global fake_hashes
+    if os.path.exists(FAKE_HASHES_DB_PATH):
+        try:
+            fake_hashes = HashStore(FAKE_HASHES_DB_PATH, reload_interval=HASH_DB_RELOAD_INTERVAL)
+            print(f"Mapped {len(fake_hashes)} fake image hashes from {FAKE_HASHES_DB_PATH}")
+            return
+        except Exception as e:
+            print(f"Error mapping {FAKE_HASHES_DB_PATH}, falling back to JSON: {e}")
+
     if not os.path.exists(FAKE_HASHES_PATH):
         print(f"Warning: Fake hashes file not found: {FAKE_HASHES_PATH}")
         return
@@ -79,251 +488,874 @@ def load_fake_hashes():
     except Exception as e:
         print(f"Error loading fake hashes: {e}")
 
-def is_known_fake_image(image_data):
-    """Check if uploaded image matches any known fake image hash"""
-    if not fake_hashes:
-        return False
-
-    # Calculate SHA256 hash of the uploaded image
-    image_hash = hashlib.sha256(image_data).hexdigest()
-    return image_hash in fake_hashes
+def load_phash_index():
+    """Load the perceptual hash index of known fake images"""
+    global phash_index, phash_fingerprint
+    if not os.path.exists(PHASH_INDEX_PATH):
+        print(f"Warning: Perceptual hash index not found: {PHASH_INDEX_PATH}")
+        return
 
-def analyze_image_statistics(image):
-    """Perform statistical analysis to detect AI-generated patterns"""
     try:
-        # Convert PIL image to numpy array
-        img_array = np.array(image)
-
-        # Convert to grayscale for analysis
-        if len(img_array.shape) == 3:
-            gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = img_array
+        fingerprint = file_fingerprint(PHASH_INDEX_PATH)
+        phash_index = PerceptualHashIndex.load(PHASH_INDEX_PATH)
+        phash_fingerprint = fingerprint
+        print(f"Loaded {len(phash_index)} perceptual hashes for near-duplicate detection")
+    except Exception as e:
+        print(f"Error loading perceptual hash index: {e}")
 
-        # 1. Noise analysis - AI images often have different noise patterns
-        noise_score = calculate_noise_score(gray)
+def is_known_fake_image(image_hash):
+    """Check if the uploaded image's SHA256 hex digest matches any known fake image hash"""
+    if not fake_hashes:
+        return False
+    return image_hash in fake_hashes
 
-        # 2. Edge analysis - AI images may have unnatural edges
-        edge_score = calculate_edge_score(gray)
+def result_cache_key(image_hash, model):
+    """Cache key: upload digest plus everything that can change the analysis result under `model`"""
+    config = (
+        f"{model['fingerprint']}|{RESULT_PIPELINE_VERSION}|{STATS_PIXEL_BUDGET}|{STATS_BUDGET_MODE}|{PREPROCESS_BACKEND}"
+        f"|{phash_fingerprint}|{PHASH_MAX_DISTANCE}"
+        f"|{model['embedding_index'].metadata.get('corpus')}|{EMBEDDING_MATCH_THRESHOLD}"
+        f"|{MULTI_CROP_COUNT}|{MULTI_CROP_AGGREGATION}|{MULTI_CROP_BUDGET_MS}"
+        f"|{CASCADE_MODE}|{','.join(CASCADE_STAGES)}|{CASCADE_STATS_PIXELS}|{CASCADE_STATS_EXIT}"
+        f"|{CASCADE_FAST_MODEL_PATH}|{CASCADE_FAST_EXIT}|{CASCADE_MODEL_EXIT}|{CASCADE_BUDGET_MS}"
+        f"|{json.dumps(DECISION_CONFIG, sort_keys=True)}"
+    )
+    return f"{image_hash}:{hashlib.sha256(config.encode()).hexdigest()[:16]}"
 
-        # 3. Color distribution analysis
-        color_score = calculate_color_score(img_array)
+def run_model_batch(batch, engine=None):
+    """
+    Run a stacked batch of preprocessed images through `engine` (the micro-batch
+    key; the active engine when None). Each row is the score followed by the
+    image embedding, if any.
+    """
+    engine = engine if engine is not None else active_model['engine']
+    output, embeddings = engine.infer_with_embeddings(batch)
+    if embeddings is None:
+        return output[:, :1]
+    return np.concatenate([output[:, :1], embeddings], axis=1)
 
-        # 4. Compression artifact detection
-        compression_score = calculate_compression_score(gray)
+def multi_crop_count(engine):
+    """
+    Crops to score with the global view: MULTI_CROP_COUNT, capped by
+    MULTI_CROP_BUDGET_MS and so that the views fit one micro-batch
+    """
+    crops = min(MULTI_CROP_COUNT, MULTI_CROP_MAX)
+    if crops <= 0 or MULTI_CROP_BUDGET_MS <= 0:
+        return max(0, crops)
+    engine_stats = engine.stats()
+    if not engine_stats['images']:
+        return crops  # No measurements yet
+    per_image_ms = engine_stats['avg_call_ms'] * engine_stats['calls'] / engine_stats['images']
+    return max(0, min(crops, int(MULTI_CROP_BUDGET_MS / max(per_image_ms, 1e-3)) - 1))
 
-        return {
-            'hybrid_score': hybrid_score,
-            'noise_score': noise_score,
-            'edge_score': edge_score,
-            'color_score': color_score,
-            'compression_score': compression_score
-        }
+def reload_all(model_path=MODEL_PATH):
+    """Reload the model and hash databases, recording the outcome in reload_status"""
+    global reload_status
+    if not _reload_lock.acquire(blocking=False):
+        return False
 
-    except Exception as e:
-        print(f"Statistical analysis error: {e}")
-        return {
-            'hybrid_score': 0.5,
-            'noise_score': 0.5,
-            'edge_score': 0.5,
-            'color_score': 0.5,
-            'compression_score': 0.5
+    try:
+        reload_status = {'state': 'running', 'started_at': time.time(), 'model_path': model_path}
+        start = time.perf_counter()
+        model_ok = activate_model(model_path)
+        load_fake_hashes()
+        load_phash_index()
+        reload_status = {
+            'state': 'succeeded' if model_ok else 'failed',
+            'model_path': model_path,
+            'finished_at': time.time(),
+            'seconds': round(time.perf_counter() - start, 3)
         }
+        return model_ok
+    finally:
+        _reload_lock.release()
 
-def calculate_noise_score(gray_image):
-    """Analyze noise patterns typical of AI generation"""
-    try:
-        # High-frequency noise analysis
-        sobel = filters.sobel(gray_image.astype(float))
-        noise_std = np.std(sobel)
-
-        # AI images often have more uniform noise patterns
-        # Normalize to 0-1 scale (higher = more likely AI-generated)
-        noise_score = min(1.0, noise_std / 50.0)
-        return noise_score
-    except:
-        return 0.5
-
-def calculate_edge_score(gray_image):
-    """Analyze edge patterns for AI artifacts"""
+def _file_identity(path):
     try:
-        # Edge detection
-        edges = cv2.Canny(gray_image, 100, 200)
-        edge_density = np.sum(edges > 0) / (gray_image.shape[0] * gray_image.shape[1])
-
-        # AI images often have more defined edges
-        edge_score = min(1.0, edge_density * 2.0)
-        return edge_score
-    except:
-        return 0.5
-
-def calculate_color_score(rgb_image):
-    """Analyze color distribution patterns"""
-    try:
-        if len(rgb_image.shape) != 3:
-            return 0.5
+        stat = os.stat(path)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
 
-        # Analyze color channel correlations
-        r, g, b = rgb_image[:,:,0], rgb_image[:,:,1], rgb_image[:,:,2]
+def watch_model_files():
+    """Poll the model and hash files; reload whatever was replaced once it stops changing"""
+    watched = {
+        MODEL_PATH: lambda: reload_all(MODEL_PATH),
+        FAKE_HASHES_PATH: load_fake_hashes,
+        PHASH_INDEX_PATH: load_phash_index
+    }
+    seen = {path: _file_identity(path) for path in watched}
+    pending = {}
 
-        # AI images may have different RGB correlations
-        rg_corr = abs(np.corrcoef(r.flatten(), g.flatten())[0,1])
-        rb_corr = abs(np.corrcoef(r.flatten(), b.flatten())[0,1])
-        gb_corr = abs(np.corrcoef(g.flatten(), b.flatten())[0,1])
+    while True:
+        time.sleep(MODEL_WATCH_INTERVAL)
+        for path, reload_fn in watched.items():
+            identity = _file_identity(path)
+            if identity is None or identity == seen[path]:
+                pending.pop(path, None)
+                continue
+            # Wait one more interval to avoid loading a half-copied file
+            if pending.get(path) != identity:
+                pending[path] = identity
+                continue
+            print(f"[*] Detected new {path}, reloading...")
+            pending.pop(path)
+            seen[path] = identity
+            try:
+                reload_fn()
+            except Exception as e:
+                print(f"[-] Reload of {path} failed: {str(e)}")
 
-        avg_corr = (rg_corr + rb_corr + gb_corr) / 3
+def _run_boot_phase(name, load):
+    phase_start = time.perf_counter()
+    load()
+    boot_status['phases'][name] = round(time.perf_counter() - phase_start, 3)
+    print(f"[+] Boot phase {name}: {boot_status['phases'][name]:.2f}s")
 
-        # Lower correlation might indicate AI generation
-        color_score = max(0, 1.0 - avg_corr)
-        return color_score
-    except:
-        return 0.5
+def _finish_boot():
+    if MODEL_WATCH_INTERVAL > 0:
+        threading.Thread(target=watch_model_files, name="model-watcher", daemon=True).start()
+    job_manager.start()  # Resume jobs left queued or running by a previous worker
 
-def calculate_compression_score(gray_image):
-    """Detect JPEG compression artifacts common in AI images"""
-    try:
-        # Analyze 8x8 block boundaries (common JPEG artifact)
-        h, w = gray_image.shape
-        block_artifacts = 0
-
-        for i in range(0, h-8, 8):
-            for j in range(0, w-8, 8):
-                block = gray_image[i:i+8, j:j+8]
-                # Check for block boundary artifacts
-                if np.std(block) < 5:  # Very uniform blocks
-                    block_artifacts += 1
-
-        compression_score = min(1.0, block_artifacts / 50.0)
-        return compression_score
-    except:
-        return 0.5
-
-def hybrid_detection_decision(ai_result, ai_confidence, stats_score, hash_match=False):
+    boot_status['seconds'] = round(time.perf_counter() - _process_started, 3)
+    boot_status['state'] = 'ready' if active_model['engine'] is not None else 'failed'
+    _boot_done.set()
+    print(f"[+] Boot {boot_status['state']} after {boot_status['seconds']:.2f}s ({BOOT_MODE} mode)")
+
+def boot(model=True):
     """
-    Make final hybrid decision combining all detection methods
+    Load the model and hash databases on startup, logging how long each phase takes.
 
-    Returns: (final_result, final_confidence, detection_method)
+    With model=False (the gunicorn --preload master) only what forked workers
+    can share is loaded; boot_worker() does the rest in each worker.
     """
-    if hash_match:
-        return "FAKE", "100.0%", "hash_based"
+    boot_status['phases']['imports'] = round(time.perf_counter() - _process_started, 3)
+    print(f"[+] Boot phase imports: {boot_status['phases']['imports']:.2f}s")
 
-    # Parse AI confidence
-    ai_conf_value = float(ai_confidence.replace('%', '')) / 100.0
+    if model:
+        _run_boot_phase('model', lambda: activate_model(MODEL_PATH))
+    _run_boot_phase('fake_hashes', load_fake_hashes)
+    _run_boot_phase('phash_index', load_phash_index)
+    if model:
+        _finish_boot()
 
-    # Statistical analysis confidence
-    stats_confidence = stats_score
+def boot_worker():
+    """Per-worker startup after a --preload fork (gunicorn post_fork hook)"""
+    def load():
+        _run_boot_phase('model', lambda: activate_model(MODEL_PATH))
+        _finish_boot()
 
-    # Weighted decision making
-    if ai_result == "FAKE":
-        ai_weight = ai_conf_value
+    if BOOT_MODE == 'background':
+        threading.Thread(target=load, name="boot", daemon=True).start()
     else:
-        ai_weight = 1 - ai_conf_value
-
-    # Combine AI model and statistical analysis
-    combined_score = (ai_weight * 0.7) + (stats_confidence * 0.3)
-
-    # Confidence thresholds
-    if combined_score > 0.7:
-        final_result = "FAKE"
-        final_confidence = f"{min(99.9, combined_score * 100):.1f}%"
-        method = "hybrid_ai_stats"
-    elif combined_score > 0.6:
-        final_result = "FAKE"
-        final_confidence = f"{min(85.0, combined_score * 100):.1f}%"
-        method = "hybrid_suspicious"
-    elif combined_score < 0.3:
-        final_result = "REAL"
-        final_confidence = f"{max(85.0, (1 - combined_score) * 100):.1f}%"
-        method = "hybrid_real"
-    else:
-        # Uncertain - default to AI model result
-        final_result = ai_result
-        final_confidence = ai_confidence
-        method = "ai_model_fallback"
-
-    return final_result, final_confidence, method
-
-# Load model and fake hashes on startup
-load_ai_model()
-load_fake_hashes()
-
-def prepare_image(image, target_size=(128, 128)):
-    if image.mode != "RGB":
-        image = image.convert("RGB")
-    image = image.resize(target_size)
-    image = np.array(image)
-    image = np.expand_dims(image, axis=0)
-    image = image / 255.0 
-    return image
+        load()
+
+def serving_ready():
+    """
+    Boot finished and a model is active. The engine can be exposed before
+    the rest of the boot (hash databases) is done, and requests served then
+    would silently skip the known-fake checks.
+    """
+    return _boot_done.is_set() and active_model['engine'] is not None
+
+def model_unavailable():
+    """Error response when no model is active: 503 while booting, 500 if loading failed"""
+    if boot_status['state'] == 'booting':
+        return jsonify({'error': 'AI Model is still loading. Retry shortly.'}), 503
+    return jsonify({'error': 'AI Model not loaded. Check server logs.'}), 500
+
+batcher = MicroBatcher(
+    run_model_batch,
+    window_ms=BATCH_WINDOW_MS,
+    max_batch=BATCH_MAX_SIZE,
+    max_queue=BATCH_QUEUE_DEPTH
+)
+
+# Threads start on first use, so under --preload they are created in each worker
+analysis_pool = ThreadPoolExecutor(
+    max_workers=THREAD_BUDGET['analysis_threads'], thread_name_prefix='analysis'
+) if CONCURRENT_ANALYSIS else None
+
+result_cache = ResultCache(
+    max_entries=RESULT_CACHE_SIZE,
+    ttl_seconds=RESULT_CACHE_TTL,
+    disk_dir=RESULT_CACHE_DIR or None
+)
+
+decision_log = DecisionLog(
+    DECISION_LOG_DIR, flush_rows=DECISION_LOG_FLUSH_ROWS, flush_seconds=DECISION_LOG_FLUSH_SECONDS
+) if DECISION_LOG_DIR else None
+if decision_log is not None:
+    atexit.register(decision_log.flush)
+
+# analyze_file is defined below; jobs only call it once the module has loaded
+job_manager = JobManager(JOBS_DIR, lambda path: analyze_file(path), workers=JOB_WORKERS,
+                         retention=JOB_RETENTION_SECONDS)
+
+# Load model and fake hashes on startup. TensorFlow's thread pools do not
+# survive fork(), so under --preload the model is loaded by boot_worker().
+if SERVING_PRELOAD:
+    boot(model=False)
+elif BOOT_MODE == 'background':
+    threading.Thread(target=boot, name="boot", daemon=True).start()
+else:
+    boot()
+
+@app.before_request
+def track_request_start():
+    g.request_start = time.perf_counter()
+    g.request_endpoint = request.endpoint or 'unknown'
+    requests_in_flight.inc(endpoint=g.request_endpoint)
+
+@app.after_request
+def track_request_status(response):
+    g.request_status = response.status_code
+    return response
+
+@app.teardown_request
+def track_request_end(error=None):
+    # Runs after streamed responses (NDJSON endpoints) have finished sending
+    if 'request_start' not in g:
+        return
+    requests_in_flight.dec(endpoint=g.request_endpoint)
+    request_seconds.observe(
+        time.perf_counter() - g.request_start,
+        endpoint=g.request_endpoint, status=g.get('request_status', 500)
+    )
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text exposition of this worker's metrics"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/health/live', methods=['GET'])
+def liveness():
+    """The process is up and serving requests (it may still be loading the model)"""
+    return jsonify({'status': 'alive', 'boot': boot_status['state']})
+
+@app.route('/health/ready', methods=['GET'])
+def readiness():
+    """Ready for traffic: boot finished and a warmed-up model is active"""
+    ready = boot_status['state'] != 'booting' and active_model['engine'] is not None
+    return jsonify({
+        'ready': ready,
+        'model_loaded': active_model['engine'] is not None,
+        'boot': boot_status
+    }), 200 if ready else 503
 
 @app.route('/health', methods=['GET'])
 def health():
+    model_state = active_model
     return jsonify({
         'status': 'online',
-        'model_loaded': model is not None
+        'model_loaded': model_state['engine'] is not None,
+        'model': {
+            'fingerprint': model_state['fingerprint'],
+            'path': model_state['path'],
+            'load_seconds': model_state['load_seconds'],
+            'loaded_at': model_state['loaded_at'],
+            'embedding_index': {
+                'size': len(model_state['embedding_index']),
+                'ivf_lists': model_state['embedding_index'].n_lists
+            },
+            'reload': reload_status
+        },
+        'boot': boot_status,
+        'threads': THREAD_BUDGET,
+        'cascade': {
+            'stages': list(CASCADE_STAGES),
+            'budget_ms': CASCADE_BUDGET_MS,
+            'model_exit': CASCADE_MODEL_EXIT,
+            'model_exit_safe': CASCADE_MODEL_EXIT_SAFE,
+            'fast_model': model_state['fast_engine'] is not None,
+            'stage_costs_ms': cascade_costs.snapshot()
+        } if CASCADE_MODE else None,
+        'inference': model_state['engine'].stats() if model_state['engine'] is not None else None,
+        'batching': batcher.stats(),
+        'result_cache': result_cache.stats(),
+        'decision_log': decision_log.stats() if decision_log is not None else None
     })
 
-@app.route('/predict', methods=['POST'])
-def predict():
-    if model is None:
-        return jsonify({'error': 'AI Model not loaded. Check server logs.'}), 500
+def ingest_upload(file):
+    """
+    Hash an uploaded file in chunks, enforcing MAX_UPLOAD_BYTES.
 
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded'}), 400
+    Werkzeug has already spooled the multipart body (to disk past 500KB), so
+    the upload is never held in memory as a whole. Returns (stream, sha256 hex)
+    with the stream rewound for decoding.
+    """
+    stream = file.stream
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise UploadRejected(f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+        digest.update(chunk)
+    if size == 0:
+        raise UploadRejected("Empty upload", status=400)
+    upload_bytes.observe(size)
+    stream.seek(0)
+    return stream, digest.hexdigest()
 
+def open_image(source):
+    """Open an image lazily and reject it before decoding if it has too many pixels"""
     try:
-        file = request.files['file']
-        image_data = file.read()  # Get raw image data for hashing
+        img = Image.open(source)
+    except Image.DecompressionBombError as e:
+        raise UploadRejected(str(e))
+    width, height = img.size
+    if width * height > MAX_IMAGE_PIXELS:
+        raise UploadRejected(f"Image is {width}x{height}, above the {MAX_IMAGE_PIXELS} pixel limit")
+    return img
 
-        # PHASE 1: Hash-based detection (100% accuracy for known fakes)
-        hash_match = is_known_fake_image(image_data)
-        if hash_match:
-            print("Analysis: FAKE (100.0%) - Known fake image detected via hash")
-            return jsonify({
+def model_verdict(score):
+    """(result, confidence percent) for a [0, 1] FAKE score"""
+    if score > 0.5:
+        return "FAKE", score * 100
+    return "REAL", (1 - score) * 100
+
+def stats_response_fields(stats_data, source_size):
+    """Response fields describing a statistical analysis"""
+    return {
+        'stats_score': f"{stats_data['hybrid_score']:.3f}",
+        'pixel_stats': {
+            'noise': f"{stats_data['noise_score']:.3f}",
+            'edges': f"{stats_data['edge_score']:.3f}",
+            'chroma': f"{stats_data['color_score']:.3f}",
+            'artifacts': f"{stats_data['compression_score']:.3f}"
+        },
+        'stats_analysis': {
+            'mode': stats_data['mode'],
+            'resolution': stats_data['resolution'],
+            'source_resolution': source_size
+        }
+    }
+
+def run_statistics(img, source_size, timings=None, stats_timings=None):
+    """PHASE 4 at the configured pixel budget, features spread over the analysis pool"""
+    with phase_timer(timings, 'stats'):
+        return analyze_image_statistics(
+            img, timings=stats_timings,
+            pixel_budget=STATS_PIXEL_BUDGET, budget_mode=STATS_BUDGET_MODE,
+            source_size=source_size, executor=analysis_pool
+        )
+
+def new_cascade():
+    """Per-request cascade trace, or None when CASCADE_MODE is off"""
+    if not CASCADE_MODE:
+        return None
+    return CascadeTrace(CASCADE_STAGES, CASCADE_BUDGET_MS, cascade_costs)
+
+def _stage(cascade, name):
+    return cascade.stage(name) if cascade is not None else nullcontext()
+
+def _decided(cascade, stage, result):
+    return cascade.decide(stage, result) if cascade is not None else result
+
+def _note(raw, **fields):
+    if raw is not None:
+        raw.update(fields)
+
+def record_decision(image_hash, result, **raw):
+    """Append the raw numbers behind a fresh verdict to the decision log, if enabled"""
+    if decision_log is None:
+        return
+    try:
+        decision_log.record(image_hash, result['result'], method=result.get('detection_method'), **raw)
+    except Exception as e:
+        print(f"Decision log write failed: {e}")
+
+def analyze_image_data(image_source, timings=None, cascade=None, raw=None, model=None):
+    """
+    Run decode, model inference, statistics and the hybrid decision on an upload (file object or path)
+
+    When `timings` is a dict it is filled with per-phase durations in milliseconds.
+    With a CascadeTrace the cheaper stages may decide early (see cascade.py).
+    When `raw` is a dict it is filled with the numbers behind the verdict, as
+    DecisionLog.record() keyword arguments. `model` is the request's snapshot
+    of active_model (taken here when None).
+    """
+    model = model if model is not None else active_model
+    # PHASE 2: Open image for analysis (header check first, then one decode,
+    # reduced to the stats proxy size when the backend supports it)
+    with phase_timer(timings, 'decode'):
+        img = open_image(image_source)
+        decode_size = (128, 128)
+        if MULTI_CROP_COUNT > 0:
+            decode_size = img.size  # Crops need the full resolution
+        elif PREPROCESS_BACKEND != 'pil':
+            decode_size = stats_proxy_size(img.size, STATS_PIXEL_BUDGET)
+        img, source_size = decode_image(image_source, PREPROCESS_BACKEND, min_size=decode_size, image=img)
+        img.load()
+
+    # Near-duplicates of known fakes (re-saved, resized, recompressed)
+    if cascade is None or cascade.should_run('hash', have_score=False):
+        with phase_timer(timings, 'phash'), _stage(cascade, 'hash'):
+            match = phash_index.query(dhash(img), PHASH_MAX_DISTANCE) if len(phash_index) else None
+        hash_lookups.inc(db='phash', outcome='hit' if match is not None else 'miss')
+        if match is not None:
+            matched_file, distance = match
+            _note(raw, hash_match='phash')
+            confidence = 100.0 * (1 - distance / 64)
+            print(f"Analysis: FAKE ({confidence:.1f}%) - Perceptual hash match {matched_file} at distance {distance}")
+            return _decided(cascade, 'hash', {
                 'result': 'FAKE',
-                'confidence': '100.0%',
-                'detection_method': 'hash_based'
+                'confidence': f"{confidence:.1f}%",
+                'detection_method': 'perceptual_hash',
+                'hash_distance': distance
             })
 
-        # PHASE 2: Open image for analysis
-        img = Image.open(io.BytesIO(image_data))
+    # Cascade: statistics on a small proxy, decisive only when extreme
+    proxy_stats = None
+    if cascade is not None and cascade.should_run('stats', have_score=False):
+        with phase_timer(timings, 'stats_proxy'), cascade.stage('stats'):
+            proxy_stats = analyze_image_statistics(
+                img, pixel_budget=CASCADE_STATS_PIXELS, budget_mode='downsample',
+                source_size=source_size, executor=analysis_pool
+            )
+        _note(raw, stats=proxy_stats)
+        if is_decisive(proxy_stats['hybrid_score'], CASCADE_STATS_EXIT):
+            stats_result, stats_confidence = model_verdict(proxy_stats['hybrid_score'])
+            print(f"Cascade Analysis: {stats_result} ({stats_confidence:.1f}%) - decided by stats")
+            return cascade.decide('stats', dict({
+                'result': stats_result,
+                'confidence': f"{stats_confidence:.1f}%",
+                'detection_method': 'cascade_stats'
+            }, **stats_response_fields(proxy_stats, source_size)))
+
+    # Cascade: exported copy of the model, a fraction of the full model's cost
+    fast_engine = model['fast_engine']
+    if cascade is not None and fast_engine is not None and cascade.should_run('fast_model', have_score=False):
+        with phase_timer(timings, 'fast_model'), cascade.stage('fast_model'):
+            fast_score = float(fast_engine.infer(to_model_input(img, target_size=(128, 128)))[0, 0])
+        fast_result, fast_confidence = model_verdict(fast_score)
+        if is_decisive(fast_score, CASCADE_FAST_EXIT) or not cascade.should_run('model'):
+            print(f"Cascade Analysis: {fast_result} ({fast_confidence:.1f}%) - decided by fast_model")
+            return cascade.decide('fast_model', {
+                'result': fast_result,
+                'confidence': f"{fast_confidence:.1f}%",
+                'detection_method': 'cascade_fast_model',
+                'ai_model_confidence': f"{fast_confidence:.1f}%"
+            })
+
+    # PHASE 3: AI Model Prediction
+    # Score and embedding search use the same snapshot: the forward pass is
+    # queued keyed by this engine, even if a reload lands while stats run
+    engine = model['engine']
+    embedding_index = model['embedding_index']
+    boxes = crop_boxes(img.size, multi_crop_count(engine)) if MULTI_CROP_COUNT > 0 else []
+    with _stage(cascade, 'model'):
+        with phase_timer(timings, 'preprocess'):
+            if boxes:
+                processed_img = multi_crop_inputs(img, boxes, target_size=(128, 128))
+            else:
+                processed_img = to_model_input(img, target_size=(128, 128))
+        # The views are queued together, all or nothing. There are at most
+        # BATCH_MAX_SIZE of them, so they usually share one model batch, but
+        # items already queued by other requests can split them across two.
+        inference_start = time.perf_counter()
+        if boxes:
+            pending = batcher.submit_many_async(processed_img, key=engine)
+        else:
+            pending = [batcher.submit_async(processed_img, key=engine)]
+        inference_done = []
+        pending[-1].add_done_callback(lambda _: inference_done.append(time.perf_counter()))
+
+        # PHASE 4 overlaps the forward pass, unless the cascade may not need it
+        stats_data = None
+        stats_timings = {}
+        if cascade is None and CONCURRENT_ANALYSIS:
+            stats_data = run_statistics(img, source_size, timings, stats_timings)
+
+        outputs = [future.result() for future in pending]
+        if timings is not None:
+            # The callback may still be running when result() returns
+            done_at = inference_done[0] if inference_done else time.perf_counter()
+            timings['inference'] = timings.get('inference', 0.0) + (done_at - inference_start) * 1000.0
+        model_output = outputs[0]  # Global view; its embedding is what the index holds
+        ai_score = float(model_output[0])
+        multi_crop = {}
+        if boxes:
+            view_scores = [float(row[0]) for row in outputs]
+            ai_score = aggregate_scores(view_scores, MULTI_CROP_AGGREGATION)
+            multi_crop = {'multi_crop': {
+                'crops': len(boxes),
+                'aggregation': MULTI_CROP_AGGREGATION,
+                'global_score': round(view_scores[0], 4),
+                'crop_scores': [round(v, 4) for v in view_scores[1:]]
+            }}
+        ai_result, ai_confidence = model_verdict(ai_score)
+        _note(raw, model_score=ai_score)
+        if stats_data is not None:
+            _note(raw, stats=stats_data)
 
-        # PHASE 3: AI Model Prediction
-        processed_img = prepare_image(img, target_size=(128, 128))
-        prediction = model.predict(processed_img, verbose=0)
-        ai_score = float(prediction[0][0])
-        ai_result = "FAKE" if ai_score > 0.5 else "REAL"
-        ai_confidence = (ai_score if ai_score > 0.5 else (1 - ai_score)) * 100
+        # Variants of known fakes, from the embedding of the same forward pass
+        embedding_signal = {}
+        if len(model_output) > 1 and len(embedding_index):
+            with phase_timer(timings, 'embedding'):
+                matched_file, similarity = embedding_index.nearest(model_output[1:])
+            matched = similarity >= EMBEDDING_MATCH_THRESHOLD
+            _note(raw, embedding_similarity=similarity, hash_match='embedding' if matched else 'none')
+            hash_lookups.inc(db='embedding', outcome='hit' if matched else 'miss')
+            embedding_signal = {'embedding_match': bool(matched), 'embedding_similarity': round(similarity, 4)}
+            if matched:
+                print(f"Analysis: FAKE ({similarity * 100:.1f}%) - Embedding match {matched_file} at similarity {similarity:.3f}")
+                return _decided(cascade, 'model', dict({
+                    'result': 'FAKE',
+                    'confidence': f"{similarity * 100:.1f}%",
+                    'detection_method': 'embedding_match',
+                    'ai_model_confidence': f"{ai_confidence:.1f}%"
+                }, **embedding_signal, **multi_crop))
 
-        # PHASE 4: Statistical Analysis
-        stats_data = analyze_image_statistics(img)
+    if cascade is not None and (is_decisive(ai_score, CASCADE_MODEL_EXIT) or not cascade.should_run('fusion')):
+        print(f"Cascade Analysis: {ai_result} ({ai_confidence:.1f}%) - decided by model")
+        return cascade.decide('model', dict({
+            'result': ai_result,
+            'confidence': f"{ai_confidence:.1f}%",
+            'detection_method': 'ai_model',
+            'ai_model_confidence': f"{ai_confidence:.1f}%"
+        }, **embedding_signal, **multi_crop))
+
+    with _stage(cascade, 'fusion'):
+        # PHASE 4: Statistical Analysis, if it did not run alongside the model
+        # (the cascade's proxy already covered small images)
+        if stats_data is None:
+            if proxy_stats is not None and img.size[0] * img.size[1] <= CASCADE_STATS_PIXELS:
+                stats_data = proxy_stats
+            else:
+                stats_data = run_statistics(img, source_size, timings, stats_timings)
         stats_score = stats_data['hybrid_score']
+        _note(raw, stats=stats_data)
 
         # PHASE 5: Hybrid Decision Making
-        final_result, final_confidence, detection_method = hybrid_detection_decision(
-            ai_result, f"{ai_confidence:.1f}%", stats_score, hash_match
+        with phase_timer(timings, 'decision'):
+            final_result, final_confidence, detection_method = hybrid_decision(
+                ai_score, stats_score, DECISION_CONFIG
+            )
+
+    print(f"Hybrid Analysis: {final_result} ({final_confidence}) - Method: {detection_method}")
+    print(f"Detailed Stats: Noise={stats_data['noise_score']:.2f}, Edge={stats_data['edge_score']:.2f}, Color={stats_data['color_score']:.2f}")
+    print("Stats Timings: " + ", ".join(f"{k}={v:.1f}ms" for k, v in stats_timings.items()))
+
+    return _decided(cascade, 'fusion', dict({
+        'result': final_result,
+        'confidence': final_confidence,
+        'detection_method': detection_method,
+        'ai_model_confidence': f"{ai_confidence:.1f}%"
+    }, **stats_response_fields(stats_data, source_size), **embedding_signal, **multi_crop))
+
+def analyze_source(source, image_hash, timings=None):
+    """Full analysis of an image (file object or path) whose SHA256 hex digest is known"""
+    cascade = new_cascade()
+
+    # PHASE 1: Hash-based detection (100% accuracy for known fakes)
+    if cascade is None or 'hash' in cascade.stages:
+        with phase_timer(timings, 'hash_check'):
+            known_fake = is_known_fake_image(image_hash)
+        hash_lookups.inc(db='sha256', outcome='hit' if known_fake else 'miss')
+        if known_fake:
+            print("Analysis: FAKE (100.0%) - Known fake image detected via hash")
+            detections.inc(method='hash_based', result='FAKE')
+            if cascade is not None:
+                cascade_decisions.inc(stage='hash')
+            record_decision(image_hash, {'result': 'FAKE', 'detection_method': 'hash_based'}, hash_match='sha256')
+            return _decided(cascade, 'hash', {
+                'result': 'FAKE',
+                'confidence': '100.0%',
+                'detection_method': 'hash_based'
+            })
+
+    # PHASES 2-5, shared with earlier and concurrent uploads of the same file.
+    # Hits and coalesced requests only spend time waiting on the cache.
+    model = active_model  # One model for the whole request, even across a reload
+    lookup_timings = {}
+    raw = {}
+    with phase_timer(lookup_timings, 'cache'):
+        result, cache_status = result_cache.get_or_compute(
+            result_cache_key(image_hash, model), lambda: analyze_image_data(source, timings, cascade, raw, model)
         )
+    cache_lookups.inc(status=cache_status)
+    if cache_status == 'miss':
+        record_decision(image_hash, result, **raw)
+    if cache_status != 'miss':
+        print(f"Analysis: {result['result']} ({result['confidence']}) - Result cache {cache_status}")
+        if timings is not None:
+            timings.update(lookup_timings)
+    detections.inc(method=result['detection_method'], result=result['result'])
+    if 'decided_by' in result:
+        cascade_decisions.inc(stage=result['decided_by'])
+    return dict(result, cache=cache_status)
+
+def analyze_file(path):
+    """Analyze an image file on disk (background jobs)"""
+    _boot_done.wait()  # Jobs resumed at startup wait for the model
+    if active_model['engine'] is None:
+        raise RuntimeError('AI Model not loaded')
+    return analyze_source(path, file_fingerprint(path))
 
-        print(f"Hybrid Analysis: {final_result} ({final_confidence}) - Method: {detection_method}")
-        print(f"Detailed Stats: Noise={stats_data['noise_score']:.2f}, Edge={stats_data['edge_score']:.2f}, Color={stats_data['color_score']:.2f}")
-
-        return jsonify({
-            'result': final_result,
-            'confidence': final_confidence,
-            'detection_method': detection_method,
-            'ai_model_confidence': f"{ai_confidence:.1f}%",
-            'stats_score': f"{stats_score:.3f}",
-            'pixel_stats': {
-                'noise': f"{stats_data['noise_score']:.3f}",
-                'edges': f"{stats_data['edge_score']:.3f}",
-                'chroma': f"{stats_data['color_score']:.3f}",
-                'artifacts': f"{stats_data['compression_score']:.3f}"
-            }
-        })
+@app.route('/predict', methods=['POST'])
+def predict():
+    if not serving_ready():
+        return model_unavailable()
+
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+
+    timings = {}
+    start = time.perf_counter()
+    try:
+        file = request.files['file']
+        with phase_timer(timings, 'upload'):
+            image_stream, image_hash = ingest_upload(file)
+        response = jsonify(analyze_source(image_stream, image_hash, timings))
+    except UploadRejected as e:
+        print(f"Upload Rejected: {str(e)}")
+        return jsonify({'error': str(e)}), e.status
+    except BatcherOverloaded as e:
+        print(f"Prediction Rejected: {str(e)}")
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         print(f"Prediction Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+    for phase, ms in timings.items():
+        phase_seconds.observe(ms / 1000.0, phase=phase)
+    timings['total'] = (time.perf_counter() - start) * 1000.0
+    response.headers['Server-Timing'] = server_timing_header(timings)
+    response.headers['Timing-Allow-Origin'] = '*'
+    return response
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Analyze every multipart 'file' part and stream one NDJSON line per file
+    as soon as its result is ready, then a summary line. Result lines carry
+    the same fields as /predict plus index, filename and sha256; identical
+    uploads are analyzed once and reported with duplicate_of.
+    """
+    if not serving_ready():
+        return model_unavailable()
+
+    # Per-request body limit (Flask 3.1+), above the single-upload one
+    request.max_content_length = BATCH_PREDICT_MAX_BYTES + 64 * 1024
+    files = request.files.getlist('file')
+    if not files:
+        return jsonify({'error': 'No files uploaded'}), 400
+    if len(files) > BATCH_PREDICT_MAX_FILES:
+        return jsonify({'error': f"At most {BATCH_PREDICT_MAX_FILES} files per batch"}), 400
+
+    # Hash everything first so duplicates are analyzed once
+    groups = {}   # sha256 -> [(index, filename)], in upload order
+    streams = {}  # sha256 -> stream of the first upload with that digest
+    rejected = []
+    for index, file in enumerate(files):
+        try:
+            stream, image_hash = ingest_upload(file)
+        except UploadRejected as e:
+            rejected.append({'type': 'error', 'index': index, 'filename': file.filename,
+                             'error': str(e), 'status': e.status})
+            continue
+        groups.setdefault(image_hash, []).append((index, file.filename))
+        streams.setdefault(image_hash, stream)
+
+    def analyze_upload(image_hash):
+        timings = {}
+        start = time.perf_counter()
+        result = analyze_source(streams[image_hash], image_hash, timings)
+        for phase, ms in timings.items():
+            phase_seconds.observe(ms / 1000.0, phase=phase)
+        timings['total'] = (time.perf_counter() - start) * 1000.0
+        return dict(result, timings={phase: round(ms, 1) for phase, ms in timings.items()})
+
+    def generate():
+        start = time.perf_counter()
+        verdicts = {'FAKE': 0, 'REAL': 0}
+        for line in rejected:
+            yield json.dumps(line) + "\n"
+
+        workers = max(1, min(BATCH_PREDICT_CONCURRENCY, len(groups)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='predict-batch') as pool:
+            futures = {pool.submit(analyze_upload, image_hash): image_hash for image_hash in groups}
+            for future in as_completed(futures):
+                image_hash = futures[future]
+                try:
+                    fields = dict(future.result(), type='result')
+                except (UploadRejected, BatcherOverloaded) as e:
+                    status = e.status if isinstance(e, UploadRejected) else 503
+                    fields = {'type': 'error', 'error': str(e), 'status': status}
+                except Exception as e:
+                    print(f"Batch Prediction Error: {str(e)}")
+                    fields = {'type': 'error', 'error': str(e), 'status': 500}
+
+                first_index = groups[image_hash][0][0]
+                for index, filename in groups[image_hash]:
+                    line = dict(fields, index=index, filename=filename, sha256=image_hash)
+                    if index != first_index:
+                        line['duplicate_of'] = first_index
+                    if line['type'] == 'result':
+                        verdicts[line['result']] = verdicts.get(line['result'], 0) + 1
+                    yield json.dumps(line) + "\n"
+
+        errors = len(files) - sum(verdicts.values())
+        print(f"Batch Analysis: {len(files)} files ({len(groups)} unique), "
+              f"{verdicts['FAKE']} FAKE, {verdicts['REAL']} REAL, {errors} errors")
+        yield json.dumps({
+            'type': 'summary',
+            'files': len(files),
+            'analyzed': len(groups),
+            'duplicates': sum(len(g) - 1 for g in groups.values()),
+            'fake': verdicts['FAKE'],
+            'real': verdicts['REAL'],
+            'errors': errors,
+            'seconds': round(time.perf_counter() - start, 3)
+        }) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def spool_upload_to_disk(file, suffix=''):
+    """Copy an upload to a named temp file in chunks (OpenCV needs a path); caller deletes it"""
+    size = 0
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        for chunk in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b''):
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                tmp.close()
+                os.remove(tmp.name)
+                raise UploadRejected(f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+            tmp.write(chunk)
+    return tmp.name
+
+@app.route('/predict_video', methods=['POST'])
+def predict_video():
+    """Stream per-frame results and a final summary for an uploaded video as NDJSON"""
+    state = active_model
+    if not serving_ready():
+        return model_unavailable()
+
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+
+    mode = request.args.get('mode', VIDEO_SAMPLE_MODE)
+    if mode not in SAMPLE_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(SAMPLE_MODES)}"}), 400
+    try:
+        sample_fps = min(30.0, max(0.01, float(request.args.get('fps', VIDEO_SAMPLE_FPS))))
+    except ValueError:
+        return jsonify({'error': 'fps must be a number'}), 400
+
+    file = request.files['file']
+    try:
+        video_path = spool_upload_to_disk(file, suffix=os.path.splitext(file.filename or '')[1])
+    except UploadRejected as e:
+        return jsonify({'error': str(e)}), e.status
+
+    def generate():
+        try:
+            events = analyze_video(
+                video_path,
+                lambda batch: state['engine'].infer(batch)[:, 0],
+                batch_size=BATCH_MAX_SIZE,
+                sample_fps=sample_fps,
+                mode=mode,
+                scene_threshold=VIDEO_SCENE_THRESHOLD,
+                max_frames=VIDEO_MAX_FRAMES
+            )
+            for event in events:
+                if event['type'] == 'summary':
+                    print(f"Video Analysis: {event.get('result', 'ERROR')} over {event['frames_analyzed']} frames")
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            print(f"Video Prediction Error: {str(e)}")
+            yield json.dumps({'type': 'error', 'error': str(e)}) + "\n"
+        finally:
+            os.remove(video_path)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Queue uploaded files (multipart 'file' parts) or a server-side folder as a background job"""
+    # Per-request body limit (Flask 3.1+), above the single-upload one
+    request.max_content_length = JOBS_MAX_BYTES + 64 * 1024
+    body = request.get_json(silent=True) or {}
+    folder = body.get('folder')
+
+    if folder is not None:
+        if not JOB_FOLDER_ROOT:
+            return jsonify({'error': 'Folder jobs disabled (JOB_FOLDER_ROOT not set)'}), 403
+        root = os.path.realpath(JOB_FOLDER_ROOT)
+        folder = os.path.realpath(os.path.join(root, folder))
+        if os.path.commonpath([root, folder]) != root or not os.path.isdir(folder):
+            return jsonify({'error': 'Folder not found under JOB_FOLDER_ROOT'}), 400
+        manifest = job_manager.create_job(folder=folder)
+    else:
+        files = request.files.getlist('file')
+        if not files:
+            return jsonify({'error': 'No files uploaded'}), 400
+        manifest = job_manager.create_job(uploads=[(f.filename, f.stream) for f in files])
+
+    print(f"Job {manifest['id']} queued with {manifest['total']} items")
+    return jsonify({
+        'job_id': manifest['id'],
+        'state': manifest['state'],
+        'total': manifest['total'],
+        'status_url': f"/jobs/{manifest['id']}",
+        'results_url': f"/jobs/{manifest['id']}/results"
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    try:
+        return jsonify(job_manager.status(job_id))
+    except KeyError:
+        return jsonify({'error': 'Job not found'}), 404
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    """Stream a job's results as NDJSON; follows the job until it finishes unless ?follow=0"""
+    follow = request.args.get('follow', '1') != '0'
+    try:
+        lines = job_manager.iter_results(job_id, follow=follow)
+        first = next(lines, None)  # Raises KeyError for unknown jobs before streaming starts
+    except KeyError:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def generate():
+        if first is not None:
+            yield first
+            yield from lines
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    return jsonify({'error': f'Upload exceeds {MAX_UPLOAD_BYTES} bytes'}), 413
+
+@app.route('/admin/reload', methods=['GET', 'POST'])
+def admin_reload():
+    """Trigger (POST) or inspect (GET) a background reload of the model and hash databases"""
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Admin API disabled (ADMIN_TOKEN not set)'}), 403
+    # Constant-time comparison, so response timing does not leak the token
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode(), ADMIN_TOKEN.encode()):
+        return jsonify({'error': 'Invalid admin token'}), 403
+
+    if request.method == 'GET':
+        return jsonify({'reload': reload_status, 'fingerprint': active_model['fingerprint']})
+
+    # Applies to the worker that receives it; with several workers, replace the
+    # files and let MODEL_WATCH_INTERVAL pick them up in every worker
+    body = request.get_json(silent=True) or {}
+    model_path = body.get('model_path', MODEL_PATH)
+    if not os.path.exists(model_path):
+        return jsonify({'error': f'Model file not found: {model_path}'}), 400
+    if _reload_lock.locked():
+        return jsonify({'error': 'Reload already in progress', 'reload': reload_status}), 409
+
+    threading.Thread(target=reload_all, args=(model_path,), name="model-reload", daemon=True).start()
+    return jsonify({'status': 'reload started', 'model_path': model_path}), 202
+
 if __name__ == '__main__':
     # Use PORT environment variable for production hosting
     port = int(os.environ.get('PORT', 5002))
@@ -1,12 +1,32 @@
 import os
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import tensorflow as tf
 from tensorflow import keras
-from PIL import Image
-import numpy as np
 import json
 import csv
+import hashlib
 from datetime import datetime
-import glob
+from PIL import Image
+from inference_engine import InferenceEngine
+from preprocessing import decode_image, to_model_input, stats_proxy_size
+from decision import hybrid_decision, load_decision_config
+from decision_store import DecisionLog
+from forensics import analyze_image_statistics
+
+# Same decode backends as the Flask app: 'pil', 'draft' or 'cv2'
+PREPROCESS_BACKEND = os.environ.get('PREPROCESS_BACKEND', 'pil')
+# Statistics phase settings for --stats, as in the Flask app
+STATS_PIXEL_BUDGET = int(os.environ.get('STATS_PIXEL_BUDGET', 1024 * 1024))
+STATS_BUDGET_MODE = os.environ.get('STATS_BUDGET_MODE', 'tiles')
+# Hybrid decision logged with --stats, as served by the Flask app
+DECISION_CONFIG = load_decision_config(os.environ.get('DECISION_CONFIG', ''))
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp')
+LABELS = ('FAKE', 'REAL')
 
 def load_model():
     """Load the fixed model"""
@@ -27,112 +47,352 @@ def load_model():
 def prepare_image(image_path, target_size=(128, 128)):
     """Prepare image for prediction (same as Flask app)"""
     try:
-        img = Image.open(image_path)
-        if img.mode != "RGB":
-            img = img.convert("RGB")
-        img = img.resize(target_size)
-        img_array = np.array(img)
-        img_array = np.expand_dims(img_array, axis=0)
-        img_array = img_array / 255.0
-        return img_array
+        img, _ = decode_image(image_path, PREPROCESS_BACKEND, min_size=target_size)
+        return to_model_input(img, target_size)
     except Exception as e:
         print(f"❌ Error preparing image {image_path}: {e}")
         return None
 
-def analyze_image(model, image_path):
+def make_result(image_path, label, score):
+    """Build the per-image report entry for a model score"""
+    result = "FAKE" if score > 0.5 else "REAL"
+    confidence = (score if score > 0.5 else (1 - score)) * 100
+
+    return {
+        'filename': os.path.basename(image_path),
+        'filepath': image_path,
+        'label': label,
+        'prediction': result,
+        'confidence_score': score,
+        'confidence_percent': f"{confidence:.2f}%",
+        'is_correct': result == label
+    }
+
+def file_digest(path):
+    """SHA256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def record_decision(decision_log, raw, result):
+    """
+    Append an image's model score to the decision log, if any. With
+    statistics the logged verdict is the server's hybrid decision, so that
+    replaying the same config reproduces it; otherwise the model's verdict.
+    """
+    if decision_log is None:
+        return
+    score = result['confidence_score']
+    verdict, method = result['prediction'], 'ai_model'
+    if raw['stats'] is not None:
+        verdict, _, method = hybrid_decision(score, raw['stats']['hybrid_score'], DECISION_CONFIG)
+    decision_log.record(raw['digest'], verdict, model_score=score, stats=raw['stats'],
+                        label=result['label'], method=method)
+
+def analyze_image(engine, image_path, label="FAKE", decision_log=None, with_stats=False):
     """Analyze a single image and return results"""
-    processed_img = prepare_image(image_path)
-    if processed_img is None:
+    decoded = decode_to_tensor(image_path, with_stats=with_stats, with_digest=decision_log is not None)
+    if decoded is None:
         return None
+    tensor, raw = decoded
 
     try:
-        prediction = model.predict(processed_img, verbose=0)
-        score = float(prediction[0][0])
-        result = "FAKE" if score > 0.5 else "REAL"
-        confidence = (score if score > 0.5 else (1 - score)) * 100
-
-        return {
-            'filename': os.path.basename(image_path),
-            'filepath': image_path,
-            'prediction': result,
-            'confidence_score': score,
-            'confidence_percent': f"{confidence:.2f}%",
-            'is_correct': result == "FAKE"  # Since these are fake images
-        }
+        prediction = engine.infer(tensor[np.newaxis])
+        result = make_result(image_path, label, float(prediction[0][0]))
     except Exception as e:
         print(f"❌ Error analyzing {image_path}: {e}")
         return None
-
-def scan_fake_folder():
-    """Scan the Fake folder for images"""
-    fake_folder = 'Fake'
-
-    if not os.path.exists(fake_folder):
-        print(f"❌ Fake folder not found: {fake_folder}")
-        print("Please create the 'Fake' folder and add your 73 fake images.")
-        return []
-
-    # Find all image files
-    image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff', '*.webp']
-    image_files = []
-
-    for ext in image_extensions:
-        pattern = os.path.join(fake_folder, ext)
-        image_files.extend(glob.glob(pattern))
-
-    image_files.sort()  # Sort for consistent ordering
-
-    print(f"📁 Found {len(image_files)} images in {fake_folder}/")
-    return image_files
-
-def generate_reports(results, total_images):
-    """Generate comprehensive reports"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    # Calculate statistics
-    correct_detections = sum(1 for r in results if r['is_correct'])
-    accuracy = (correct_detections / total_images) * 100 if total_images > 0 else 0
-
-    fake_predictions = sum(1 for r in results if r['prediction'] == "FAKE")
-    real_predictions = sum(1 for r in results if r['prediction'] == "REAL")
-
-    # Summary report
-    summary = {
-        'analysis_timestamp': datetime.now().isoformat(),
-        'total_images_analyzed': total_images,
-        'correctly_detected_as_fake': correct_detections,
-        'accuracy_percentage': f"{accuracy:.2f}%",
-        'predicted_as_fake': fake_predictions,
-        'predicted_as_real': real_predictions,
-        'false_negatives': real_predictions,  # Fake images predicted as real
-        'results': results
-    }
-
-    # Save JSON report
-    json_filename = f"fake_images_analysis_{timestamp}.json"
-    with open(json_filename, 'w') as f:
-        json.dump(summary, f, indent=2)
-    print(f"💾 JSON report saved: {json_filename}")
-
-    # Save CSV report
-    csv_filename = f"fake_images_analysis_{timestamp}.csv"
-    with open(csv_filename, 'w', newline='') as f:
-        fieldnames = ['filename', 'prediction', 'confidence_percent', 'is_correct']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for result in results:
-            writer.writerow({
+    record_decision(decision_log, raw, result)
+    return result
+
+def parse_folder_spec(spec):
+    """'PATH' or 'PATH=LABEL'; without a label the folder name (Fake/Real) is used"""
+    folder, _, label = spec.partition('=')
+    label = (label or os.path.basename(os.path.normpath(folder))).upper()
+    if label not in LABELS:
+        raise argparse.ArgumentTypeError(
+            f"Cannot infer label for '{folder}': name it Fake/Real or pass {folder}=FAKE|REAL"
+        )
+    return folder, label
+
+def scan_labeled_folders(folder_specs):
+    """Recursively scan labeled folders, returning sorted (image_path, label) pairs"""
+    items = []
+    for folder, label in folder_specs:
+        if not os.path.isdir(folder):
+            print(f"❌ Folder not found: {folder}")
+            continue
+
+        image_files = []
+        for root, _, names in os.walk(folder):
+            image_files.extend(os.path.join(root, name) for name in names
+                               if name.lower().endswith(IMAGE_EXTENSIONS))
+        image_files.sort()  # Sort for consistent ordering
+
+        print(f"📁 Found {len(image_files)} {label} images in {folder}/")
+        items.extend((path, label) for path in image_files)
+    return items
+
+def decode_to_tensor(image_path, target_size=(128, 128), with_stats=False, with_digest=False):
+    """
+    Decode worker: (one (H, W, 3) float32 tensor, raw) or None if the image
+    is unreadable. `raw` holds the file digest and statistics when asked for.
+    """
+    if not with_stats:
+        processed_img = prepare_image(image_path, target_size)
+        if processed_img is None:
+            return None
+        return processed_img[0], {'digest': file_digest(image_path) if with_digest else None, 'stats': None}
+
+    # One decode at the stats proxy size feeds both the model and the statistics
+    try:
+        img = Image.open(image_path)
+        img, source_size = decode_image(image_path, PREPROCESS_BACKEND,
+                                        min_size=stats_proxy_size(img.size, STATS_PIXEL_BUDGET), image=img)
+        tensor = to_model_input(img, target_size)[0]
+        stats = analyze_image_statistics(img, pixel_budget=STATS_PIXEL_BUDGET, budget_mode=STATS_BUDGET_MODE,
+                                         source_size=source_size)
+    except Exception as e:
+        print(f"❌ Error preparing image {image_path}: {e}")
+        return None
+    return tensor, {'digest': file_digest(image_path) if with_digest else None, 'stats': stats}
+
+def run_pipeline(engine, items, batch_size=16, prefetch=4, workers=None, decision_log=None, with_stats=False):
+    """
+    Analyze (image_path, label) pairs with decoding on a thread pool running
+    up to `prefetch` batches ahead of batched inference on the main thread.
+    Yields per-image results in input order; with a `decision_log` each
+    image's score (and statistics, `with_stats`) is recorded for replay.
+    """
+    workers = workers or os.cpu_count() or 1
+    batch = np.empty((batch_size, 128, 128, 3), dtype=np.float32)
+    in_flight = deque()
+    items = iter(items)
+
+    def fill(pool):
+        while len(in_flight) < batch_size * prefetch:
+            item = next(items, None)
+            if item is None:
+                return
+            in_flight.append((item, pool.submit(decode_to_tensor, item[0], with_stats=with_stats,
+                                                with_digest=decision_log is not None)))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='decode') as pool:
+        fill(pool)
+        while in_flight:
+            pending = []
+            while in_flight and len(pending) < batch_size:
+                (image_path, label), future = in_flight.popleft()
+                decoded = future.result()
+                if decoded is None:
+                    continue
+                tensor, raw = decoded
+                batch[len(pending)] = tensor
+                pending.append((image_path, label, raw))
+            fill(pool)  # Keep decoders busy while the model runs
+
+            if not pending:
+                continue
+            try:
+                scores = engine.infer(batch[:len(pending)])[:, 0]
+            except Exception as e:
+                print(f"❌ Error analyzing batch of {len(pending)} images: {e}")
+                continue
+            for (image_path, label, raw), score in zip(pending, scores):
+                result = make_result(image_path, label, float(score))
+                record_decision(decision_log, raw, result)
+                yield result
+
+CSV_FIELDS = ['filename', 'label', 'prediction', 'confidence_percent', 'is_correct']
+
+class ReportCounters:
+    """Running totals behind the summary report, so results need not be kept in memory"""
+
+    def __init__(self):
+        self.total = 0
+        self.correct = 0
+        # Counts keyed by true label, then predicted label
+        self.matrix = {label: {predicted: 0 for predicted in LABELS} for label in LABELS}
+
+    def add(self, result):
+        self.total += 1
+        self.correct += 1 if result['is_correct'] else 0
+        self.matrix[result['label']][result['prediction']] += 1
+
+class ReportWriter:
+    """
+    Incremental, resumable report files for one run, all named from `prefix`:
+
+        PREFIX.jsonl       one JSON result per line
+        PREFIX.csv         the same results as CSV
+        PREFIX.checkpoint  image paths whose results are safely on disk
+        PREFIX.json        summary, written by write_summary()
+
+    Results are buffered and flushed every `flush_every` results or
+    `flush_seconds`. A flush writes the JSONL and CSV rows, then appends the
+    flushed paths to the checkpoint followed by a '#commit <jsonl bytes>
+    <csv bytes>' line. Reopening an existing run truncates the reports to the
+    last commit (dropping anything a crash left half-written), rebuilds the
+    counters from the JSONL and exposes the committed paths as `done`.
+    """
+
+    def __init__(self, prefix, flush_every=100, flush_seconds=10.0):
+        self.prefix = prefix
+        self.jsonl_path = prefix + '.jsonl'
+        self.csv_path = prefix + '.csv'
+        self.checkpoint_path = prefix + '.checkpoint'
+        self.summary_path = prefix + '.json'
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.counters = ReportCounters()
+        self.done = set()
+        self._pending = []
+        self._flushed_at = time.monotonic()
+
+        jsonl_size, csv_size, checkpoint_size = self._read_checkpoint()
+        self.resumed = bool(self.done)
+        self._jsonl = open(self.jsonl_path, 'a+b')
+        self._csv = open(self.csv_path, 'a+', newline='')
+        self._checkpoint = open(self.checkpoint_path, 'a+')
+        for f, size in ((self._jsonl, jsonl_size), (self._csv, csv_size), (self._checkpoint, checkpoint_size)):
+            f.truncate(size)
+            f.seek(size)
+        self._csv_writer = csv.DictWriter(self._csv, fieldnames=CSV_FIELDS)
+        if csv_size == 0:
+            self._csv_writer.writeheader()
+
+        # Summary counters from the committed results, read one line at a time
+        self._jsonl.seek(0)
+        for line in self._jsonl:
+            self.counters.add(json.loads(line))
+
+    def _read_checkpoint(self):
+        """Committed paths into self.done; returns the committed JSONL, CSV and checkpoint sizes"""
+        sizes = (0, 0, 0)
+        if not os.path.exists(self.checkpoint_path):
+            return sizes
+        pending = []
+        offset = 0
+        with open(self.checkpoint_path, 'r') as f:
+            for line in iter(f.readline, ''):
+                offset += len(line.encode())
+                if not line.endswith('\n'):
+                    break  # Torn last line
+                if line.startswith('#commit '):
+                    jsonl_size, csv_size = (int(v) for v in line.split()[1:3])
+                    sizes = (jsonl_size, csv_size, offset)
+                    self.done.update(pending)
+                    pending = []
+                else:
+                    pending.append(line[:-1])
+        return sizes
+
+    def write(self, result):
+        """Buffer one result, flushing when due"""
+        self._pending.append(result)
+        if len(self._pending) >= self.flush_every or time.monotonic() - self._flushed_at >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Write buffered results to the reports, then commit them to the checkpoint"""
+        self._flushed_at = time.monotonic()
+        if not self._pending:
+            return
+        for result in self._pending:
+            self._jsonl.write((json.dumps(result) + '\n').encode())
+            self._csv_writer.writerow({
                 'filename': result['filename'],
+                'label': result['label'],
                 'prediction': result['prediction'],
                 'confidence_percent': result['confidence_percent'],
                 'is_correct': 'YES' if result['is_correct'] else 'NO'
             })
-    print(f"💾 CSV report saved: {csv_filename}")
+        # Reports reach the disk before the checkpoint that vouches for them
+        for f in (self._jsonl, self._csv):
+            f.flush()
+            os.fsync(f.fileno())
+        for result in self._pending:
+            self._checkpoint.write(result['filepath'] + '\n')
+            self.counters.add(result)
+            self.done.add(result['filepath'])
+        sizes = (os.fstat(f.fileno()).st_size for f in (self._jsonl, self._csv))
+        self._checkpoint.write("#commit {} {}\n".format(*sizes))
+        self._checkpoint.flush()
+        os.fsync(self._checkpoint.fileno())
+        self._pending = []
+
+    def close(self):
+        self.flush()
+        for f in (self._jsonl, self._csv, self._checkpoint):
+            f.close()
+
+    def write_summary(self, elapsed_seconds=None, processed_this_run=0):
+        """Summary report from the running counters; throughput covers this run only"""
+        counters = self.counters
+        matrix = counters.matrix
+        total_images = counters.total
+        accuracy = (counters.correct / total_images) * 100 if total_images > 0 else 0
+
+        summary = {
+            'analysis_timestamp': datetime.now().isoformat(),
+            'total_images_analyzed': total_images,
+            'correct_predictions': counters.correct,
+            'correctly_detected_as_fake': matrix['FAKE']['FAKE'],
+            'correctly_detected_as_real': matrix['REAL']['REAL'],
+            'accuracy_percentage': f"{accuracy:.2f}%",
+            'predicted_as_fake': matrix['FAKE']['FAKE'] + matrix['REAL']['FAKE'],
+            'predicted_as_real': matrix['FAKE']['REAL'] + matrix['REAL']['REAL'],
+            'false_negatives': matrix['FAKE']['REAL'],  # Fake images predicted as real
+            'false_positives': matrix['REAL']['FAKE'],  # Real images predicted as fake
+            'confusion_matrix': matrix,
+            'elapsed_seconds': round(elapsed_seconds, 3) if elapsed_seconds else None,
+            'images_per_second': round(processed_this_run / elapsed_seconds, 2) if elapsed_seconds else None,
+            'results_file': self.jsonl_path,
+            'csv_file': self.csv_path
+        }
 
-    return summary
+        tmp_path = self.summary_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        os.replace(tmp_path, self.summary_path)
+        print(f"💾 JSONL results: {self.jsonl_path}")
+        print(f"💾 CSV report: {self.csv_path}")
+        print(f"💾 JSON summary saved: {self.summary_path}")
+        return summary
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Batch-analyze labeled image folders with the fixed model")
+    parser.add_argument('folders', nargs='*', default=[('Fake', 'FAKE')], type=parse_folder_spec,
+                        help="Folders to scan recursively, as PATH (label from the name: Fake/Real) "
+                             "or PATH=FAKE|REAL (default: Fake)")
+    parser.add_argument('--batch-size', type=int, default=int(os.environ.get('BATCH_SIZE', 16)),
+                        help="Images per inference call (default: 16)")
+    parser.add_argument('--prefetch', type=int, default=int(os.environ.get('PREFETCH_BATCHES', 4)),
+                        help="Batches decoded ahead of inference (default: 4)")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('DECODE_WORKERS', 0)),
+                        help="Decode threads (default: CPU count)")
+    parser.add_argument('--serial', action='store_true',
+                        help="Decode and predict one image at a time (original behaviour)")
+    parser.add_argument('--decision-log', default=os.environ.get('DECISION_LOG_DIR', ''),
+                        help="Append raw scores to this decision store for replay_decisions.py")
+    parser.add_argument('--stats', action='store_true',
+                        help="Also run the statistics phase, so logged rows can replay the hybrid decision")
+    parser.add_argument('--output', default='',
+                        help="Report file prefix; rerunning with the prefix of an interrupted run resumes it "
+                             "(default: fake_images_analysis_<timestamp>)")
+    parser.add_argument('--flush-every', type=int, default=int(os.environ.get('REPORT_FLUSH_EVERY', 100)),
+                        help="Results buffered before the reports and checkpoint are flushed (default: 100)")
+    parser.add_argument('--flush-seconds', type=float, default=float(os.environ.get('REPORT_FLUSH_SECONDS', 10)),
+                        help="Longest time results stay buffered (default: 10)")
+    return parser.parse_args()
 
 def main():
     """Main batch analysis function"""
+    args = parse_args()
+    batch_size = max(1, args.batch_size)
+
     print("🤖 REBEL AI - Fake Images Batch Analysis")
     print("=" * 50)
 
@@ -141,47 +401,87 @@ def main():
     if model is None:
         return
 
+    engine = InferenceEngine(model)
+    engine.warmup([1] if args.serial else sorted({1, batch_size}))
+    print(f"⚙️  Inference engine compiled in {engine.compile_ms:.0f}ms")
+
     # Scan for images
-    image_files = scan_fake_folder()
-    if not image_files:
+    items = scan_labeled_folders(args.folders)
+    if not items:
         return
 
-    total_images = len(image_files)
-    print(f"🎯 Analyzing {total_images} fake images...\n")
-
-    # Analyze each image
-    results = []
+    prefix = args.output or f"fake_images_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    writer = ReportWriter(prefix, max(1, args.flush_every), args.flush_seconds)
+    if writer.resumed:
+        items = [(path, label) for path, label in items if path not in writer.done]
+        print(f"⏩ Resuming {prefix}: {len(writer.done)} images already done, {len(items)} remaining")
+
+    decision_log = DecisionLog(args.decision_log) if args.decision_log else None
+
+    total_images = len(items)
+    if args.serial:
+        print(f"🎯 Analyzing {total_images} images one at a time...\n")
+        results_iter = (analyze_image(engine, path, label, decision_log, args.stats) for path, label in items)
+    else:
+        workers = args.workers or os.cpu_count() or 1
+        print(f"🎯 Analyzing {total_images} images (batch {batch_size}, "
+              f"{workers} decode workers, prefetch {args.prefetch} batches)...\n")
+        results_iter = run_pipeline(engine, items, batch_size, max(1, args.prefetch), workers,
+                                    decision_log, args.stats)
+
+    # Analyze all images, streaming results to the reports
     processed_count = 0
+    start = time.perf_counter()
 
-    for image_path in image_files:
-        result = analyze_image(model, image_path)
-        if result:
-            results.append(result)
-            processed_count += 1
-
-            # Progress indicator
-            status = "✅" if result['is_correct'] else "❌"
-            print(f"{status} {result['filename']}: {result['prediction']} ({result['confidence_percent']})")
-
+    try:
+        for result in results_iter:
+            if result:
+                writer.write(result)
+                processed_count += 1
+
+                # Progress indicator
+                status = "✅" if result['is_correct'] else "❌"
+                print(f"{status} {result['filename']}: {result['prediction']} ({result['confidence_percent']})")
+    finally:
+        # Keep what finished, also when interrupted; a rerun picks up from here
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    if decision_log is not None:
+        decision_log.flush()
+        print(f"💾 Logged {decision_log.rows_written} decisions to {args.decision_log}/")
     print(f"\n📊 Analysis Complete!")
-    print(f"Processed: {processed_count}/{total_images} images")
+    print(f"Processed: {processed_count}/{total_images} images in {elapsed:.2f}s "
+          f"({processed_count / elapsed if elapsed else 0:.1f} images/sec)")
+    engine_stats = engine.stats()
+    print(f"Inference: {engine_stats['calls']} calls, avg {engine_stats['avg_call_ms']:.1f}ms per call")
 
     # Generate reports
-    if results:
-        summary = generate_reports(results, processed_count)
+    if writer.counters.total:
+        summary = writer.write_summary(elapsed, processed_count)
+        matrix = summary['confusion_matrix']
 
         # Display summary
         print("\n" + "=" * 50)
         print("📈 SUMMARY REPORT")
         print("=" * 50)
         print(f"Total Images Analyzed: {summary['total_images_analyzed']}")
+        print(f"Throughput: {summary['images_per_second']} images/sec")
         print(f"Correctly Detected as Fake: {summary['correctly_detected_as_fake']}")
+        print(f"Correctly Detected as Real: {summary['correctly_detected_as_real']}")
         print(f"Model Accuracy: {summary['accuracy_percentage']}")
         print(f"Predicted as Fake: {summary['predicted_as_fake']}")
-        print(f"Predicted as Real (False Negatives): {summary['predicted_as_real']}")
+        print(f"Predicted as Real: {summary['predicted_as_real']}")
+        print(f"False Negatives (Fake predicted Real): {summary['false_negatives']}")
+        print(f"False Positives (Real predicted Fake): {summary['false_positives']}")
+
+        print("\nConfusion matrix (rows: actual, columns: predicted)")
+        print(f"{'':>8} {'FAKE':>6} {'REAL':>6}")
+        for label in LABELS:
+            print(f"{label:>8} {matrix[label]['FAKE']:>6} {matrix[label]['REAL']:>6}")
 
         if summary['accuracy_percentage'] == "100.00%":
-            print("🎉 PERFECT! All fake images detected correctly!")
+            print("🎉 PERFECT! All images classified correctly!")
         elif float(summary['accuracy_percentage'].replace('%', '')) > 90:
             print("🏆 EXCELLENT! Very high detection accuracy!")
         elif float(summary['accuracy_percentage'].replace('%', '')) > 75:
@@ -0,0 +1,129 @@
+"""
+Cost of the detection cascade against the full pipeline on the Fake/ corpus.
+
+Every image is analyzed twice in-process, once through the full pipeline
+(model + statistics + fusion) and once through the cascade, and the tool
+reports mean and p95 latency, the mean cost reduction, which stage decided
+and how often the cascade's verdict differs from the full pipeline's:
+
+    python benchmark_cascade.py
+    python benchmark_cascade.py --fast-model model_fixed_int8.tflite --budget-ms 150
+
+The hash checks and the embedding search are left out of both pipelines:
+Fake/ is the corpus they are built from, so they would decide every image.
+"""
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+from collections import Counter
+
+import numpy as np
+
+REPORT_PATH = 'cascade_benchmark.json'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Detection cascade cost against the full pipeline")
+    parser.add_argument('--folder', default='Fake', help="Images to analyze (default: Fake)")
+    parser.add_argument('--stages', default='stats,fast_model,model,fusion', help="CASCADE_STAGES for the run")
+    parser.add_argument('--fast-model', default='', help="Exported model for the fast_model stage")
+    parser.add_argument('--stats-exit', type=float, default=0.9)
+    parser.add_argument('--fast-exit', type=float, default=0.95)
+    parser.add_argument('--model-exit', type=float, default=0.6)
+    parser.add_argument('--budget-ms', type=float, default=0)
+    parser.add_argument('--limit', type=int, default=0, help="Only the first N images")
+    parser.add_argument('--output', default=REPORT_PATH)
+    return parser.parse_args()
+
+def configure_app(args):
+    """Environment for an in-process app: cascade settings, no caches, no batching window"""
+    os.environ.update({
+        'CASCADE_MODE': '1',
+        'CASCADE_STAGES': args.stages,
+        'CASCADE_FAST_MODEL_PATH': args.fast_model,
+        'CASCADE_STATS_EXIT': str(args.stats_exit),
+        'CASCADE_FAST_EXIT': str(args.fast_exit),
+        'CASCADE_MODEL_EXIT': str(args.model_exit),
+        'CASCADE_BUDGET_MS': str(args.budget_ms),
+        'EMBEDDING_CORPUS_DIR': '',
+        'RESULT_CACHE_SIZE': '0',
+        'RESULT_CACHE_DIR': '',
+        'BATCH_WINDOW_MS': '0',
+        'BOOT_MODE': 'sync',
+        'SERVING_PRELOAD': '0'
+    })
+
+def timed_analysis(app, path, cascade):
+    start = time.perf_counter()
+    result = app.analyze_image_data(path, cascade=cascade)
+    return result, (time.perf_counter() - start) * 1000.0
+
+def main():
+    args = parse_args()
+    configure_app(args)
+    import app  # Boots with the settings above
+
+    if app.active_model['engine'] is None:
+        print("❌ Model not loaded")
+        return 1
+    # Fake/ is the perceptual-hash corpus too; without this both pipelines stop there
+    app.phash_index = app.PerceptualHashIndex()
+    paths = sorted(glob.glob(os.path.join(args.folder, '*.jpg')))[:args.limit or None]
+    if not paths:
+        print(f"❌ No images in {args.folder}")
+        return 1
+
+    print("🪜 Detection cascade benchmark")
+    print("=" * 50)
+    print(f"{len(paths)} images, stages {','.join(app.CASCADE_STAGES)}, "
+          f"fast model: {'yes' if app.active_model['fast_engine'] is not None else 'no'}")
+
+    # Warm both paths and seed the per-stage cost estimates the budget uses
+    for path in paths[:3]:
+        timed_analysis(app, path, None)
+        timed_analysis(app, path, app.new_cascade())
+
+    full_ms, cascade_ms, deciders, differing = [], [], Counter(), []
+    for path in paths:
+        full, ms = timed_analysis(app, path, None)
+        full_ms.append(ms)
+        cascaded, ms = timed_analysis(app, path, app.new_cascade())
+        cascade_ms.append(ms)
+        deciders[cascaded['decided_by']] += 1
+        if cascaded['result'] != full['result']:
+            differing.append(os.path.basename(path))
+
+    full_ms, cascade_ms = np.array(full_ms), np.array(cascade_ms)
+    reduction = 1 - cascade_ms.mean() / full_ms.mean()
+    report = {
+        'images': len(paths),
+        'stages': list(app.CASCADE_STAGES),
+        'budget_ms': args.budget_ms,
+        'full_mean_ms': round(float(full_ms.mean()), 2),
+        'full_p95_ms': round(float(np.percentile(full_ms, 95)), 2),
+        'cascade_mean_ms': round(float(cascade_ms.mean()), 2),
+        'cascade_p95_ms': round(float(np.percentile(cascade_ms, 95)), 2),
+        'mean_cost_reduction': round(float(reduction), 4),
+        'decided_by': dict(deciders),
+        'verdict_changes': len(differing),
+        'changed_images': differing,
+        'stage_costs_ms': app.cascade_costs.snapshot()
+    }
+
+    print(f"\n{'pipeline':<10} {'mean ms':>9} {'p95 ms':>9}")
+    print(f"{'full':<10} {report['full_mean_ms']:>9.1f} {report['full_p95_ms']:>9.1f}")
+    print(f"{'cascade':<10} {report['cascade_mean_ms']:>9.1f} {report['cascade_p95_ms']:>9.1f}")
+    print(f"\n📉 Mean cost reduction: {reduction:.1%}")
+    print("🏁 Decided by: " + ", ".join(f"{stage}={n}" for stage, n in deciders.most_common()))
+    print(f"⚖️  Verdicts different from the full pipeline: {len(differing)}/{len(paths)}")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
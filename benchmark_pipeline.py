@@ -0,0 +1,221 @@
+"""
+Per-phase latency benchmark of the /predict pipeline.
+
+Runs the Fake/ images plus synthetic JPEGs at several resolutions through
+each phase of predict() in isolation and reports p50/p95/p99 latency and
+single-threaded throughput per phase:
+
+    python benchmark_pipeline.py                      # compare with the baseline
+    python benchmark_pipeline.py --update-baseline    # record a new baseline
+
+Results are written as JSON. The run fails (exit code 1) when a phase's p50
+or p95 is more than --tolerance slower than in the stored baseline.
+Baselines are machine-specific: record one on the machine that checks it.
+"""
+import os
+import io
+import sys
+import json
+import time
+import hashlib
+import platform
+import argparse
+from datetime import datetime
+
+import numpy as np
+import cv2
+from PIL import Image
+
+from benchmark_preprocessing import corpus, load_engine
+from preprocessing import decode_image, prepare_image, stats_proxy_size
+from forensics import (
+    analyze_image_statistics, calculate_noise_score, calculate_edge_score,
+    calculate_color_score, calculate_compression_score
+)
+from decision import hybrid_detection_decision
+
+SYNTHETIC_SIZES = [(512, 512), (1024, 768), (1920, 1080), (4000, 3000)]
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Same knobs and defaults as the Flask app
+STATS_PIXEL_BUDGET = int(os.environ.get('STATS_PIXEL_BUDGET', 1024 * 1024))
+STATS_BUDGET_MODE = os.environ.get('STATS_BUDGET_MODE', 'tiles')
+PREPROCESS_BACKEND = os.environ.get('PREPROCESS_BACKEND', 'pil')
+
+BASELINE_PATH = 'benchmark_baseline.json'
+# Differences below this many ms are timer noise, never regressions
+MIN_REGRESSION_MS = 0.5
+
+
+def sha256_chunks(data):
+    digest = hashlib.sha256()
+    for start in range(0, len(data), UPLOAD_CHUNK_SIZE):
+        digest.update(data[start:start + UPLOAD_CHUNK_SIZE])
+    return digest.hexdigest()
+
+def decode(data):
+    decode_size = (128, 128)
+    if PREPROCESS_BACKEND != 'pil':
+        decode_size = stats_proxy_size(Image.open(io.BytesIO(data)).size, STATS_PIXEL_BUDGET)
+    img, source_size = decode_image(io.BytesIO(data), PREPROCESS_BACKEND, min_size=decode_size)
+    img.load()  # PIL decodes lazily; charge the pixel decode to this phase
+    return img, source_size
+
+def timed(timings, phase, fn, *args, **kwargs):
+    """Run fn, appending its duration in ms to timings[phase]; returns its result"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    timings.setdefault(phase, []).append((time.perf_counter() - start) * 1000.0)
+    return result
+
+def run_image(data, engine, timings, repeats):
+    """Time every phase of predict() on one image, keeping the best of `repeats` runs"""
+    best = {}
+    for _ in range(repeats):
+        run = {}
+        timed(run, 'sha256', sha256_chunks, data)
+        img, source_size = timed(run, 'decode', decode, data)
+        tensor = timed(run, 'prepare_image', prepare_image, img)
+
+        ai_score = 0.5
+        if engine is not None:
+            ai_score = float(timed(run, 'inference', engine.infer, tensor)[0, 0])
+
+        rgb = np.asarray(img)
+        gray = timed(run, 'grayscale', cv2.cvtColor, rgb, cv2.COLOR_RGB2GRAY)
+        timed(run, 'calculate_noise_score', calculate_noise_score, gray)
+        timed(run, 'calculate_edge_score', calculate_edge_score, gray)
+        timed(run, 'calculate_color_score', calculate_color_score, rgb)
+        timed(run, 'calculate_compression_score', calculate_compression_score, gray)
+        stats_data = timed(
+            run, 'analyze_image_statistics', analyze_image_statistics, img,
+            pixel_budget=STATS_PIXEL_BUDGET, budget_mode=STATS_BUDGET_MODE, source_size=source_size
+        )
+
+        ai_result = "FAKE" if ai_score > 0.5 else "REAL"
+        ai_confidence = (ai_score if ai_score > 0.5 else (1 - ai_score)) * 100
+        timed(run, 'hybrid_detection_decision', hybrid_detection_decision,
+              ai_result, f"{ai_confidence:.1f}%", stats_data['hybrid_score'])
+
+        for phase, (ms,) in run.items():
+            best[phase] = min(best.get(phase, float('inf')), ms)
+
+    for phase, ms in best.items():
+        timings.setdefault(phase, []).append(ms)
+
+def summarize(timings):
+    phases = {}
+    for phase, values in timings.items():
+        values = np.array(values)
+        mean = float(values.mean())
+        phases[phase] = {
+            'count': int(len(values)),
+            'mean_ms': round(mean, 4),
+            'p50_ms': round(float(np.percentile(values, 50)), 4),
+            'p95_ms': round(float(np.percentile(values, 95)), 4),
+            'p99_ms': round(float(np.percentile(values, 99)), 4),
+            'throughput_per_sec': round(1000.0 / mean, 2) if mean > 0 else None
+        }
+    return phases
+
+def find_regressions(phases, baseline, tolerance):
+    """Phases whose p50 or p95 got more than `tolerance` (a fraction) slower than the baseline"""
+    regressions = []
+    for phase, base in baseline.get('phases', {}).items():
+        current = phases.get(phase)
+        if current is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            limit = base[metric] * (1 + tolerance)
+            if current[metric] > limit and current[metric] - base[metric] > MIN_REGRESSION_MS:
+                regressions.append((phase, metric, base[metric], current[metric]))
+    return regressions
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Per-phase latency benchmark of the /predict pipeline")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON results file")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Stored baseline to compare against")
+    parser.add_argument('--update-baseline', action='store_true', help="Write this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown per phase before failing (default: 0.25 = 25%%)")
+    parser.add_argument('--repeats', type=int, default=3, help="Runs per image; the best is kept (default: 3)")
+    parser.add_argument('--no-model', action='store_true', help="Skip the inference phase")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    print("⏱️  /predict per-phase benchmark")
+    print("=" * 50)
+
+    images = corpus(SYNTHETIC_SIZES)
+    if not images:
+        print("❌ No images found")
+        return 1
+    print(f"📁 {len(images)} images ({len(SYNTHETIC_SIZES)} synthetic)")
+
+    engine = None if args.no_model else load_engine()
+    if engine is None:
+        print("⚠️  No model: skipping the inference phase")
+    else:
+        engine.warmup([1])
+
+    timings = {}
+    start = time.perf_counter()
+    for _, data in images:
+        run_image(data, engine, timings, max(1, args.repeats))
+    elapsed = time.perf_counter() - start
+    phases = summarize(timings)
+
+    print(f"\n{'phase':<28} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per sec':>9}")
+    for phase, s in phases.items():
+        print(f"{phase:<28} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f} {s['throughput_per_sec']:>9.1f}")
+
+    results = {
+        'timestamp': datetime.now().isoformat(),
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {
+            'preprocess_backend': PREPROCESS_BACKEND,
+            'stats_pixel_budget': STATS_PIXEL_BUDGET,
+            'stats_budget_mode': STATS_BUDGET_MODE,
+            'repeats': args.repeats,
+            'model': engine is not None
+        },
+        'images': [name for name, _ in images],
+        'elapsed_seconds': round(elapsed, 3),
+        'phases': phases
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved: {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  No baseline at {args.baseline}: run with --update-baseline to record one")
+        return 0
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    if baseline.get('config') != results['config']:
+        print("⚠️  Baseline was recorded with a different configuration")
+
+    regressions = find_regressions(phases, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for phase, metric, before, after in regressions:
+            print(f"   {phase} {metric}: {before:.2f}ms -> {after:.2f}ms (+{(after / before - 1) * 100:.0f}%)")
+        return 1
+
+    print(f"\n✅ No phase regressed beyond {args.tolerance:.0%} of the baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import os
+import io
+import sys
+import glob
+import time
+
+import numpy as np
+from PIL import Image
+
+from preprocessing import PREPROCESS_BACKENDS, decode_image, to_model_input
+
+MODEL_PATH = 'model_fixed.h5'
+SYNTHETIC_SIZES = [(1024, 768), (4000, 3000)]
+
+def synthetic_jpegs(sizes=SYNTHETIC_SIZES):
+    """Smooth-gradient-plus-noise JPEGs at several resolutions, as in-memory files"""
+    rng = np.random.default_rng(0)
+    images = []
+    for width, height in sizes:
+        y, x = np.mgrid[0:height, 0:width]
+        base = np.stack([x * 255 / width, y * 255 / height, (x + y) * 127 / (width + height)], axis=-1)
+        pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+        buf = io.BytesIO()
+        Image.fromarray(pixels).save(buf, 'JPEG', quality=90)
+        images.append((f"synthetic_{width}x{height}.jpg", buf.getvalue()))
+    return images
+
+def corpus(sizes=SYNTHETIC_SIZES):
+    """Fake/ images plus synthetic large JPEGs, as (name, bytes)"""
+    images = []
+    for path in sorted(glob.glob(os.path.join('Fake', '*.jpg'))):
+        with open(path, 'rb') as f:
+            images.append((os.path.basename(path), f.read()))
+    return images + synthetic_jpegs(sizes)
+
+def run_backend(backend, images, repeats=3):
+    """Return (tensors, per-image best-of-N latency in ms)"""
+    tensors = np.empty((len(images), 128, 128, 3), dtype=np.float32)
+    latencies = []
+    for i, (_, data) in enumerate(images):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            img, _ = decode_image(io.BytesIO(data), backend, min_size=(128, 128))
+            to_model_input(img, (128, 128), out=tensors[i])
+            best = min(best, time.perf_counter() - start)
+        latencies.append(best * 1000.0)
+    return tensors, np.array(latencies)
+
+def load_engine():
+    if not os.path.exists(MODEL_PATH):
+        return None
+    from tensorflow import keras
+    from inference_engine import InferenceEngine
+    return InferenceEngine(keras.models.load_model(MODEL_PATH, compile=False))
+
+def main():
+    print("⏱️  Preprocessing backend benchmark")
+    print("=" * 50)
+
+    images = corpus()
+    if not images:
+        print("❌ No images found")
+        return 1
+    print(f"📁 {len(images)} images ({len(SYNTHETIC_SIZES)} synthetic)")
+
+    engine = load_engine()
+    if engine is None:
+        print(f"⚠️  {MODEL_PATH} not found: reporting pixel drift only")
+
+    reference = None
+    reference_scores = None
+    large = [i for i, (name, _) in enumerate(images) if name.startswith('synthetic_')]
+
+    print(f"\n{'backend':<8} {'mean ms':>9} {'p95 ms':>9} {'large ms':>9} {'max px drift':>13} {'max score drift':>16}")
+    for backend in PREPROCESS_BACKENDS:
+        tensors, latencies = run_backend(backend, images)
+        scores = engine.infer(tensors)[:, 0] if engine is not None else None
+        if reference is None:
+            reference, reference_scores = tensors, scores
+
+        pixel_drift = float(np.abs(tensors - reference).max())
+        score_drift = f"{float(np.abs(scores - reference_scores).max()):.4f}" if scores is not None else "n/a"
+        print(f"{backend:<8} {latencies.mean():>9.2f} {np.percentile(latencies, 95):>9.2f} "
+              f"{latencies[large].mean():>9.2f} {pixel_drift:>13.4f} {score_drift:>16}")
+
+    print("\nDrift is measured against the 'pil' backend (full decode).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Throughput of the full server under gunicorn for several worker/thread layouts.
+
+Each layout starts `gunicorn app:app -c gunicorn.conf.py` on a free port,
+waits for /health/ready, then posts the same JPEG to /predict from
+--clients concurrent clients (result cache disabled, so every request runs
+the whole pipeline) and reports requests/sec and latency percentiles:
+
+    python benchmark_serving.py --layouts 1x8 2x4 --compare-unbudgeted
+
+Layouts are WORKERSxTHREADS. Results are printed and written as JSON.
+"""
+import os
+import io
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from serving_config import available_cores
+
+REPORT_PATH = 'serving_benchmark.json'
+# With one core every library already defaults to one thread, so budgeted and
+# unbudgeted layouts only differ by noise
+SINGLE_CORE_NOTE = ("Only 1 core available: the thread budget cannot change anything here. "
+                    "Measure on the production instance type before relying on these numbers.")
+
+
+def test_jpeg(width=800, height=600):
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 / width, y * 255 / height, (x + y) * 127 / (width + height)], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, 'JPEG', quality=90)
+    return buf.getvalue()
+
+def multipart_body(data, boundary='----rebelbenchmark'):
+    head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"bench.jpg\"\r\n"
+            "Content-Type: image/jpeg\r\n\r\n").encode()
+    return head + data + f"\r\n--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}"
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_ready(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/health/ready", timeout=2) as r:
+                if r.status == 200:
+                    return True
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.5)
+    return False
+
+def post(url, body, content_type):
+    request = urllib.request.Request(f"{url}/predict", data=body, headers={'Content-Type': content_type})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as r:
+            r.read()
+            ok = r.status == 200
+    except urllib.error.HTTPError as e:
+        # 429/503 under overload: counted as an error, the layout keeps going
+        e.read()
+        ok = False
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return ok, (time.perf_counter() - start) * 1000.0
+
+def run_layout(workers, threads, budgeted, requests, clients, body, content_type, preload=False):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        SERVING_REQUEST_THREADS=str(threads),
+        SERVING_THREAD_BUDGET='1' if budgeted else '0',
+        SERVING_PRELOAD='1' if preload else '0',
+        RESULT_CACHE_SIZE='0',
+        RESULT_CACHE_DIR=''
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '-c', 'gunicorn.conf.py', '--bind', f"127.0.0.1:{port}"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_ready(url, timeout=300):
+            raise RuntimeError("server did not become ready")
+        # Every worker warms up on a few requests before timing starts
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(lambda _: post(url, body, content_type), range(workers * 4)))
+
+            start = time.perf_counter()
+            results = list(pool.map(lambda _: post(url, body, content_type), range(requests)))
+            elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = np.array([ms for ok, ms in results if ok])
+    if not len(latencies):
+        latencies = np.array([float('nan')])  # Every request failed
+    return {
+        'workers': workers,
+        'threads': threads,
+        'budgeted': budgeted,
+        'preload': preload,
+        'requests': requests,
+        'errors': sum(1 for ok, _ in results if not ok),
+        'requests_per_sec': round(sum(1 for ok, _ in results if ok) / elapsed, 2),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 1),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 1),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 1)
+    }
+
+def parse_layout(value):
+    workers, _, threads = value.lower().partition('x')
+    return int(workers), int(threads or 8)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serving throughput for several gunicorn worker/thread layouts")
+    parser.add_argument('--layouts', nargs='+', type=parse_layout, default=[(1, 8), (2, 4)],
+                        help="WORKERSxTHREADS layouts (default: 1x8 2x4)")
+    parser.add_argument('--compare-unbudgeted', action='store_true',
+                        help="Also run each layout with library-default thread pools")
+    parser.add_argument('--preload', action='store_true', help="Start gunicorn with SERVING_PRELOAD=1")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--output', default=REPORT_PATH)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    body, content_type = multipart_body(test_jpeg())
+
+    print("🚦 Serving throughput benchmark")
+    print("=" * 50)
+    cores = available_cores()
+    print(f"{args.requests} requests, {args.clients} concurrent clients, {cores} cores\n")
+    if cores == 1:
+        print(f"⚠️  {SINGLE_CORE_NOTE}\n")
+    print(f"{'layout':<26} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+
+    results = []
+    for workers, threads in args.layouts:
+        for budgeted in ([False, True] if args.compare_unbudgeted else [True]):
+            label = f"{workers}x{threads} {'budgeted' if budgeted else 'unbudgeted'}"
+            try:
+                r = run_layout(workers, threads, budgeted, args.requests, args.clients,
+                               body, content_type, args.preload)
+            except Exception as e:
+                print(f"{label:<26} failed: {e}")
+                continue
+            results.append(r)
+            print(f"{label:<26} {r['requests_per_sec']:>8.2f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                  f"{r['p99_ms']:>9.1f} {r['errors']:>7}")
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'cpu_count': os.cpu_count(),
+            'cores': cores,
+            'clients': args.clients,
+            'note': SINGLE_CORE_NOTE if cores == 1 else None,
+            'results': results
+        }, f, indent=2)
+    print(f"\n💾 Results saved: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
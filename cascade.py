@@ -0,0 +1,105 @@
+"""
+Cost-ordered detection cascade with early exit.
+
+Stages run cheapest first and any of them may decide on its own:
+
+    hash        SHA256 and perceptual-hash matches against known fakes
+    stats       pixel statistics on a small downsampled proxy
+    fast_model  an exported (TFLite/ONNX) copy of the detector, when configured
+    model       the full model (with multi-crop and the embedding search)
+    fusion      full-resolution statistics combined with the model score
+
+A CascadeTrace follows one request: which stages ran, which the latency
+budget skipped, and which stage decided. Once a model score exists, a stage
+whose typical cost (an exponential moving average per stage, shared by all
+requests) no longer fits the remaining budget is skipped and the latest
+score decides.
+"""
+import time
+import threading
+from contextlib import contextmanager
+
+CASCADE_STAGES = ('hash', 'stats', 'fast_model', 'model', 'fusion')
+
+
+def parse_stages(value):
+    """Comma-separated stage names, validated and put in cascade order"""
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names - set(CASCADE_STAGES)
+    if unknown:
+        raise ValueError(f"Unknown cascade stages: {', '.join(sorted(unknown))}")
+    return tuple(stage for stage in CASCADE_STAGES if stage in names)
+
+def is_decisive(score, threshold):
+    """True when a [0, 1] FAKE score is at least `threshold` confident either way"""
+    return score >= threshold or score <= 1 - threshold
+
+
+class StageCosts:
+    """Moving average of each stage's duration in milliseconds"""
+
+    def __init__(self, alpha=0.2):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._ms = {}
+
+    def observe(self, stage, ms):
+        with self._lock:
+            previous = self._ms.get(stage)
+            self._ms[stage] = ms if previous is None else previous + self.alpha * (ms - previous)
+
+    def estimate(self, stage):
+        """Typical cost of a stage; 0 until it has run once"""
+        with self._lock:
+            return self._ms.get(stage, 0.0)
+
+    def snapshot(self):
+        with self._lock:
+            return {stage: round(ms, 2) for stage, ms in self._ms.items()}
+
+
+class CascadeTrace:
+    """Stage bookkeeping and latency budget for one request"""
+
+    def __init__(self, stages=CASCADE_STAGES, budget_ms=0, costs=None):
+        self.stages = tuple(stages)
+        self.budget_ms = budget_ms
+        self.costs = costs if costs is not None else StageCosts()
+        self.ran = []
+        self.skipped = []
+        self._start = time.perf_counter()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self._start) * 1000.0
+
+    def should_run(self, stage, have_score=True):
+        """
+        Whether to run `stage`: it must be enabled and, once a model score
+        exists to fall back on (`have_score`), fit in the remaining budget.
+        """
+        if stage not in self.stages:
+            return False
+        if self.budget_ms > 0 and have_score:
+            if self.elapsed_ms() + self.costs.estimate(stage) > self.budget_ms:
+                self.skipped.append(stage)
+                return False
+        return True
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage and record it as run"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.costs.observe(name, (time.perf_counter() - start) * 1000.0)
+            self.ran.append(name)
+
+    def decide(self, stage, result):
+        """Annotate a response dict with the deciding stage and the stages that ran"""
+        return dict(result, decided_by=stage, cascade={
+            'stages': list(self.ran),
+            'skipped': list(self.skipped),
+            'budget_ms': self.budget_ms or None,
+            'elapsed_ms': round(self.elapsed_ms(), 1)
+        })
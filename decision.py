@@ -0,0 +1,130 @@
+import json
+import math
+
+import numpy as np
+
+# How multi-crop scores are combined into one model score
+CROP_AGGREGATIONS = ('mean', 'max', 'vote')
+
+
+# Fusion of the model score with the statistics' hybrid_score. A combined
+# score above fake_threshold is FAKE, above suspicious_threshold suspicious
+# FAKE, below real_threshold REAL; in between the model decides alone.
+DEFAULT_DECISION_CONFIG = {
+    'model_weight': 0.7,
+    'stats_weight': 0.3,
+    'fake_threshold': 0.7,
+    'suspicious_threshold': 0.6,
+    'real_threshold': 0.3
+}
+
+# Detection methods in decide_scores() code order
+DECISION_METHODS = ('hybrid_ai_stats', 'hybrid_suspicious', 'hybrid_real', 'ai_model_fallback')
+
+
+def decision_config(overrides=None):
+    """DEFAULT_DECISION_CONFIG with `overrides` (a dict) applied and checked"""
+    config = dict(DEFAULT_DECISION_CONFIG)
+    for key, value in (overrides or {}).items():
+        if key not in config:
+            raise ValueError(f"Unknown decision setting: {key}")
+        config[key] = float(value)
+    if not config['real_threshold'] <= config['suspicious_threshold'] <= config['fake_threshold']:
+        raise ValueError("Decision thresholds must satisfy real <= suspicious <= fake")
+    return config
+
+
+def load_decision_config(path):
+    """Decision config from a JSON file of overrides; '' gives the defaults"""
+    if not path:
+        return decision_config()
+    with open(path, 'r') as f:
+        return decision_config(json.load(f))
+
+
+def safe_model_exit(config=DEFAULT_DECISION_CONFIG):
+    """
+    Lowest model confidence at which the fusion decision under `config`
+    returns the model's own verdict whatever the statistics score (in [0, 1]).
+
+    A FAKE score s keeps its verdict unless the combined score can fall below
+    real_threshold (statistics at 0); a REAL score 1 - s keeps it unless the
+    combined score can exceed suspicious_threshold (statistics at 1).
+    Returns a value in [0.5, 1], or inf when no model score is safe.
+    """
+    model_weight, stats_weight = config['model_weight'], config['stats_weight']
+    if model_weight <= 0:
+        return math.inf
+    fake_side = config['real_threshold'] / model_weight
+    real_side = 1 - (config['suspicious_threshold'] - stats_weight) / model_weight
+    threshold = max(0.5, fake_side, real_side)
+    return threshold if threshold <= 1 else math.inf
+
+
+def decide_scores(ai_scores, stats_scores, config=DEFAULT_DECISION_CONFIG):
+    """
+    Vectorized fusion decision over arrays of [0, 1] FAKE scores.
+
+    Returns (is_fake bool array, confidence array in [0, 1], method code
+    array indexing DECISION_METHODS). Rows that fall back to the model carry
+    the model's own confidence.
+    """
+    ai_scores = np.asarray(ai_scores, dtype=np.float64)
+    stats_scores = np.asarray(stats_scores, dtype=np.float64)
+    combined = ai_scores * config['model_weight'] + stats_scores * config['stats_weight']
+
+    is_fake_hybrid = combined > config['fake_threshold']
+    is_suspicious = ~is_fake_hybrid & (combined > config['suspicious_threshold'])
+    is_real_hybrid = ~is_fake_hybrid & ~is_suspicious & (combined < config['real_threshold'])
+    methods = np.select([is_fake_hybrid, is_suspicious, is_real_hybrid], [0, 1, 2], default=3).astype(np.uint8)
+
+    ai_fake = ai_scores > 0.5
+    is_fake = np.where(methods == 3, ai_fake, methods < 2)
+    confidence = np.select(
+        [is_fake_hybrid, is_suspicious, is_real_hybrid],
+        [np.minimum(0.999, combined), np.minimum(0.85, combined), np.maximum(0.85, 1 - combined)],
+        default=np.where(ai_fake, ai_scores, 1 - ai_scores)
+    )
+    return is_fake, confidence, methods
+
+
+def hybrid_decision(ai_score, stats_score, config=DEFAULT_DECISION_CONFIG):
+    """
+    Hybrid decision for one image from the raw model and statistics scores
+
+    Returns: (final_result, final_confidence, detection_method)
+    """
+    is_fake, confidence, methods = decide_scores([ai_score], [stats_score], config)
+    return ("FAKE" if is_fake[0] else "REAL"), f"{confidence[0] * 100:.1f}%", DECISION_METHODS[methods[0]]
+
+
+def hybrid_detection_decision(ai_result, ai_confidence, stats_score, hash_match=False):
+    """
+    Make final hybrid decision combining all detection methods
+
+    Returns: (final_result, final_confidence, detection_method)
+    """
+    if hash_match:
+        return "FAKE", "100.0%", "hash_based"
+
+    # Parse AI confidence back into a FAKE score
+    ai_conf_value = float(ai_confidence.replace('%', '')) / 100.0
+    ai_score = ai_conf_value if ai_result == "FAKE" else 1 - ai_conf_value
+    return hybrid_decision(ai_score, stats_score)
+
+
+def aggregate_scores(scores, mode='mean'):
+    """
+    Combine the model scores of several views of one image into one score.
+
+    'mean' averages, 'max' lets the most suspicious view decide, 'vote'
+    returns the fraction of views scored FAKE (> 0.5 means a majority).
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    if mode == 'mean':
+        return float(scores.mean())
+    if mode == 'max':
+        return float(scores.max())
+    if mode == 'vote':
+        return float(np.mean(scores > 0.5))
+    raise ValueError(f"Unknown crop aggregation: {mode}")
@@ -0,0 +1,182 @@
+"""
+Columnar store of the raw numbers behind every decision, for replay.
+
+Each analyzed image becomes one row: upload digest, model score, the
+statistics features, how (if at all) a known-fake database matched, the
+verdict that was returned and the detection method that decided it. Rows
+are buffered in memory and flushed as compressed .npz segments (one array
+per column) into a directory, so every gunicorn worker and batch run
+appends its own files without locking:
+
+    decisions/seg-<host>-<pid>-<time>-<seq>.npz
+
+Missing values are NaN: a hash match never reaches the model, and a row
+decided before the statistics ran (cascade, embedding match, batch runs
+without --stats) has no features. load_decisions() concatenates all
+segments, filling columns an older segment lacks with their missing value;
+replay_decisions.py re-applies a decision config to them.
+"""
+import os
+import time
+import socket
+import threading
+
+import numpy as np
+
+FEATURE_COLUMNS = ('noise_score', 'edge_score', 'color_score', 'compression_score')
+
+# Column name -> dtype. 'digest' is the raw 32-byte SHA256, stored as (n, 32) uint8.
+COLUMNS = {
+    'digest': np.uint8,
+    'recorded_at': np.float64,
+    'model_score': np.float32,
+    'stats_score': np.float32,
+    **{name: np.float32 for name in FEATURE_COLUMNS},
+    'embedding_similarity': np.float32,
+    'hash_match': np.uint8,   # Index into HASH_MATCHES
+    'result': np.int8,        # Index into VERDICTS
+    'method': np.uint8,       # Index into METHODS
+    'label': np.int8,         # Index into VERDICTS, -1 when unknown (server rows)
+}
+
+HASH_MATCHES = ('none', 'sha256', 'phash', 'embedding')
+VERDICTS = ('REAL', 'FAKE')
+# detection_method values, as returned by the server; 'unknown' for anything else
+METHODS = (
+    'unknown', 'hash_based', 'perceptual_hash', 'embedding_match', 'cascade_stats', 'cascade_fast_model',
+    'ai_model', 'hybrid_ai_stats', 'hybrid_suspicious', 'hybrid_real', 'ai_model_fallback'
+)
+
+
+def _missing(name, rows):
+    """A column absent from an older segment: NaN, no match, 'unknown' method, unknown verdict"""
+    if name == 'digest':
+        return np.zeros((rows, 32), dtype=np.uint8)
+    if np.issubdtype(COLUMNS[name], np.floating):
+        return np.full(rows, np.nan, dtype=COLUMNS[name])
+    if name in ('result', 'label'):
+        return np.full(rows, -1, dtype=COLUMNS[name])
+    return np.zeros(rows, dtype=COLUMNS[name])
+
+def _verdict_code(verdict):
+    return VERDICTS.index(verdict) if verdict in VERDICTS else -1
+
+def _method_code(method):
+    return METHODS.index(method) if method in METHODS else 0
+
+
+class DecisionLog:
+    """
+    Append-only, thread-safe writer of decision rows.
+
+    record() buffers a row; the buffer is written as a segment once it holds
+    `flush_rows` rows or its oldest row is `flush_seconds` old, and on
+    flush(), which callers should also run at exit.
+    """
+
+    def __init__(self, directory, flush_rows=4096, flush_seconds=60.0):
+        self.directory = directory
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        os.makedirs(directory, exist_ok=True)
+        self._rows = []
+        self._first_at = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self.rows_written = 0
+        self.segments_written = 0
+
+    def record(self, image_hash, result, model_score=None, stats=None, hash_match='none',
+               embedding_similarity=None, label=None, method=None):
+        """
+        Buffer one row. `stats` is an analyze_image_statistics() dict,
+        `result` the returned verdict, `method` the detection_method that
+        decided it and `label` the true verdict, if known.
+        """
+        stats = stats or {}
+        row = (
+            bytes.fromhex(image_hash),
+            time.time(),
+            np.nan if model_score is None else model_score,
+            stats.get('hybrid_score', np.nan),
+            *(stats.get(name, np.nan) for name in FEATURE_COLUMNS),
+            np.nan if embedding_similarity is None else embedding_similarity,
+            HASH_MATCHES.index(hash_match),
+            _verdict_code(result),
+            _method_code(method),
+            _verdict_code(label),
+        )
+        with self._lock:
+            self._rows.append(row)
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+            due = (len(self._rows) >= self.flush_rows
+                   or time.monotonic() - self._first_at >= self.flush_seconds)
+            rows = self._take() if due else None
+        if rows:
+            self._write(rows)
+
+    def flush(self):
+        """Write any buffered rows"""
+        with self._lock:
+            rows = self._take()
+        if rows:
+            self._write(rows)
+
+    def _take(self):
+        rows, self._rows, self._first_at = self._rows, [], None
+        self._seq += 1
+        return rows
+
+    def _write(self, rows):
+        columns = {}
+        for (name, dtype), values in zip(COLUMNS.items(), zip(*rows)):
+            if name == 'digest':
+                columns[name] = np.frombuffer(b''.join(values), dtype=np.uint8).reshape(-1, 32)
+            else:
+                columns[name] = np.asarray(values, dtype=dtype)
+
+        name = f"seg-{socket.gethostname()}-{os.getpid()}-{int(time.time() * 1000)}-{self._seq}.npz"
+        path = os.path.join(self.directory, name)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **columns)
+        # Readers only ever see complete segments
+        os.replace(tmp_path, path)
+        self.rows_written += len(rows)
+        self.segments_written += 1
+
+    def stats(self):
+        with self._lock:
+            buffered = len(self._rows)
+        return {
+            'directory': self.directory,
+            'rows_written': self.rows_written,
+            'segments_written': self.segments_written,
+            'buffered': buffered
+        }
+
+
+def load_decisions(directory):
+    """All rows of a store as a dict of column arrays (digests as (n, 32) uint8)"""
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith('seg-') and name.endswith('.npz')
+    )
+    parts = {name: [] for name in COLUMNS}
+    for path in paths:
+        with np.load(path) as segment:
+            rows = len(segment['result'])
+            for name in COLUMNS:
+                if name in segment.files:
+                    parts[name].append(segment[name])
+                else:  # Segment written before the column existed
+                    parts[name].append(_missing(name, rows))
+
+    columns = {}
+    for name, dtype in COLUMNS.items():
+        if parts[name]:
+            columns[name] = np.concatenate(parts[name])
+        else:
+            columns[name] = np.empty((0, 32) if name == 'digest' else 0, dtype=dtype)
+    return columns
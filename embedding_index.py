@@ -0,0 +1,143 @@
+import os
+import hashlib
+
+import numpy as np
+
+
+def normalize_rows(vectors):
+    """L2-normalize each row so a dot product is a cosine similarity"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def spherical_kmeans(vectors, n_lists, iterations=10, seed=0):
+    """Cluster unit vectors by cosine similarity; returns (centroids, assignment)"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        filled = np.bincount(assignment, minlength=n_lists) > 0
+        centroids[filled] = normalize_rows(sums[filled])  # Empty lists keep their old centroid
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+class EmbeddingIndex:
+    """
+    Cosine nearest-neighbour search over L2-normalized embeddings.
+
+    Vectors are centred on the corpus mean before normalization: post-ReLU
+    CNN features all share a large positive component, which otherwise puts
+    every pair of images at a similarity close to 1.
+
+    Exact mode scores every stored vector with one matrix-vector product.
+    With n_lists > 0 the vectors are partitioned by spherical k-means (IVF):
+    they are stored grouped by list, and a query only scores the lists of the
+    n_probe centroids closest to it, so large indexes stay fast at the cost of
+    occasionally missing a neighbour that landed in another list.
+    """
+
+    def __init__(self, vectors=(), labels=(), n_lists=0, n_probe=4, metadata=None,
+                 centroids=None, offsets=None, mean=None):
+        vectors = np.asarray(vectors, dtype=np.float32) if len(vectors) else np.zeros((0, 0), dtype=np.float32)
+        if mean is None and len(vectors):
+            mean = normalize_rows(vectors).mean(axis=0)
+            vectors = normalize_rows(normalize_rows(vectors) - mean)
+        self.mean = mean
+        labels = np.asarray(labels) if len(labels) else np.array([''] * len(vectors))
+        self.n_probe = n_probe
+        self.metadata = dict(metadata or {})
+
+        if centroids is None and 0 < n_lists < len(vectors):
+            centroids, assignment = spherical_kmeans(vectors, n_lists)
+            order = np.argsort(assignment, kind='stable')
+            vectors, labels = vectors[order], labels[order]
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        self.vectors = vectors
+        self.labels = labels
+        self.centroids = centroids
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1] if len(self.vectors) else 0
+
+    @property
+    def n_lists(self):
+        return 0 if self.centroids is None else len(self.centroids)
+
+    @classmethod
+    def load(cls, path, n_probe=4):
+        """Load an index saved by save()"""
+        data = np.load(path)
+        ivf = 'centroids' in data.files
+        return cls(
+            data['vectors'], data['labels'], n_probe=n_probe,
+            metadata=parse_metadata(data['metadata']),
+            centroids=data['centroids'] if ivf else None,
+            offsets=data['offsets'] if ivf else None,
+            mean=data['mean'] if len(data['vectors']) else None
+        )
+
+    def save(self, path):
+        """Save vectors, labels, IVF lists and metadata as a NumPy .npz archive"""
+        arrays = {
+            'vectors': self.vectors,
+            'labels': self.labels,
+            'mean': self.mean if self.mean is not None else np.zeros(0, dtype=np.float32),
+            'metadata': np.array([f"{k}={v}" for k, v in sorted(self.metadata.items())])
+        }
+        if self.centroids is not None:
+            arrays.update(centroids=self.centroids, offsets=self.offsets)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def _candidates(self, query):
+        # Row indices of the n_probe lists closest to the query
+        nearest_lists = np.argsort(self.centroids @ query)[::-1][:self.n_probe]
+        return np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in nearest_lists])
+
+    def nearest(self, vector):
+        """Return (label, cosine similarity) of the closest stored vector, or None if the index is empty"""
+        if len(self.vectors) == 0:
+            return None
+        query = normalize_rows(normalize_rows(vector).ravel() - self.mean)
+        if self.centroids is None:
+            similarities = self.vectors @ query
+            best = int(np.argmax(similarities))
+            return str(self.labels[best]), float(similarities[best])
+
+        candidates = self._candidates(query)
+        if len(candidates) == 0:
+            return None
+        similarities = self.vectors[candidates] @ query
+        best = int(np.argmax(similarities))
+        return str(self.labels[candidates[best]]), float(similarities[best])
+
+
+def parse_metadata(entries):
+    """Metadata entries stored as 'key=value' strings back to a dict"""
+    return dict(str(entry).split('=', 1) for entry in entries)
+
+def corpus_signature(paths):
+    """Identifies a set of files by name, size and mtime, to tell when an index is out of date"""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+def embed_images(engine, paths, prepare, batch_size=16):
+    """Embeddings of image files from an engine's infer_with_embeddings(); `prepare` maps a path to a (1, H, W, C) batch"""
+    embeddings = []
+    for i in range(0, len(paths), batch_size):
+        batch = np.concatenate([prepare(path) for path in paths[i:i + batch_size]])
+        _, vectors = engine.infer_with_embeddings(batch)
+        embeddings.append(vectors)
+    return np.concatenate(embeddings) if embeddings else np.zeros((0, engine.embedding_dim), dtype=np.float32)
@@ -0,0 +1,228 @@
+"""
+Export model_fixed.h5 to lighter CPU runtimes and measure each variant.
+
+Variants:
+    fp16  TFLite with float16 weights          -> model_fixed_fp16.tflite
+    int8  TFLite with dynamic-range int8       -> model_fixed_int8.tflite
+    onnx  ONNX (needs tf2onnx + onnxruntime)    -> model_fixed.onnx
+
+For the Keras reference and every variant the tool reports score drift and
+verdict flips on the Fake/ corpus, single-image latency, batch throughput,
+file size and resident memory. Each variant is measured in a fresh process
+so memory numbers are not polluted by the others. Serve a variant with:
+
+    MODEL_PATH=model_fixed_int8.tflite python app.py
+"""
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import subprocess
+
+import numpy as np
+
+DEFAULT_MODEL = 'model_fixed.h5'
+VARIANTS = ('fp16', 'int8', 'onnx')
+REPORT_PATH = 'model_export_report.json'
+INPUT_SHAPE = (128, 128, 3)
+
+
+def output_path(model_path, variant, out_dir):
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    name = f"{stem}.onnx" if variant == 'onnx' else f"{stem}_{variant}.tflite"
+    return os.path.join(out_dir, name)
+
+def export_tflite(model, path, variant):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]  # Alone: dynamic-range int8 weights
+    if variant == 'fp16':
+        converter.target_spec.supported_types = [tf.float16]
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+
+def export_onnx(model, path):
+    import tensorflow as tf
+    import tf2onnx
+
+    # Trace through a tf.function so the batch dimension stays dynamic
+    forward = tf.function(lambda x: model(x, training=False))
+    spec = [tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32, name='input')]
+    tf2onnx.convert.from_function(forward, input_signature=spec, opset=13, output_path=path)
+
+def export_variants(model_path, variants, out_dir):
+    """Write the requested variants; returns {variant: path} for those that succeeded"""
+    from tensorflow import keras
+
+    print(f"📥 Loading {model_path}...")
+    model = keras.models.load_model(model_path, compile=False)
+
+    exported = {}
+    for variant in variants:
+        path = output_path(model_path, variant, out_dir)
+        try:
+            start = time.perf_counter()
+            if variant == 'onnx':
+                export_onnx(model, path)
+            else:
+                export_tflite(model, path, variant)
+            print(f"✅ {variant}: {path} ({time.perf_counter() - start:.1f}s)")
+            exported[variant] = path
+        except ImportError as e:
+            print(f"⚠️  {variant}: skipped, missing dependency ({e.name})")
+        except Exception as e:
+            print(f"❌ {variant}: export failed: {e}")
+    return exported
+
+
+# Measurement (runs in a child process per variant)
+
+def _rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+def _corpus(limit):
+    from preprocessing import decode_image, to_model_input
+
+    paths = sorted(glob.glob(os.path.join('Fake', '*.jpg')))[:limit or None]
+    batch = np.empty((len(paths), *INPUT_SHAPE), dtype=np.float32)
+    for i, path in enumerate(paths):
+        img, _ = decode_image(path)
+        to_model_input(img, INPUT_SHAPE[:2], out=batch[i])
+    return paths, batch
+
+def measure(path, backend, limit, repeats=20, batch_size=16):
+    """Load one model and return its scores, latency and memory as a dict"""
+    paths, corpus = _corpus(limit)  # Decode first so image buffers are not counted below
+    import tensorflow as tf  # noqa: F401  (shared runtime cost, counted in the baseline)
+    from inference_engine import InferenceEngine, load_runtime_engine
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    if backend == 'keras':
+        from tensorflow import keras
+        engine = InferenceEngine(keras.models.load_model(path, compile=False), INPUT_SHAPE)
+    else:
+        engine = load_runtime_engine(path, backend, INPUT_SHAPE)
+    engine.warmup([1, batch_size])
+    load_seconds = time.perf_counter() - start
+
+    scores = np.concatenate([engine.infer(corpus[i:i + batch_size])[:, 0]
+                             for i in range(0, len(corpus), batch_size)])
+
+    single = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        engine.infer(corpus[i % len(corpus)])
+        single.append((time.perf_counter() - start) * 1000.0)
+
+    batch = corpus[:batch_size]
+    start = time.perf_counter()
+    for _ in range(max(1, repeats // 4)):
+        engine.infer(batch)
+    batch_seconds = (time.perf_counter() - start) / max(1, repeats // 4)
+
+    return {
+        'backend': backend,
+        'path': path,
+        'file_mb': round(os.path.getsize(path) / (1024 * 1024), 2),
+        'rss_delta_mb': round(_rss_mb() - rss_before, 1),
+        'load_seconds': round(load_seconds, 3),
+        'latency_p50_ms': round(float(np.percentile(single, 50)), 2),
+        'latency_p95_ms': round(float(np.percentile(single, 95)), 2),
+        'batch_images_per_sec': round(len(batch) / batch_seconds, 1),
+        'images': [os.path.basename(p) for p in paths],
+        'scores': [float(s) for s in scores]
+    }
+
+def measure_in_subprocess(path, backend, limit):
+    result = subprocess.run(
+        [sys.executable, __file__, '--measure', backend, path, '--limit', str(limit)],
+        capture_output=True, text=True
+    )
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'no output')
+
+def compare(reference, variant):
+    """Score drift and verdict changes of a variant against the Keras reference"""
+    ref = np.array(reference['scores'])
+    scores = np.array(variant['scores'])
+    drift = np.abs(scores - ref)
+    return {
+        'max_score_drift': round(float(drift.max()), 6),
+        'mean_score_drift': round(float(drift.mean()), 6),
+        'verdict_flips': int(np.sum((scores > 0.5) != (ref > 0.5))),
+        'fake_accuracy': round(float(np.mean(scores > 0.5)), 4),  # Fake/ images are all FAKE
+        'latency_speedup': round(reference['latency_p50_ms'] / variant['latency_p50_ms'], 2),
+        'memory_saved_mb': round(reference['rss_delta_mb'] - variant['rss_delta_mb'], 1),
+        'file_saved_mb': round(reference['file_mb'] - variant['file_mb'], 2)
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the detector to TFLite/ONNX and measure each variant")
+    parser.add_argument('--model', default=DEFAULT_MODEL, help="Keras model to export (default: model_fixed.h5)")
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--out-dir', default='.', help="Where to write the exported models")
+    parser.add_argument('--report', default=REPORT_PATH, help="JSON report path")
+    parser.add_argument('--limit', type=int, default=0, help="Only score the first N Fake/ images")
+    parser.add_argument('--skip-export', action='store_true', help="Measure previously exported files")
+    parser.add_argument('--measure', nargs=2, metavar=('BACKEND', 'PATH'), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.measure:
+        backend, path = args.measure
+        print(json.dumps(measure(path, backend, args.limit)))
+        return 0
+
+    print("📦 REBEL AI - Model export")
+    print("=" * 50)
+    if not os.path.exists(args.model):
+        print(f"❌ Model file not found: {args.model}")
+        return 1
+
+    if args.skip_export:
+        exported = {v: output_path(args.model, v, args.out_dir) for v in args.variants
+                    if os.path.exists(output_path(args.model, v, args.out_dir))}
+    else:
+        exported = export_variants(args.model, args.variants, args.out_dir)
+
+    print("\n⏱️  Measuring (one process per variant)...")
+    reference = measure_in_subprocess(args.model, 'keras', args.limit)
+    rows = [('keras', reference, None)]
+    for variant, path in exported.items():
+        try:
+            result = measure_in_subprocess(path, 'onnx' if variant == 'onnx' else 'tflite', args.limit)
+            rows.append((variant, result, compare(reference, result)))
+        except Exception as e:
+            print(f"❌ {variant}: measurement failed: {e}")
+
+    print(f"\n{'variant':<8} {'file MB':>8} {'RSS MB':>8} {'p50 ms':>8} {'img/s b16':>10} "
+          f"{'max drift':>10} {'flips':>6} {'fake acc':>9}")
+    for variant, r, c in rows:
+        drift = f"{c['max_score_drift']:.5f}" if c else '-'
+        flips = str(c['verdict_flips']) if c else '-'
+        accuracy = c['fake_accuracy'] if c else float(np.mean(np.array(r['scores']) > 0.5))
+        print(f"{variant:<8} {r['file_mb']:>8.1f} {r['rss_delta_mb']:>8.1f} {r['latency_p50_ms']:>8.2f} "
+              f"{r['batch_images_per_sec']:>10.1f} {drift:>10} {flips:>6} {accuracy:>9.2%}")
+
+    report = {
+        'model': args.model,
+        'images': reference['images'],
+        'variants': {variant: dict({k: v for k, v in r.items() if k not in ('scores', 'images')}, comparison=c)
+                     for variant, r, c in rows}
+    }
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report saved: {args.report}")
+    print("RSS is the resident memory added by loading and warming the model; drift is against Keras.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+import math
+import time
+
+import numpy as np
+import cv2
+from skimage import filters
+
+# Equal-weight blend of the individual features into the phase's hybrid_score
+STATS_FEATURE_WEIGHTS = {
+    'noise_score': 0.25,
+    'edge_score': 0.25,
+    'color_score': 0.25,
+    'compression_score': 0.25
+}
+
+NEUTRAL_STATS = {
+    'hybrid_score': 0.5,
+    'noise_score': 0.5,
+    'edge_score': 0.5,
+    'color_score': 0.5,
+    'compression_score': 0.5
+}
+
+# Budget modes for images larger than the pixel budget
+BUDGET_MODES = ('downsample', 'tiles')
+STATS_TILE_SIZE = 256  # Multiple of 8 so tiles stay on the JPEG block grid
+
+def analyze_image_statistics(image, timings=None, pixel_budget=0, budget_mode='downsample', source_size=None,
+                             executor=None):
+    """
+    Perform statistical analysis to detect AI-generated patterns.
+
+    Grayscale is computed once and shared by every feature. When `timings` is
+    a dict it is filled with per-feature durations in milliseconds.
+
+    Images above `pixel_budget` pixels (0 disables the budget) are analyzed on
+    a box-downsampled proxy or on a deterministic grid of sampled tiles, so the
+    cost stays roughly constant whatever the upload size. The returned dict
+    reports the chosen 'mode' and the effective 'resolution'.
+
+    `source_size` is the original (width, height) when `image` was already
+    decoded at reduced resolution; count-based features are scaled back to it.
+
+    With an `executor` (concurrent.futures) the features, or the tiles in
+    tiles mode, are computed in parallel on it; they release the GIL inside
+    OpenCV and NumPy. Per-feature timings are still measured in each task.
+    """
+    if timings is None:
+        timings = {}
+
+    try:
+        start = time.perf_counter()
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        width, height = image.size
+        scale = 1.0  # Source pixels represented by one analyzed pixel
+        mode = 'full'
+        if source_size and source_size[0] * source_size[1] > width * height:
+            scale = (source_size[0] * source_size[1]) / (width * height)
+            mode = 'reduced_decode'
+        if pixel_budget and width * height > pixel_budget:
+            mode = budget_mode if budget_mode in BUDGET_MODES else 'downsample'
+
+        if mode == 'tiles':
+            img_array = np.asarray(image)
+            timings['grayscale'] = (time.perf_counter() - start) * 1000.0
+            features, resolution = _analyze_tiles(img_array, pixel_budget, timings, scale, executor)
+            features['mode'] = mode
+            features['resolution'] = resolution
+            return features
+
+        if mode == 'downsample':
+            factor = math.ceil(math.sqrt(width * height / pixel_budget))
+            image = image.reduce(factor)
+            scale *= (width * height) / (image.size[0] * image.size[1])
+
+        img_array = np.asarray(image)
+
+        # Convert to grayscale for analysis
+        if img_array.ndim == 3:
+            gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+        else:
+            gray = img_array
+        timings['grayscale'] = (time.perf_counter() - start) * 1000.0
+
+        tasks = {
+            'noise_score': (calculate_noise_score, gray),          # 1. Noise patterns
+            'edge_score': (calculate_edge_score, gray),            # 2. Unnatural edges
+            'color_score': (calculate_color_score, img_array),     # 3. Color distribution
+            # 4. Block artifacts: a count, so scale it back up to the source area
+            'compression_score': (calculate_compression_score, gray, scale)
+        }
+        if executor is None:
+            results = {name: _timed(*task) for name, task in tasks.items()}
+        else:
+            futures = {name: executor.submit(_timed, *task) for name, task in tasks.items()}
+            results = {name: future.result() for name, future in futures.items()}
+
+        features = {}
+        for name, (value, ms) in results.items():
+            features[name] = value
+            timings[name] = ms
+
+        features['hybrid_score'] = combine_stats_features(features)
+        features['mode'] = mode
+        features['resolution'] = (gray.shape[1], gray.shape[0])
+        return features
+
+    except Exception as e:
+        print(f"Statistical analysis error: {e}")
+        return dict(NEUTRAL_STATS, mode='error', resolution=None)
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, (time.perf_counter() - start) * 1000.0
+
+def combine_stats_features(features):
+    """Blend the individual feature scores into a single 0-1 statistics score"""
+    return float(sum(features[name] * weight for name, weight in STATS_FEATURE_WEIGHTS.items()))
+
+def _block_grid(gray_image):
+    # Same 8x8 grid as a block-by-block scan: the last partial row/column of
+    # blocks is skipped
+    h, w = gray_image.shape[:2]
+    return len(range(0, h - 8, 8)), len(range(0, w - 8, 8))
+
+def _tile_origins(length, tile, count):
+    # Evenly spaced, 8-aligned origins covering [0, length - tile]
+    if count <= 1 or length <= tile:
+        return [0]
+    step = (length - tile) / (count - 1)
+    return sorted(set(int(i * step) // 8 * 8 for i in range(count)))
+
+def _tile_moments(tile):
+    """Per-tile moments of every feature, plus the time spent on each"""
+    feature_ms = {}
+    start = time.perf_counter()
+    gray = cv2.cvtColor(tile, cv2.COLOR_RGB2GRAY) if tile.ndim == 3 else tile
+    feature_ms['grayscale'] = (time.perf_counter() - start) * 1000.0
+
+    start = time.perf_counter()
+    noise = _noise_moments(gray)
+    feature_ms['noise_score'] = (time.perf_counter() - start) * 1000.0
+
+    start = time.perf_counter()
+    edges = _edge_counts(gray)
+    feature_ms['edge_score'] = (time.perf_counter() - start) * 1000.0
+
+    color = None
+    if tile.ndim == 3:
+        start = time.perf_counter()
+        color = _color_moments(tile)
+        feature_ms['color_score'] = (time.perf_counter() - start) * 1000.0
+
+    # Tiles are 8-aligned and a multiple of 8, so every block here is
+    # a block of the full-image grid
+    start = time.perf_counter()
+    blocks = gray.reshape(gray.shape[0] // 8, 8, gray.shape[1] // 8, 8)
+    artifacts = int(np.count_nonzero(blocks.std(axis=(1, 3), dtype=np.float32) < 5))
+    feature_ms['compression_score'] = (time.perf_counter() - start) * 1000.0
+    return noise, edges, color, artifacts, blocks.shape[0] * blocks.shape[2], feature_ms
+
+def _analyze_tiles(img_array, pixel_budget, timings, area_scale=1.0, executor=None):
+    """Analyze a deterministic grid of tiles and pool their moments into full-image features"""
+    rows, cols = _block_grid(img_array)
+    tile_h = min(STATS_TILE_SIZE, rows * 8)
+    tile_w = min(STATS_TILE_SIZE, cols * 8)
+    if tile_h == 0 or tile_w == 0:
+        raise ValueError("image too small for tiled analysis")
+
+    # Lay the tiles out in proportion to the grid's aspect ratio
+    n_tiles = max(1, pixel_budget // (tile_h * tile_w))
+    grid_h, grid_w = rows * 8, cols * 8
+    ny = max(1, min(grid_h // tile_h, round(math.sqrt(n_tiles * grid_h / grid_w))))
+    nx = max(1, min(grid_w // tile_w, n_tiles // ny))
+
+    noise = np.zeros(3)
+    edges = np.zeros(2)
+    color = None
+    artifacts = 0
+    sampled_blocks = 0
+    feature_ms = dict.fromkeys(('grayscale', 'noise_score', 'edge_score', 'color_score', 'compression_score'), 0.0)
+
+    ys = _tile_origins(grid_h, tile_h, ny)
+    xs = _tile_origins(grid_w, tile_w, nx)
+    tiles = [img_array[y:y + tile_h, x:x + tile_w] for y in ys for x in xs]
+    # Moments are pooled in tile order, so the result does not depend on the executor
+    for tile_noise, tile_edges, tile_color, tile_artifacts, tile_blocks, tile_ms in (
+        map(_tile_moments, tiles) if executor is None else executor.map(_tile_moments, tiles)
+    ):
+        noise += tile_noise
+        edges += tile_edges
+        if tile_color is not None:
+            color = _merge_color_moments(color, tile_color)
+        artifacts += tile_artifacts
+        sampled_blocks += tile_blocks
+        for name, ms in tile_ms.items():
+            feature_ms[name] += ms
+
+    timings.update({k: timings.get(k, 0.0) + v for k, v in feature_ms.items()})
+
+    features = {
+        'noise_score': _finalize_noise(*noise),
+        'edge_score': _finalize_edges(*edges),
+        'color_score': _finalize_color(*color) if color is not None else 0.5,
+        'compression_score': _finalize_compression(artifacts * (rows * cols) / sampled_blocks * area_scale)
+    }
+    features['hybrid_score'] = combine_stats_features(features)
+    features['tiles'] = len(ys) * len(xs)
+    return features, (len(xs) * tile_w, len(ys) * tile_h)
+
+def _noise_moments(gray_image):
+    # High-frequency noise analysis (float32 is preserved by skimage)
+    sobel = filters.sobel(gray_image.astype(np.float32))
+    return np.array([
+        float(sobel.sum(dtype=np.float64)),
+        float(np.square(sobel, dtype=np.float64).sum()),
+        sobel.size
+    ])
+
+def _finalize_noise(total, total_sq, n):
+    noise_std = math.sqrt(max(0.0, total_sq / n - (total / n) ** 2))
+    # AI images often have more uniform noise patterns
+    # Normalize to 0-1 scale (higher = more likely AI-generated)
+    return min(1.0, noise_std / 50.0)
+
+def calculate_noise_score(gray_image):
+    """Analyze noise patterns typical of AI generation"""
+    try:
+        return _finalize_noise(*_noise_moments(gray_image))
+    except Exception:
+        return 0.5
+
+def _edge_counts(gray_image):
+    edges = cv2.Canny(gray_image, 100, 200)
+    return np.array([np.count_nonzero(edges), edges.size])
+
+def _finalize_edges(edge_pixels, n):
+    # AI images often have more defined edges
+    return float(min(1.0, edge_pixels / n * 2.0))
+
+def calculate_edge_score(gray_image):
+    """Analyze edge patterns for AI artifacts"""
+    try:
+        return _finalize_edges(*_edge_counts(gray_image))
+    except Exception:
+        return 0.5
+
+def _color_moments(rgb_image):
+    # One pass of sums for the channel means, one pass of cross-products
+    # for the 3x3 scatter matrix, instead of three np.corrcoef calls
+    pixels = rgb_image[:, :, :3].reshape(-1, 3)
+    mean = pixels.mean(axis=0, dtype=np.float64)
+    centered = pixels.astype(np.float32)
+    centered -= mean.astype(np.float32)
+    scatter = (centered.T @ centered).astype(np.float64)
+    return pixels.shape[0], mean, scatter
+
+def _merge_color_moments(a, b):
+    # Pooled scatter matrix of two pixel sets (parallel-axis correction)
+    if a is None:
+        return b
+    n_a, mean_a, scatter_a = a
+    n_b, mean_b, scatter_b = b
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (n_b / n)
+    scatter = scatter_a + scatter_b + np.outer(delta, delta) * (n_a * n_b / n)
+    return n, mean, scatter
+
+def _finalize_color(n, mean, scatter):
+    variances = np.diag(scatter)
+    if np.any(variances <= 0):
+        # Flat channel: correlation is undefined
+        return 0.0
+
+    corr = scatter / np.sqrt(np.outer(variances, variances))
+    avg_corr = (abs(corr[0, 1]) + abs(corr[0, 2]) + abs(corr[1, 2])) / 3
+
+    # Lower correlation might indicate AI generation
+    return float(max(0.0, 1.0 - avg_corr))
+
+def calculate_color_score(rgb_image):
+    """Analyze color distribution patterns"""
+    try:
+        if rgb_image.ndim != 3:
+            return 0.5
+        return _finalize_color(*_color_moments(rgb_image))
+    except Exception:
+        return 0.5
+
+def _finalize_compression(block_artifacts):
+    return min(1.0, block_artifacts / 50.0)
+
+def calculate_compression_score(gray_image, area_scale=1.0):
+    """
+    Detect JPEG compression artifacts common in AI images.
+
+    The score is based on a count of uniform blocks; `area_scale` converts a
+    count taken on a downsampled proxy back to the source image's area.
+    """
+    try:
+        rows, cols = _block_grid(gray_image)
+        if rows == 0 or cols == 0:
+            return 0.0
+
+        # (rows, 8, cols, 8) view of the block grid, no copy
+        blocks = gray_image[:rows * 8, :cols * 8].reshape(rows, 8, cols, 8)
+        block_std = blocks.std(axis=(1, 3), dtype=np.float32)
+
+        # Very uniform blocks
+        block_artifacts = int(np.count_nonzero(block_std < 5))
+        return _finalize_compression(block_artifacts * area_scale)
+    except Exception:
+        return 0.5
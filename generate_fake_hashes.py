@@ -2,11 +2,16 @@ import os
 import hashlib
 import json
 import glob
+from PIL import Image
+from perceptual_hash import dhash, PerceptualHashIndex
+from hash_store import write_hash_store
 
 def generate_fake_image_hashes():
     """Generate SHA256 hashes for all fake images in the Fake folder"""
     fake_folder = 'Fake'
     hashes_file = 'fake_images_hashes.json'
+    hashes_db_file = 'fake_images_hashes.bin'
+    phash_file = 'fake_images_phash.npz'
 
     if not os.path.exists(fake_folder):
         print(f"❌ Fake folder not found: {fake_folder}")
@@ -28,6 +33,8 @@ def generate_fake_image_hashes():
 
     # Generate hashes
     fake_hashes = set()
+    perceptual_hashes = []
+    perceptual_labels = []
 
     for image_path in image_files:
         try:
@@ -35,7 +42,12 @@ def generate_fake_image_hashes():
                 image_data = f.read()
                 image_hash = hashlib.sha256(image_data).hexdigest()
                 fake_hashes.add(image_hash)
-                print(f"✅ Hashed: {os.path.basename(image_path)}")
+
+            # Perceptual hash catches re-saved / resized / recompressed copies
+            with Image.open(image_path) as img:
+                perceptual_hashes.append(dhash(img))
+                perceptual_labels.append(os.path.basename(image_path))
+            print(f"✅ Hashed: {os.path.basename(image_path)}")
         except Exception as e:
             print(f"❌ Error processing {image_path}: {e}")
 
@@ -50,6 +62,14 @@ def generate_fake_image_hashes():
         json.dump(hash_data, f, indent=2)
 
     print(f"💾 Saved {len(fake_hashes)} unique hashes to {hashes_file}")
+
+    # Binary store the server memory-maps (atomically replaced, so running
+    # servers pick it up without a restart)
+    write_hash_store(hashes_db_file, fake_hashes)
+    print(f"💾 Saved binary hash store to {hashes_db_file}")
+
+    PerceptualHashIndex(perceptual_hashes, perceptual_labels).save(phash_file)
+    print(f"💾 Saved {len(perceptual_hashes)} perceptual hashes to {phash_file}")
     return True
 
 if __name__ == "__main__":
@@ -60,7 +80,7 @@ if __name__ == "__main__":
 
     if success:
         print("\n✅ Hash database created successfully!")
-        print("📄 File: fake_images_hashes.json")
+        print("📄 Files: fake_images_hashes.json, fake_images_hashes.bin, fake_images_phash.npz")
         print("\n📝 Next: Update app.py to use this database")
     else:
         print("\n❌ Failed to create hash database")
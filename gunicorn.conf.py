@@ -0,0 +1,31 @@
+"""
+Gunicorn settings derived from the serving thread budget (see serving_config.py).
+
+    WEB_CONCURRENCY=2 gunicorn app:app -c gunicorn.conf.py
+    SERVING_PRELOAD=1 gunicorn app:app -c gunicorn.conf.py   # share imports and hash DBs
+"""
+import os
+import sys
+
+from serving_config import thread_budget
+
+budget = thread_budget()
+
+worker_class = 'gthread'
+workers = budget['workers']
+threads = budget['request_threads']
+preload_app = os.environ.get('SERVING_PRELOAD', '0') == '1'
+# Model load, warm-up and validation can take a while on a cold instance
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Workers compute the same budget from these
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ['SERVING_PRELOAD'] = '1' if preload_app else '0'
+
+
+def post_fork(server, worker):
+    # With --preload the master imported app.py without loading the model;
+    # every worker loads its own and starts its background threads
+    app_module = sys.modules.get('app')
+    if preload_app and app_module is not None:
+        app_module.boot_worker()
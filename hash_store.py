@@ -0,0 +1,179 @@
+"""
+Compact, memory-mapped store of SHA256 digests for the known-fake database.
+
+File layout (little-endian):
+    header  32 bytes   magic b'FHDB', version u16, reserved u16, count u64,
+                       bloom size in bits u64, bloom hash count u32, reserved u32
+    bloom   bits / 8   Bloom filter over the digests (may be empty)
+    records count * 32 raw digests, sorted
+
+The file is mapped read-only, so every gunicorn worker shares one page-cache
+copy, opening is O(1) and lookups are a Bloom probe plus a binary search.
+
+Convert the JSON database with:
+    python hash_store.py fake_images_hashes.json fake_images_hashes.bin
+"""
+import os
+import sys
+import json
+import math
+import mmap
+import struct
+import threading
+import time
+
+MAGIC = b'FHDB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQII')
+DIGEST_SIZE = 32
+
+
+def _bloom_positions(digest, bloom_bits, bloom_hashes):
+    # Digests are already uniform: derive the k probe positions from two
+    # 64-bit slices (Kirsch-Mitzenmacher double hashing)
+    h1 = int.from_bytes(digest[0:8], 'little')
+    h2 = int.from_bytes(digest[8:16], 'little') | 1
+    return [(h1 + i * h2) % bloom_bits for i in range(bloom_hashes)]
+
+def _to_digest(value):
+    if isinstance(value, str):
+        return bytes.fromhex(value)
+    return bytes(value)
+
+def write_hash_store(path, digests, bloom_bits_per_entry=10):
+    """Write digests (hex strings or 32-byte values) to `path`, atomically replacing it"""
+    records = sorted(set(_to_digest(d) for d in digests))
+    for record in records:
+        if len(record) != DIGEST_SIZE:
+            raise ValueError(f"Expected {DIGEST_SIZE}-byte digests, got {len(record)} bytes")
+
+    bloom_bits = 0
+    bloom_hashes = 0
+    if records and bloom_bits_per_entry > 0:
+        bloom_bits = int(math.ceil(len(records) * bloom_bits_per_entry / 8.0)) * 8
+        bloom_hashes = max(1, int(round(bloom_bits_per_entry * math.log(2))))
+    bloom = bytearray(bloom_bits // 8)
+    for record in records if bloom_bits else ():
+        for pos in _bloom_positions(record, bloom_bits, bloom_hashes):
+            bloom[pos >> 3] |= 1 << (pos & 7)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(records), bloom_bits, bloom_hashes, 0))
+        f.write(bloom)
+        for record in records:
+            f.write(record)
+    # Readers holding the old mapping keep working; new opens see the new file
+    os.replace(tmp_path, path)
+    return len(records)
+
+def convert_json(json_path, bin_path, bloom_bits_per_entry=10):
+    """Convert a fake_images_hashes.json file into the binary store format"""
+    with open(json_path, 'r') as f:
+        data = json.load(f)
+    return write_hash_store(bin_path, data.get('hashes', []), bloom_bits_per_entry)
+
+
+class _MappedStore:
+    """One open mapping of a store file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, count, bloom_bits, bloom_hashes, _ = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} hash store")
+
+        self.count = count
+        self.bloom_bits = bloom_bits
+        self.bloom_hashes = bloom_hashes
+        self.bloom_offset = HEADER.size
+        self.records_offset = HEADER.size + bloom_bits // 8
+        if len(self.mm) < self.records_offset + count * DIGEST_SIZE:
+            raise ValueError(f"{path} is truncated")
+
+    def _record(self, i):
+        start = self.records_offset + i * DIGEST_SIZE
+        return self.mm[start:start + DIGEST_SIZE]
+
+    def contains(self, digest):
+        if self.bloom_bits:
+            for pos in _bloom_positions(digest, self.bloom_bits, self.bloom_hashes):
+                if not self.mm[self.bloom_offset + (pos >> 3)] & (1 << (pos & 7)):
+                    return False
+
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._record(mid)
+            if record < digest:
+                lo = mid + 1
+            elif record > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+
+class HashStore:
+    """
+    Read-only, memory-mapped set of SHA256 digests supporting `in` and len().
+
+    Every `reload_interval` seconds a lookup checks whether the file was
+    replaced (e.g. by write_hash_store) and, if so, maps the new file and
+    swaps it in. Lookups already running keep using the old mapping.
+    """
+
+    def __init__(self, path, reload_interval=5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._store = _MappedStore(path)
+        self._checked_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def __len__(self):
+        return self._store.count
+
+    def __contains__(self, value):
+        self.maybe_reload()
+        try:
+            digest = _to_digest(value)
+        except (TypeError, ValueError):
+            return False
+        if len(digest) != DIGEST_SIZE:
+            return False
+        return self._store.contains(digest)
+
+    def maybe_reload(self):
+        """Swap in a replaced file, at most once per reload_interval"""
+        if self.reload_interval is None or time.monotonic() - self._checked_at < self.reload_interval:
+            return False
+
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.reload_interval:
+                return False
+            self._checked_at = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+                if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self._store.identity:
+                    return False
+                self._store = _MappedStore(self.path)
+            except (OSError, ValueError) as e:
+                print(f"Hash store reload failed, keeping previous version: {e}")
+                return False
+
+        self.reloads += 1
+        print(f"Reloaded {self._store.count} fake image hashes from {self.path}")
+        return True
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python hash_store.py <hashes.json> <hashes.bin>")
+        sys.exit(1)
+    written = convert_json(sys.argv[1], sys.argv[2])
+    print(f"💾 Wrote {written} hashes to {sys.argv[2]}")
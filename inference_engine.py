@@ -0,0 +1,294 @@
+import os
+import time
+import threading
+
+import numpy as np
+
+# 'keras': tf.function over the Keras model; 'tflite' and 'onnx' run exported
+# variants (see export_model.py) on the lighter runtimes
+MODEL_BACKENDS = ('keras', 'tflite', 'onnx')
+_EXTENSION_BACKENDS = {'.tflite': 'tflite', '.onnx': 'onnx'}
+
+def resolve_backend(path, backend='auto'):
+    """Backend for a model file: explicit, or 'auto' from the file extension"""
+    if backend == 'auto':
+        return _EXTENSION_BACKENDS.get(os.path.splitext(path)[1].lower(), 'keras')
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend: {backend}")
+    return backend
+
+def _flatten_position(model):
+    """Index of the Flatten layer in a Sequential model, or None"""
+    if type(model).__name__ != 'Sequential':
+        return None
+    for i, layer in enumerate(model.layers):
+        if type(layer).__name__ == 'Flatten' and i > 0:
+            return i
+    return None
+
+
+class InferenceEngine:
+    """
+    Fixed-signature forward pass around a loaded Keras model.
+
+    `model.predict()` builds a data adapter and a fresh execution loop on every
+    call; here the forward function is traced once as a `tf.function`
+    (optionally XLA-compiled) and reused for every batch.
+
+    For a Sequential model with a Flatten layer (the VGG16 detector) the same
+    pass also returns an embedding: the convolutional base output just before
+    Flatten, global-average-pooled and L2-normalized. infer_with_embeddings()
+    exposes it; for other models embedding_dim is 0.
+    """
+
+    def __init__(self, model, input_shape=(128, 128, 3), jit_compile=False):
+        self.model = model
+        self.input_shape = tuple(input_shape)
+        self.jit_compile = jit_compile
+        self.warm_sizes = []
+
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._images = 0
+        self._total_seconds = 0.0
+        self._last_seconds = 0.0
+
+        start = time.perf_counter()
+        import tensorflow as tf  # Deferred so the exported-model runtimes don't need it
+        self._flatten_at = _flatten_position(model)
+        self.embedding_dim = 0
+        if self._flatten_at is not None:
+            self.embedding_dim = int(model.layers[self._flatten_at].input.shape[-1])
+        self._forward = tf.function(
+            self._call,
+            input_signature=[tf.TensorSpec((None,) + self.input_shape, tf.float32)],
+            jit_compile=jit_compile
+        )
+        # Trace now so the first real request doesn't pay for it
+        self._forward.get_concrete_function()
+        self.compile_ms = (time.perf_counter() - start) * 1000.0
+        self.warmup_ms = 0.0
+
+    def _call(self, x):
+        if self._flatten_at is None:
+            return self.model(x, training=False), None
+        import tensorflow as tf
+
+        features = x
+        for layer in self.model.layers[:self._flatten_at]:
+            features = layer(features, training=False)
+        output = features
+        for layer in self.model.layers[self._flatten_at:]:
+            output = layer(output, training=False)
+        pooled = tf.reduce_mean(features, axis=list(range(1, len(features.shape) - 1)))
+        return output, tf.math.l2_normalize(pooled, axis=-1)
+
+    def warmup(self, batch_sizes=(1,)):
+        """Run dummy batches of the common sizes so kernels and XLA clusters are ready"""
+        start = time.perf_counter()
+        for size in sorted(set(int(s) for s in batch_sizes if int(s) > 0)):
+            dummy = np.zeros((size,) + self.input_shape, dtype=np.float32)
+            self._forward(dummy)[0].numpy()
+            if size not in self.warm_sizes:
+                self.warm_sizes.append(size)
+        self.warm_sizes.sort()
+        self.warmup_ms = (time.perf_counter() - start) * 1000.0
+        print(f"[+] Inference engine warmed up for batch sizes {self.warm_sizes} in {self.warmup_ms:.0f}ms")
+
+    def _bucket(self, n):
+        # With XLA every new batch shape is a recompile, so pad to a warmed size
+        if not self.jit_compile:
+            return n
+        for size in self.warm_sizes:
+            if size >= n:
+                return size
+        return n
+
+    def infer(self, batch):
+        """Run a (N, H, W, C) batch and return the model output as a NumPy array"""
+        return self.infer_with_embeddings(batch)[0]
+
+    def infer_with_embeddings(self, batch):
+        """Like infer(), but returns (output, embeddings); embeddings is None when the model has none"""
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == len(self.input_shape):
+            batch = batch[np.newaxis]
+
+        n = batch.shape[0]
+        padded = self._bucket(n)
+        if padded != n:
+            pad = np.zeros((padded - n,) + batch.shape[1:], dtype=np.float32)
+            batch = np.concatenate([batch, pad])
+
+        start = time.perf_counter()
+        output, embeddings = self._forward(batch)
+        output = output.numpy()[:n]
+        embeddings = embeddings.numpy()[:n] if embeddings is not None else None
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._calls += 1
+            self._images += n
+            self._total_seconds += elapsed
+            self._last_seconds = elapsed
+        return output, embeddings
+
+    def stats(self):
+        """Return compile/warm-up cost and per-call latency counters"""
+        with self._lock:
+            avg_ms = (self._total_seconds / self._calls) * 1000.0 if self._calls else 0.0
+            return {
+                'backend': 'keras',
+                'xla': self.jit_compile,
+                'embedding_dim': self.embedding_dim,
+                'compile_ms': round(self.compile_ms, 1),
+                'warmup_ms': round(self.warmup_ms, 1),
+                'warm_batch_sizes': list(self.warm_sizes),
+                'calls': self._calls,
+                'images': self._images,
+                'avg_call_ms': round(avg_ms, 2),
+                'last_call_ms': round(self._last_seconds * 1000.0, 2)
+            }
+
+
+class _RuntimeEngine:
+    """
+    Shared warm-up, call counters and stats() for the exported-model runtimes,
+    mirroring InferenceEngine so the server can use either interchangeably.
+    Subclasses implement _run(batch) and set compile_ms. Exported models only
+    have the classifier output, so they provide no embeddings.
+    """
+    backend = None
+    embedding_dim = 0
+
+    def __init__(self, path, input_shape=(128, 128, 3)):
+        self.path = path
+        self.input_shape = tuple(input_shape)
+        self.warm_sizes = []
+        self.compile_ms = 0.0
+        self.warmup_ms = 0.0
+
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._images = 0
+        self._total_seconds = 0.0
+        self._last_seconds = 0.0
+
+    def _run(self, batch):
+        raise NotImplementedError
+
+    def warmup(self, batch_sizes=(1,)):
+        """Run dummy batches of the common sizes so buffers are allocated before the first request"""
+        start = time.perf_counter()
+        for size in sorted(set(int(s) for s in batch_sizes if int(s) > 0)):
+            self._run(np.zeros((size,) + self.input_shape, dtype=np.float32))
+            if size not in self.warm_sizes:
+                self.warm_sizes.append(size)
+        self.warm_sizes.sort()
+        self.warmup_ms = (time.perf_counter() - start) * 1000.0
+        print(f"[+] {self.backend} engine warmed up for batch sizes {self.warm_sizes} in {self.warmup_ms:.0f}ms")
+
+    def infer(self, batch):
+        """Run a (N, H, W, C) batch and return the model output as a NumPy array"""
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        if batch.ndim == len(self.input_shape):
+            batch = batch[np.newaxis]
+
+        start = time.perf_counter()
+        output = self._run(batch)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._calls += 1
+            self._images += batch.shape[0]
+            self._total_seconds += elapsed
+            self._last_seconds = elapsed
+        return output
+
+    def infer_with_embeddings(self, batch):
+        """(output, None): same interface as InferenceEngine"""
+        return self.infer(batch), None
+
+    def stats(self):
+        """Return load/warm-up cost and per-call latency counters"""
+        with self._lock:
+            avg_ms = (self._total_seconds / self._calls) * 1000.0 if self._calls else 0.0
+            return {
+                'backend': self.backend,
+                'xla': False,
+                'embedding_dim': 0,
+                'compile_ms': round(self.compile_ms, 1),
+                'warmup_ms': round(self.warmup_ms, 1),
+                'warm_batch_sizes': list(self.warm_sizes),
+                'calls': self._calls,
+                'images': self._images,
+                'avg_call_ms': round(avg_ms, 2),
+                'last_call_ms': round(self._last_seconds * 1000.0, 2)
+            }
+
+
+class TFLiteEngine(_RuntimeEngine):
+    """
+    TensorFlow Lite interpreter over an exported .tflite model (float16 or
+    dynamic-range int8). The interpreter is not thread-safe, so calls are
+    serialized; its input is resized only when the batch size changes.
+    """
+    backend = 'tflite'
+
+    def __init__(self, path, input_shape=(128, 128, 3), num_threads=None):
+        super().__init__(path, input_shape)
+        start = time.perf_counter()
+        try:
+            from ai_edge_litert.interpreter import Interpreter  # Successor of tf.lite.Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self._interpreter = Interpreter(model_path=path, num_threads=num_threads)
+        self._input_index = self._interpreter.get_input_details()[0]['index']
+        self._output_index = self._interpreter.get_output_details()[0]['index']
+        self._run_lock = threading.Lock()
+        self._batch_size = None
+        self._resize(1)
+        self.compile_ms = (time.perf_counter() - start) * 1000.0
+
+    def _resize(self, n):
+        self._interpreter.resize_tensor_input(self._input_index, (n,) + self.input_shape, strict=False)
+        self._interpreter.allocate_tensors()
+        self._batch_size = n
+
+    def _run(self, batch):
+        with self._run_lock:
+            if batch.shape[0] != self._batch_size:
+                self._resize(batch.shape[0])
+            self._interpreter.set_tensor(self._input_index, batch)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output_index).copy()
+
+
+class OnnxEngine(_RuntimeEngine):
+    """ONNX Runtime CPU session over an exported .onnx model (requires onnxruntime)"""
+    backend = 'onnx'
+
+    def __init__(self, path, input_shape=(128, 128, 3), num_threads=None):
+        super().__init__(path, input_shape)
+        import onnxruntime as ort  # Optional dependency, only needed for this backend
+
+        start = time.perf_counter()
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self._session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self._input_name = self._session.get_inputs()[0].name
+        self.compile_ms = (time.perf_counter() - start) * 1000.0
+
+    def _run(self, batch):
+        return self._session.run(None, {self._input_name: batch})[0]
+
+
+def load_runtime_engine(path, backend, input_shape=(128, 128, 3), num_threads=None):
+    """Open an exported model with the 'tflite' or 'onnx' runtime"""
+    if backend == 'tflite':
+        return TFLiteEngine(path, input_shape, num_threads)
+    if backend == 'onnx':
+        return OnnxEngine(path, input_shape, num_threads)
+    raise ValueError(f"{backend} is not an exported-model backend")
@@ -0,0 +1,412 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from werkzeug.utils import secure_filename
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp')
+
+
+class JobLockLost(Exception):
+    """Raised when another worker took over a job this worker was running"""
+
+
+class JobManager:
+    """
+    Asynchronous batch jobs backed by a directory on local disk.
+
+    Each job is a folder holding manifest.json (items and state), the uploaded
+    files, and results.jsonl with one line per finished item. Any worker process
+    can pick up a queued job by creating its lock file, which holds a token
+    unique to that claim. A heartbeat thread refreshes the lock while the job
+    runs, however long a single item takes, so a job whose worker died is taken
+    over after `lock_timeout` seconds and resumes after its last recorded
+    result. A result is only appended while the lock still holds our token.
+
+    Items of a job are analyzed by a pool of threads, so their model calls are
+    batched together by the server's micro-batcher.
+
+    Unfinished jobs are indexed by an empty file in queue/, so workers poll that
+    directory instead of every job ever created. A finished job's entry moves to
+    finished/, and the job (uploads and results) is deleted `retention` seconds
+    after it finished; 0 keeps finished jobs forever.
+    """
+
+    def __init__(self, jobs_dir, process_fn, workers=4, poll_interval=1.0, lock_timeout=60.0,
+                 retention=7 * 24 * 3600, sweep_interval=60.0):
+        self.jobs_dir = jobs_dir
+        self.process_fn = process_fn
+        self.workers = max(1, int(workers))
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self.retention = retention
+        self.sweep_interval = sweep_interval
+
+        self._lock = threading.Lock()
+        self._dispatcher = None
+        self._wake = threading.Event()
+        self._next_sweep = 0.0
+        self._queue_dir = os.path.join(jobs_dir, 'queue')
+        self._finished_dir = os.path.join(jobs_dir, 'finished')
+        os.makedirs(jobs_dir, exist_ok=True)
+        if not os.path.isdir(self._queue_dir):
+            self._index_existing()
+        os.makedirs(self._finished_dir, exist_ok=True)
+
+    # Paths
+
+    def _job_dir(self, job_id):
+        if len(job_id) != 32 or not all(c in '0123456789abcdef' for c in job_id):
+            raise KeyError(job_id)
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _manifest_path(self, job_id):
+        return os.path.join(self._job_dir(job_id), 'manifest.json')
+
+    def _results_path(self, job_id):
+        return os.path.join(self._job_dir(job_id), 'results.jsonl')
+
+    def _lock_path(self, job_id):
+        return os.path.join(self._job_dir(job_id), 'lock')
+
+    @staticmethod
+    def _index_entry(timestamp, job_id):
+        # Millisecond prefix, so entries sort in time order
+        return f"{int(timestamp * 1000):015d}-{job_id}"
+
+    def _index_existing(self):
+        """Index jobs created before queue/ existed; queue/ is created last, once they all are"""
+        entries = []
+        for job_id in os.listdir(self.jobs_dir):
+            try:
+                manifest = self._read_manifest(job_id)
+            except (KeyError, ValueError, OSError):
+                continue
+            if manifest['state'] in ('queued', 'running'):
+                entries.append(('queue', self._index_entry(manifest['created_at'], job_id)))
+            else:
+                finished_at = manifest.get('finished_at') or manifest['created_at']
+                entries.append(('finished', self._index_entry(finished_at, job_id)))
+
+        os.makedirs(self._finished_dir, exist_ok=True)
+        staging = f"{self._queue_dir}.{os.getpid()}.tmp"
+        os.makedirs(staging, exist_ok=True)
+        for directory, entry in entries:
+            target = staging if directory == 'queue' else self._finished_dir
+            open(os.path.join(target, entry), 'a').close()
+        try:
+            os.rename(staging, self._queue_dir)
+        except OSError:
+            # Another worker indexed them first
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _read_manifest(self, job_id):
+        try:
+            with open(self._manifest_path(job_id), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(job_id)
+
+    def _write_manifest(self, manifest):
+        path = self._manifest_path(manifest['id'])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    # Job creation
+
+    def create_job(self, uploads=(), folder=None):
+        """
+        Queue a job for uploaded files ((filename, stream) pairs) or for every
+        image under a server-side folder. Returns the job manifest.
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        files_dir = os.path.join(job_dir, 'files')
+        os.makedirs(files_dir)
+
+        items = []
+        for index, (filename, stream) in enumerate(uploads):
+            name = secure_filename(filename or '') or f"upload_{index}"
+            path = os.path.join(files_dir, f"{index:06d}_{name}")
+            with open(path, 'wb') as f:
+                for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+                    f.write(chunk)
+            items.append({'name': filename or name, 'path': path})
+
+        if folder is not None:
+            for root, _, names in sorted(os.walk(folder)):
+                for name in sorted(names):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        path = os.path.join(root, name)
+                        items.append({'name': os.path.relpath(path, folder), 'path': path})
+
+        manifest = {
+            'id': job_id,
+            'state': 'queued',
+            'created_at': time.time(),
+            'source': 'folder' if folder is not None else 'upload',
+            'total': len(items),
+            'items': items
+        }
+        self._write_manifest(manifest)
+        open(self._results_path(job_id), 'a').close()
+        open(os.path.join(self._queue_dir, self._index_entry(manifest['created_at'], job_id)), 'a').close()
+
+        self.start()
+        self._wake.set()
+        return manifest
+
+    # Status and results
+
+    def _read_results(self, job_id):
+        """Parse results.jsonl, ignoring a torn last line left by a crash"""
+        results = []
+        with open(self._results_path(job_id), 'r') as f:
+            for line in f:
+                try:
+                    results.append(json.loads(line))
+                except ValueError:
+                    pass
+        return results
+
+    def status(self, job_id):
+        """Return job state and progress counters"""
+        manifest = self._read_manifest(job_id)
+        results = self._read_results(job_id)
+        failed = sum(1 for r in results if 'error' in r)
+        return {
+            'job_id': job_id,
+            'state': manifest['state'],
+            'source': manifest['source'],
+            'created_at': manifest['created_at'],
+            'started_at': manifest.get('started_at'),
+            'finished_at': manifest.get('finished_at'),
+            'total': manifest['total'],
+            'completed': len(results) - failed,
+            'failed': failed,
+            'progress': round(len(results) / manifest['total'], 3) if manifest['total'] else 1.0
+        }
+
+    def iter_results(self, job_id, follow=True):
+        """Yield result lines as they are written; with `follow`, until the job finishes"""
+        self._read_manifest(job_id)  # KeyError for unknown jobs
+        with open(self._results_path(job_id), 'r') as f:
+            while True:
+                position = f.tell()
+                line = f.readline()
+                if line.endswith('\n'):
+                    yield line
+                    continue
+                f.seek(position)  # Partial line still being written
+
+                if not follow or self._read_manifest(job_id)['state'] in ('done', 'failed'):
+                    # Pick up anything written between the last read and the state change
+                    for line in f.readlines():
+                        if line.endswith('\n'):
+                            yield line
+                    return
+                time.sleep(self.poll_interval)
+
+    # Processing
+
+    def start(self):
+        """Start the dispatcher thread (lazily, so it runs inside each forked worker)"""
+        with self._lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._dispatch, name="job-dispatcher", daemon=True)
+                self._dispatcher.start()
+
+    def _claim(self, job_id):
+        """Create the job's lock file; returns its token, or None if another worker holds it"""
+        lock_path = self._lock_path(job_id)
+        token = f"{os.getpid()}-{uuid.uuid4().hex}"
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, token.encode())
+            os.close(fd)
+            return token
+        except FileExistsError:
+            pass
+
+        # Take over a lock whose holder stopped refreshing it
+        try:
+            if time.time() - os.path.getmtime(lock_path) < self.lock_timeout:
+                return None
+            os.remove(lock_path)
+        except OSError:
+            return None
+        return self._claim(job_id)
+
+    def _owns_lock(self, job_id, token):
+        try:
+            with open(self._lock_path(job_id), 'r') as f:
+                return f.read() == token
+        except OSError:
+            return False
+
+    def _refresh_lock(self, job_id, token):
+        if not self._owns_lock(job_id, token):
+            return False
+        try:
+            os.utime(self._lock_path(job_id))
+        except OSError:
+            pass
+        return True
+
+    def _heartbeat(self, job_id, token, stop):
+        """Refresh the lock a few times per lock_timeout until `stop` is set or the lock is lost"""
+        while not stop.wait(self.lock_timeout / 4):
+            if not self._refresh_lock(job_id, token):
+                return
+
+    def _pending_jobs(self):
+        """Unfinished jobs, oldest first, from the queue/ index"""
+        pending = []
+        for entry in sorted(os.listdir(self._queue_dir)):
+            job_id = entry.partition('-')[2]
+            try:
+                manifest = self._read_manifest(job_id)
+            except (KeyError, ValueError, OSError):
+                # Deleted job, or a manifest not yet written
+                if not os.path.isdir(os.path.join(self.jobs_dir, job_id)):
+                    self._unqueue(entry)
+                continue
+            if manifest['state'] in ('queued', 'running'):
+                pending.append(job_id)
+            else:
+                # A worker died between finishing the job and moving its entry
+                self._mark_finished(manifest)
+        return pending
+
+    def _unqueue(self, entry):
+        try:
+            os.remove(os.path.join(self._queue_dir, entry))
+        except OSError:
+            pass
+
+    def _mark_finished(self, manifest):
+        """Move a finished job's entry from queue/ to finished/, where sweep() expires it"""
+        job_id = manifest['id']
+        finished_at = manifest.get('finished_at') or time.time()
+        open(os.path.join(self._finished_dir, self._index_entry(finished_at, job_id)), 'a').close()
+        self._unqueue(self._index_entry(manifest['created_at'], job_id))
+
+    def _finish(self, job_id, **fields):
+        """Record a job's final state; its finished/ entry exists before the state is visible"""
+        manifest = self._read_manifest(job_id)
+        manifest.update(fields, finished_at=time.time())
+        open(os.path.join(self._finished_dir, self._index_entry(manifest['finished_at'], job_id)), 'a').close()
+        self._write_manifest(manifest)
+        self._mark_finished(manifest)
+        return manifest
+
+    def sweep(self, now=None):
+        """Delete jobs that finished more than `retention` seconds ago; returns how many"""
+        if not self.retention:
+            return 0
+        cutoff = self._index_entry((now or time.time()) - self.retention, '')
+        removed = 0
+        for entry in sorted(os.listdir(self._finished_dir)):
+            if entry >= cutoff:
+                break
+            job_id = entry.partition('-')[2]
+            try:
+                # A worker may have died before the state it was finishing was written
+                if self._read_manifest(job_id)['state'] in ('done', 'failed'):
+                    shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+            except (KeyError, ValueError, OSError):
+                pass
+            try:
+                os.remove(os.path.join(self._finished_dir, entry))
+            except OSError:
+                pass
+            removed += 1
+        return removed
+
+    def _dispatch(self):
+        while True:
+            ran = False
+            for job_id in self._pending_jobs():
+                token = self._claim(job_id)
+                if token:
+                    stop = threading.Event()
+                    threading.Thread(
+                        target=self._heartbeat, args=(job_id, token, stop), name="job-heartbeat", daemon=True
+                    ).start()
+                    try:
+                        self._run_job(job_id, token)
+                    except JobLockLost:
+                        print(f"Job {job_id} was taken over by another worker")
+                    except Exception as e:
+                        print(f"Job {job_id} failed: {e}")
+                        self._finish(job_id, state='failed', error=str(e))
+                    finally:
+                        stop.set()
+                        if self._owns_lock(job_id, token):
+                            try:
+                                os.remove(self._lock_path(job_id))
+                            except OSError:
+                                pass
+                    ran = True
+            if time.time() >= self._next_sweep:
+                self._next_sweep = time.time() + self.sweep_interval
+                try:
+                    removed = self.sweep()
+                    if removed:
+                        print(f"Removed {removed} expired jobs")
+                except OSError as e:
+                    print(f"Job sweep failed: {e}")
+            if not ran:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _run_job(self, job_id, token):
+        manifest = self._read_manifest(job_id)
+        if manifest['state'] == 'queued':
+            manifest.update(state='running', started_at=time.time())
+            self._write_manifest(manifest)
+
+        results_path = self._results_path(job_id)
+        done = {r['index'] for r in self._read_results(job_id) if 'index' in r}
+        remaining = [(i, item) for i, item in enumerate(manifest['items']) if i not in done]
+        if done:
+            print(f"Resuming job {job_id}: {len(done)}/{manifest['total']} already done")
+
+        with open(results_path, 'r+') as f:
+            # Drop a torn last line so new results start on a fresh line
+            content = f.read()
+            if content and not content.endswith('\n'):
+                f.seek(0)
+                f.truncate(content.rfind('\n') + 1)
+
+        write_lock = threading.Lock()
+        lost = threading.Event()
+
+        def run_item(index, item):
+            if lost.is_set():
+                return
+            try:
+                result = self.process_fn(item['path'])
+                line = dict(result, index=index, name=item['name'])
+            except Exception as e:
+                line = {'index': index, 'name': item['name'], 'error': str(e)}
+            with write_lock:
+                # The new holder resumes from results.jsonl: never write after a takeover
+                if lost.is_set() or not self._owns_lock(job_id, token):
+                    lost.set()
+                    raise JobLockLost(job_id)
+                with open(results_path, 'a') as out:
+                    out.write(json.dumps(line) + '\n')
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job-item') as pool:
+            for future in as_completed([pool.submit(run_item, i, item) for i, item in remaining]):
+                future.result()
+
+        manifest = self._finish(job_id, state='done')
+        print(f"Job {job_id} done: {manifest['total']} items")
@@ -0,0 +1,158 @@
+import threading
+import queue
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatcherOverloaded(Exception):
+    """Raised when the batching queue is full and a request cannot be accepted"""
+
+
+class MicroBatcher:
+    """
+    Collect single-image tensors from concurrent requests and run them through
+    the model as one batch.
+
+    The worker thread waits for the first queued item, then keeps collecting
+    until either `window_ms` has elapsed or `max_batch` items are gathered.
+    Items carry an optional key (e.g. the model that must score them); the
+    collected items are split by key and each group runs as
+    `predict_fn(batch, key)`, so a batch never mixes keys.
+    """
+
+    def __init__(self, predict_fn, window_ms=5.0, max_batch=16, max_queue=64):
+        self.predict_fn = predict_fn
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self.max_queue = max(1, int(max_queue))
+
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._lock = threading.Lock()
+        # Serializes producers, so a group's free-capacity check holds until it is queued
+        self._submit_lock = threading.Lock()
+        self._worker = None
+
+        # Counters reported through stats()
+        self._batches = 0
+        self._items = 0
+        self._rejected = 0
+        self._largest_batch = 0
+        self._busy_seconds = 0.0
+
+    def _ensure_worker(self):
+        # Started lazily so the thread is created inside each forked worker
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="micro-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def submit_async(self, tensor, key=None):
+        """Queue one (1, H, W, C) or (H, W, C) tensor; returns a Future for its output row"""
+        if tensor.ndim == 4:
+            tensor = tensor[0]
+        return self._enqueue([tensor], key)[0]
+
+    def submit(self, tensor, timeout=None, key=None):
+        """Queue one (1, H, W, C) or (H, W, C) tensor and block until its output row is ready"""
+        return self.submit_async(tensor, key).result(timeout=timeout)
+
+    def submit_many_async(self, tensors, key=None):
+        """
+        Queue an (N, H, W, C) stack of tensors together; returns N Futures.
+        All or nothing: if the queue cannot take all N, none is queued. Batches
+        still hold at most `max_batch` items, so a group larger than that runs
+        as several batches; a group larger than `max_queue` could never be
+        queued and raises ValueError.
+        """
+        return self._enqueue(list(tensors), key)
+
+    def submit_many(self, tensors, timeout=None, key=None):
+        """Queue an (N, H, W, C) stack of tensors together and return their N output rows"""
+        return [future.result(timeout=timeout) for future in self.submit_many_async(tensors, key)]
+
+    def _enqueue(self, tensors, key):
+        if len(tensors) > self.max_queue:
+            raise ValueError(f"Cannot queue {len(tensors)} tensors together (queue holds {self.max_queue})")
+        self._ensure_worker()
+        futures = [Future() for _ in tensors]
+        with self._submit_lock:
+            # Only the worker removes items meanwhile, so the free space can only grow
+            if self.max_queue - self._queue.qsize() < len(tensors):
+                with self._lock:
+                    self._rejected += len(tensors)
+                raise BatcherOverloaded(
+                    f"Inference queue is full ({self.max_queue} pending requests)"
+                )
+            for tensor, future in zip(tensors, futures):
+                self._queue.put_nowait((tensor, future, key))
+        return futures
+
+    def _collect(self):
+        items = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+
+        while len(items) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                # Window closed: still take anything already waiting
+                try:
+                    items.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return items
+
+    def _run(self):
+        while True:
+            groups = {}
+            for tensor, future, key in self._collect():
+                groups.setdefault(key, []).append((tensor, future))
+            for key, items in groups.items():
+                self._run_batch(items, key)
+
+    def _run_batch(self, items, key):
+        futures = [f for _, f in items]
+
+        start = time.perf_counter()
+        try:
+            batch = np.stack([t for t, _ in items])
+            outputs = self.predict_fn(batch, key)
+            for i, future in enumerate(futures):
+                future.set_result(outputs[i])
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._batches += 1
+            self._items += len(items)
+            self._largest_batch = max(self._largest_batch, len(items))
+            self._busy_seconds += elapsed
+
+    def stats(self):
+        """Return the batching configuration and counters"""
+        with self._lock:
+            avg_batch = self._items / self._batches if self._batches else 0.0
+            return {
+                'window_ms': self.window * 1000.0,
+                'max_batch': self.max_batch,
+                'max_queue': self.max_queue,
+                'queue_depth': self._queue.qsize(),
+                'batches': self._batches,
+                'items': self._items,
+                'rejected': self._rejected,
+                'avg_batch_size': round(avg_batch, 2),
+                'largest_batch': self._largest_batch,
+                'busy_seconds': round(self._busy_seconds, 3)
+            }
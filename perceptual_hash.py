@@ -0,0 +1,110 @@
+import itertools
+
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+CHUNKS = 4          # Multi-index hashing: 64-bit hash split into 4 x 16-bit chunks
+CHUNK_BITS = HASH_BITS // CHUNKS
+
+# Bit counts for every byte value, for a vectorized popcount over uint64 arrays
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def dhash(image, hash_size=8):
+    """
+    Difference hash: 64-bit int that survives re-saving, resizing and recompression.
+
+    The image is shrunk to (hash_size + 1) x hash_size grayscale and each bit
+    records whether a pixel is brighter than its right-hand neighbour.
+    """
+    if image.mode != "L":
+        image = image.convert("L")
+    small = np.asarray(image.resize((hash_size + 1, hash_size), Image.LANCZOS), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+def hamming_distances(hashes, value):
+    """Hamming distance between every uint64 in `hashes` and `value`"""
+    diff = np.bitwise_xor(hashes, np.uint64(value))
+    return _POPCOUNT8[diff.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int32)
+
+
+class PerceptualHashIndex:
+    """
+    Near-duplicate lookup over 64-bit perceptual hashes.
+
+    Multi-index hashing: if two hashes are within distance d, at least one of
+    their four 16-bit chunks is within d // 4. Each chunk keeps a sorted copy
+    of its values, so a query only enumerates the few chunk values within
+    that radius, binary-searches for candidates, and verifies the full
+    distance on the (small) candidate set with a vectorized popcount.
+    """
+
+    def __init__(self, hashes=(), labels=()):
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.labels = np.asarray(labels) if len(labels) else np.array([''] * len(self.hashes))
+        self._chunk_sorted = []
+        self._chunk_order = []
+
+        mask = np.uint64((1 << CHUNK_BITS) - 1)
+        for c in range(CHUNKS):
+            chunk = (self.hashes >> np.uint64(c * CHUNK_BITS)) & mask
+            order = np.argsort(chunk, kind='stable')
+            self._chunk_sorted.append(chunk[order])
+            self._chunk_order.append(order)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved by save()"""
+        data = np.load(path)
+        return cls(data['hashes'], data['labels'])
+
+    def save(self, path):
+        """Save hashes and labels as a NumPy .npz archive"""
+        with open(path, 'wb') as f:
+            np.savez(f, hashes=self.hashes, labels=self.labels)
+
+    _flip_masks = {}
+
+    @classmethod
+    def _neighbours(cls, value, radius):
+        # All 16-bit values within `radius` bit flips of `value`
+        masks = cls._flip_masks.get(radius)
+        if masks is None:
+            masks = [0]
+            for r in range(1, radius + 1):
+                for bits in itertools.combinations(range(CHUNK_BITS), r):
+                    masks.append(sum(1 << b for b in bits))
+            masks = cls._flip_masks[radius] = np.array(masks, dtype=np.uint64)
+        return np.bitwise_xor(masks, np.uint64(value))
+
+    def query(self, value, max_distance=6):
+        """Return (label, distance) of the closest hash within max_distance, or None"""
+        if len(self.hashes) == 0:
+            return None
+
+        radius = max_distance // CHUNKS
+        candidates = []
+        for c in range(CHUNKS):
+            chunk_value = (int(value) >> (c * CHUNK_BITS)) & ((1 << CHUNK_BITS) - 1)
+            probes = self._neighbours(chunk_value, radius)
+            sorted_chunk = self._chunk_sorted[c]
+            lo = np.searchsorted(sorted_chunk, probes, side='left')
+            hi = np.searchsorted(sorted_chunk, probes, side='right')
+            hit = hi > lo
+            for start, stop in zip(lo[hit], hi[hit]):
+                candidates.append(self._chunk_order[c][start:stop])
+
+        if not candidates:
+            return None
+
+        candidates = np.unique(np.concatenate(candidates))
+        distances = hamming_distances(self.hashes[candidates], value)
+        best = int(np.argmin(distances))
+        if distances[best] > max_distance:
+            return None
+        return str(self.labels[candidates[best]]), int(distances[best])
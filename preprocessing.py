@@ -0,0 +1,149 @@
+import io
+import math
+import mmap
+import tempfile
+
+import numpy as np
+import cv2
+from PIL import Image
+
+MODEL_INPUT_SIZE = (128, 128)
+
+# 'pil': full decode (reference behaviour)
+# 'draft': JPEG DCT-domain downscaling via Image.draft (other formats fully decode)
+# 'cv2': OpenCV IMREAD_REDUCED_* decode (formats OpenCV cannot read, e.g. GIF, fall back to PIL)
+# Like PIL, every backend keeps the stored pixel orientation and ignores EXIF Orientation.
+PREPROCESS_BACKENDS = ('pil', 'draft', 'cv2')
+
+_CV2_REDUCED_FLAGS = {
+    factor: flag | cv2.IMREAD_IGNORE_ORIENTATION for factor, flag in {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8
+    }.items()
+}
+
+def to_model_input(image, target_size=MODEL_INPUT_SIZE, out=None):
+    """
+    Resize a PIL image and scale it to [0, 1] float32.
+
+    Writes into `out` (an (H, W, 3) float32 view, e.g. one row of a batch
+    buffer) when given; otherwise returns a new (1, H, W, 3) array.
+    """
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.size != tuple(target_size):
+        image = image.resize(target_size)
+    pixels = np.asarray(image)
+
+    if out is None:
+        out = np.empty((1,) + pixels.shape, dtype=np.float32)
+        np.divide(pixels, 255.0, out=out[0], dtype=np.float32)
+        return out
+    np.divide(pixels, 255.0, out=out, dtype=np.float32)
+    return out
+
+def stats_proxy_size(size, pixel_budget, min_size=MODEL_INPUT_SIZE):
+    """Smallest decode size that still covers both the model input and a `pixel_budget` stats proxy"""
+    width, height = size
+    if not pixel_budget or width * height <= pixel_budget:
+        return size
+    scale = math.sqrt(pixel_budget / (width * height))
+    return (max(min_size[0], int(width * scale)), max(min_size[1], int(height * scale)))
+
+def _reduction_factor(size, min_size):
+    factor = 1
+    while factor < 8 and size[0] // (factor * 2) >= min_size[0] and size[1] // (factor * 2) >= min_size[1]:
+        factor *= 2
+    return factor
+
+def _encoded_view(source):
+    """
+    The encoded bytes of a file object as a uint8 array, without copying
+    when possible: an in-memory upload's own buffer, or a read-only mapping
+    of an upload spooled to disk.
+    """
+    if isinstance(source, tempfile.SpooledTemporaryFile):
+        source = source._file  # BytesIO until rolled over, then a real file
+    if isinstance(source, io.BytesIO):
+        return np.frombuffer(source.getbuffer(), dtype=np.uint8)
+    try:
+        return np.frombuffer(mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ), dtype=np.uint8)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        source.seek(0)
+        return np.frombuffer(source.read(), dtype=np.uint8)
+
+def _cv2_decode(source, flags):
+    if isinstance(source, str):
+        return cv2.imread(source, flags)
+    return cv2.imdecode(_encoded_view(source), flags)
+
+def decode_image(source, backend='pil', min_size=MODEL_INPUT_SIZE, image=None):
+    """
+    Decode `source` (path or file object) to an RGB PIL image.
+
+    The 'draft' and 'cv2' backends decode at a reduced resolution that is
+    still at least `min_size`, which for JPEGs skips most of the IDCT work.
+    `image` may be the already-opened (not yet loaded) PIL image of `source`.
+    Returns (rgb_image, source_size).
+    """
+    if backend not in PREPROCESS_BACKENDS:
+        raise ValueError(f"Unknown preprocessing backend: {backend}")
+
+    if image is None:
+        image = Image.open(source)
+    source_size = image.size
+
+    if backend == 'cv2':
+        factor = _reduction_factor(source_size, min_size)
+        bgr = _cv2_decode(source, _CV2_REDUCED_FLAGS[factor])
+        if bgr is not None:
+            return Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)), source_size
+        # Not a format OpenCV reads: full PIL decode, as the 'pil' backend
+
+    if backend == 'draft' and image.format == 'JPEG':
+        # Picks the largest DCT scale (1/2, 1/4, 1/8) that stays >= min_size
+        image.draft('RGB', tuple(min_size))
+
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return image, source_size
+
+def prepare_image(image, target_size=MODEL_INPUT_SIZE):
+    """Reference preprocessing of an opened PIL image into a (1, H, W, 3) float32 batch"""
+    return to_model_input(image, target_size)
+
+def crop_boxes(size, count, crop_size=MODEL_INPUT_SIZE):
+    """Up to `count` crop boxes of `crop_size`, spread over an image of `size` in an even grid"""
+    width, height = size
+    crop_w, crop_h = crop_size
+    if count <= 0 or width < crop_w or height < crop_h:
+        return []
+    cols = max(1, round(math.sqrt(count * width / height)))
+    rows = max(1, math.ceil(count / cols))
+    # One crop centred in each cell of a rows x cols grid
+    xs = np.clip(((np.arange(cols) + 0.5) * width / cols - crop_w / 2).round(), 0, width - crop_w).astype(int)
+    ys = np.clip(((np.arange(rows) + 0.5) * height / rows - crop_h / 2).round(), 0, height - crop_h).astype(int)
+    boxes = list(dict.fromkeys((int(x), int(y), int(x) + crop_w, int(y) + crop_h) for y in ys for x in xs))
+    if len(boxes) > count:
+        # Drop the crops farthest from the centre first
+        centre = np.array([width - crop_w, height - crop_h]) / 2
+        distance = [np.hypot(*(np.array(box[:2]) - centre)) for box in boxes]
+        keep = sorted(np.argsort(distance, kind='stable')[:count])
+        boxes = [boxes[i] for i in keep]
+    return boxes
+
+def multi_crop_inputs(image, boxes, target_size=MODEL_INPUT_SIZE):
+    """
+    Model inputs for multi-crop inference: row 0 is the whole image resized
+    to `target_size`, followed by one row per box cropped at the image's own
+    resolution. Returns an (1 + len(boxes), H, W, 3) float32 batch.
+    """
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    batch = np.empty((1 + len(boxes), target_size[1], target_size[0], 3), dtype=np.float32)
+    to_model_input(image, target_size, out=batch[0])
+    for i, box in enumerate(boxes, start=1):
+        to_model_input(image.crop(box), target_size, out=batch[i])
+    return batch
@@ -0,0 +1,204 @@
+"""
+Replay stored decisions under a different decision configuration.
+
+Loads every row of a decision store (see decision_store.py, written by the
+server with DECISION_LOG_DIR and by batch_analyze_fake_images.py with
+--decision-log) and re-applies the hybrid decision with NumPy over all rows
+at once, without running the model again. Reports how the verdict counts
+shift against the verdicts that were returned, and accuracy on labeled rows:
+
+    python replay_decisions.py decisions --fake-threshold 0.65
+    python replay_decisions.py decisions --config tuned.json --feature-weights 0.4,0.2,0.2,0.2
+
+Each row replays the way it was decided, by its recorded detection method:
+hybrid decisions go through the fusion decision again, model-only decisions
+(the cascade's model exit, batch runs without --stats) follow the model
+score, and hash matches and cascade exits before the model keep their
+recorded verdict. With --embedding-threshold every row that reached the
+model is matched again; rows that no longer match fall back to fusion (or
+the model, without statistics). A row missing an input its replay needs
+(NaN, e.g. a column added after it was stored) keeps its recorded verdict.
+Replaying with the configuration the rows were decided with changes nothing. The same JSON file can be given to the
+server as DECISION_CONFIG.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from decision import DEFAULT_DECISION_CONFIG, DECISION_METHODS, decision_config, decide_scores
+from decision_store import FEATURE_COLUMNS, METHODS, VERDICTS, load_decisions
+
+# Method codes in the replayed output ('recorded': no method was stored)
+REPLAY_METHODS = ('recorded', 'ai_model') + DECISION_METHODS + (
+    'embedding_match', 'hash_based', 'perceptual_hash', 'cascade_stats', 'cascade_fast_model'
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-apply a decision configuration to stored decisions")
+    parser.add_argument('store', help="Decision store directory")
+    parser.add_argument('--config', default='', help="JSON file of decision settings (as for DECISION_CONFIG)")
+    for key in DEFAULT_DECISION_CONFIG:
+        parser.add_argument('--' + key.replace('_', '-'), dest=key, type=float, default=None,
+                            help=f"Override {key} (default: {DEFAULT_DECISION_CONFIG[key]})")
+    parser.add_argument('--feature-weights', default='',
+                        help="Recompute stats_score from the features with these weights "
+                             f"({','.join(FEATURE_COLUMNS)})")
+    parser.add_argument('--embedding-threshold', type=float, default=None,
+                        help="Replay the embedding match at this similarity (default: keep recorded matches)")
+    parser.add_argument('--output', default='', help="Also write the report as JSON to this file")
+    return parser.parse_args()
+
+def build_config(args):
+    overrides = {}
+    if args.config:
+        with open(args.config, 'r') as f:
+            overrides.update(json.load(f))
+    overrides.update({key: getattr(args, key) for key in DEFAULT_DECISION_CONFIG if getattr(args, key) is not None})
+    return decision_config(overrides)
+
+def stats_scores(columns, feature_weights):
+    """Stored hybrid_score, or the features recombined with new weights"""
+    if not feature_weights:
+        return columns['stats_score'].astype(np.float64)
+    weights = [float(w) for w in feature_weights.split(',')]
+    if len(weights) != len(FEATURE_COLUMNS):
+        raise ValueError(f"Expected {len(FEATURE_COLUMNS)} feature weights, got {len(weights)}")
+    features = np.stack([columns[name] for name in FEATURE_COLUMNS], axis=1).astype(np.float64)
+    return features @ np.asarray(weights)
+
+def replay(columns, config, feature_weights='', embedding_threshold=None):
+    """
+    Replayed verdicts for every row: (is_fake bool array, method code array indexing REPLAY_METHODS)
+
+    Each row is replayed the way it was decided, according to its recorded
+    method, so the configuration a row was decided with reproduces its verdict.
+    """
+    n = len(columns['result'])
+    model_scores = columns['model_score'].astype(np.float64)
+    stats = stats_scores(columns, feature_weights)
+    method = columns['method']
+
+    def decided_by(*names):
+        return np.isin(method, [METHODS.index(name) for name in names])
+
+    is_fake = columns['result'] == VERDICTS.index('FAKE')
+    methods = np.zeros(n, dtype=np.uint8)
+
+    has_model = ~np.isnan(model_scores)
+    has_stats = ~np.isnan(stats)
+
+    model_only = decided_by('ai_model')
+    fused = decided_by(*DECISION_METHODS)
+    embedded = decided_by('embedding_match')
+    if embedding_threshold is not None:
+        # The embedding search ran on every row that reached the model, before
+        # the model-only and fusion decisions
+        similarity = columns['embedding_similarity']
+        has_similarity = ~np.isnan(similarity)
+        reached_model = decided_by('embedding_match', 'ai_model', *DECISION_METHODS)
+        matched = reached_model & has_similarity & (similarity >= embedding_threshold)
+        unmatched = embedded & has_similarity & ~matched
+        fused |= unmatched & has_stats
+        model_only |= unmatched & ~has_stats
+        model_only &= ~matched
+        fused &= ~matched
+        embedded = matched | (embedded & ~has_similarity)
+
+    # Rows missing an input keep their recorded verdict (method 'recorded')
+    model_only &= has_model
+    fused &= has_model & has_stats
+
+    is_fake[model_only] = model_scores[model_only] > 0.5
+    methods[model_only] = REPLAY_METHODS.index('ai_model')
+
+    fused_fake, _, fused_methods = decide_scores(model_scores[fused], stats[fused], config)
+    is_fake[fused] = fused_fake
+    methods[fused] = fused_methods + REPLAY_METHODS.index(DECISION_METHODS[0])
+
+    is_fake[embedded] = True
+    methods[embedded] = REPLAY_METHODS.index('embedding_match')
+
+    # Hash matches and cascade exits before the model keep their recorded verdict
+    for name in ('hash_based', 'perceptual_hash', 'cascade_stats', 'cascade_fast_model'):
+        methods[decided_by(name)] = REPLAY_METHODS.index(name)
+    return is_fake, methods
+
+def verdict_counts(is_fake):
+    fake = int(np.count_nonzero(is_fake))
+    return {'FAKE': fake, 'REAL': len(is_fake) - fake}
+
+def accuracy(is_fake, labels, known):
+    """Percentage of labeled rows with a recorded verdict (not an error) that is_fake gets right"""
+    labeled = (labels >= 0) & known
+    if not labeled.any():
+        return None
+    correct = is_fake[labeled] == (labels[labeled] == VERDICTS.index('FAKE'))
+    return round(float(correct.mean()) * 100, 2)
+
+def main():
+    args = parse_args()
+    config = build_config(args)
+    if not os.path.isdir(args.store):
+        print(f"❌ Decision store not found: {args.store}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    columns = load_decisions(args.store)
+    load_seconds = time.perf_counter() - start
+    rows = len(columns['result'])
+    if rows == 0:
+        print(f"❌ No decisions stored in {args.store}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    replayed, methods = replay(columns, config, args.feature_weights, args.embedding_threshold)
+    replay_seconds = time.perf_counter() - start
+
+    recorded = columns['result'] == VERDICTS.index('FAKE')
+    known = columns['result'] >= 0
+    labels = columns['label']
+    method_counts = np.bincount(methods, minlength=len(REPLAY_METHODS))
+    report = {
+        'store': args.store,
+        'rows': rows,
+        'config': config,
+        'feature_weights': args.feature_weights or None,
+        'embedding_threshold': args.embedding_threshold,
+        'load_seconds': round(load_seconds, 3),
+        'replay_seconds': round(replay_seconds, 3),
+        'recorded': verdict_counts(recorded[known]),
+        'replayed': verdict_counts(replayed[known]),
+        'changed': {
+            'FAKE_to_REAL': int(np.count_nonzero(known & recorded & ~replayed)),
+            'REAL_to_FAKE': int(np.count_nonzero(known & ~recorded & replayed))
+        },
+        'methods': {name: int(count) for name, count in zip(REPLAY_METHODS, method_counts) if count},
+        'labeled_rows': int(np.count_nonzero((labels >= 0) & known)),
+        'recorded_accuracy': accuracy(recorded, labels, known),
+        'replayed_accuracy': accuracy(replayed, labels, known)
+    }
+
+    print(f"🔁 Replayed {rows} decisions in {replay_seconds * 1000:.1f}ms (loaded in {load_seconds:.2f}s)")
+    print("Config: " + ", ".join(f"{k}={v}" for k, v in config.items()))
+    print(f"{'':>10} {'FAKE':>10} {'REAL':>10}")
+    for name in ('recorded', 'replayed'):
+        print(f"{name:>10} {report[name]['FAKE']:>10} {report[name]['REAL']:>10}")
+    print(f"Changed: {report['changed']['FAKE_to_REAL']} FAKE -> REAL, "
+          f"{report['changed']['REAL_to_FAKE']} REAL -> FAKE")
+    print("Methods: " + ", ".join(f"{name}={count}" for name, count in report['methods'].items()))
+    if report['labeled_rows']:
+        print(f"Accuracy on {report['labeled_rows']} labeled rows: "
+              f"{report['recorded_accuracy']}% recorded, {report['replayed_accuracy']}% replayed")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved: {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ResultCache:
+    """
+    Size-bounded LRU + TTL cache of analysis results keyed by content digest.
+
+    An optional on-disk directory is shared by every gunicorn worker on the
+    host. Concurrent requests for the same key inside a worker are coalesced:
+    one thread computes, the others wait on its result.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, disk_dir=None, max_disk_entries=100000):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self.disk_dir = disk_dir or None
+        self.max_disk_entries = int(max_disk_entries)
+
+        self._entries = OrderedDict()  # key -> (stored_at, result)
+        self._inflight = {}            # key -> Future
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+
+        self._counters = dict.fromkeys(
+            ('hits', 'disk_hits', 'misses', 'coalesced', 'evictions', 'expired'), 0
+        )
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 or self.disk_dir is not None
+
+    def _expired(self, stored_at):
+        return self.ttl > 0 and time.time() - stored_at > self.ttl
+
+    def _get_memory(self, key):
+        # Caller holds self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if self._expired(stored_at):
+            del self._entries[key]
+            self._counters['expired'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _put_memory(self, key, result):
+        # Caller holds self._lock
+        if self.max_entries == 0:
+            return
+        self._entries[key] = (time.time(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key.replace(':', '_') + '.json')
+
+    def _get_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if self._expired(os.path.getmtime(path)):
+                os.remove(path)
+                with self._lock:
+                    self._counters['expired'] += 1
+                return None
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _put_disk(self, key, result):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)  # Atomic for readers in other workers
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Result cache write failed: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % 1000 == 0
+        if prune:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Drop the oldest on-disk entries beyond max_disk_entries"""
+        try:
+            paths = [os.path.join(self.disk_dir, n) for n in os.listdir(self.disk_dir) if n.endswith('.json')]
+            if len(paths) <= self.max_disk_entries:
+                return
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:len(paths) - self.max_disk_entries]:
+                os.remove(path)
+        except OSError:
+            pass
+
+    def get_or_compute(self, key, compute_fn):
+        """
+        Return (result, status) where status is 'hit', 'miss' or 'coalesced'.
+
+        Exceptions from compute_fn are raised to every waiting caller and the
+        failed result is not cached.
+        """
+        if not self.enabled:
+            return compute_fn(), 'miss'
+
+        with self._lock:
+            result = self._get_memory(key)
+            if result is not None:
+                self._counters['hits'] += 1
+                return result, 'hit'
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = Future()
+                self._inflight[key] = flight
+            else:
+                self._counters['coalesced'] += 1
+
+        if not leader:
+            return flight.result(), 'coalesced'
+
+        try:
+            result = self._get_disk(key)
+            if result is not None:
+                status = 'hit'
+                with self._lock:
+                    self._counters['disk_hits'] += 1
+                    self._put_memory(key, result)
+            else:
+                status = 'miss'
+                with self._lock:
+                    self._counters['misses'] += 1
+                result = compute_fn()
+                with self._lock:
+                    self._put_memory(key, result)
+                self._put_disk(key, result)
+            flight.set_result(result)
+            return result, status
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self):
+        """Drop all in-memory entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return cache configuration and hit/miss/coalesce counters"""
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['disk_hits'] + self._counters['misses']
+            hit_rate = (self._counters['hits'] + self._counters['disk_hits']) / lookups if lookups else 0.0
+            return dict(
+                self._counters,
+                entries=len(self._entries),
+                in_flight=len(self._inflight),
+                max_entries=self.max_entries,
+                ttl_seconds=self.ttl,
+                disk_dir=self.disk_dir,
+                hit_rate=round(hit_rate, 3)
+            )
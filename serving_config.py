@@ -0,0 +1,116 @@
+"""
+CPU thread budgeting for the serving process.
+
+TensorFlow, OpenCV and NumPy's BLAS each size their thread pools to every
+core by default, so N gunicorn workers end up running N x cores compute
+threads and tail latency explodes. configure() splits the available cores
+(cgroup quota aware) between WEB_CONCURRENCY workers:
+
+    model intra-op threads   cores // workers (TF, TFLite and ONNX Runtime)
+    model inter-op threads   1, or 2 with 4+ cores per worker
+    OpenCV / BLAS / OpenMP   1: per-request work already runs in parallel
+                             on the gthread request threads
+    analysis threads         cores // workers: shared pool for the statistics
+                             features, which overlap the model's forward pass
+    request threads          2 x cores per worker, at least 4
+
+Every value can be overridden with the matching environment variable
+(SERVING_CORES, WEB_CONCURRENCY, SERVING_INTRA_OP_THREADS, ...); explicit
+OMP_NUM_THREADS-style variables are never overwritten. SERVING_THREAD_BUDGET=0
+leaves every library at its defaults.
+
+configure() must run before NumPy/OpenCV are imported, so app.py calls it
+first. gunicorn.conf.py uses the same budget for workers and threads and
+can --preload the app (SERVING_PRELOAD=1): imports, the hash databases and
+the perceptual-hash index are then loaded once and shared copy-on-write by
+the forked workers. The model itself is loaded after fork in each worker,
+because TensorFlow's thread pools do not survive fork(); exported .tflite
+models are memory-mapped, so their weights are shared through the page
+cache.
+"""
+import os
+import math
+
+# Variables read by BLAS/OpenMP runtimes at import time
+_POOL_ENV_VARS = (
+    'OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS'
+)
+
+_budget = None
+
+
+def available_cores():
+    """Cores this process may use: the cgroup CPU quota if set, else the affinity mask"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _env_int(name, default):
+    value = os.environ.get(name, '')
+    return int(value) if value.strip() else default
+
+def thread_budget(cores=None, workers=None):
+    """Thread counts for one worker when `workers` share `cores`"""
+    cores = cores or _env_int('SERVING_CORES', available_cores())
+    workers = workers or _env_int('WEB_CONCURRENCY', 1)
+    per_worker = max(1, cores // workers)
+    return {
+        'cores': cores,
+        'workers': workers,
+        'cores_per_worker': per_worker,
+        'intra_op_threads': _env_int('SERVING_INTRA_OP_THREADS', per_worker),
+        'inter_op_threads': _env_int('SERVING_INTER_OP_THREADS', 2 if per_worker >= 4 else 1),
+        'cv2_threads': _env_int('SERVING_CV2_THREADS', 1),
+        'blas_threads': _env_int('SERVING_BLAS_THREADS', 1),
+        'analysis_threads': _env_int('SERVING_ANALYSIS_THREADS', per_worker),
+        'request_threads': _env_int('SERVING_REQUEST_THREADS', max(4, 2 * per_worker))
+    }
+
+def configure(cores=None, workers=None):
+    """
+    Apply the thread budget to this process. Call before NumPy/OpenCV are
+    imported; TensorFlow picks its limits up from the environment when it
+    initializes (see configure_tensorflow). Returns the budget.
+    """
+    global _budget
+    budget = thread_budget(cores, workers)
+    budget['applied'] = os.environ.get('SERVING_THREAD_BUDGET', '1') != '0'
+    _budget = budget
+    if not budget['applied']:
+        return budget  # Library defaults, for comparison runs
+
+    for name in _POOL_ENV_VARS:
+        os.environ.setdefault(name, str(budget['blas_threads']))
+    os.environ.setdefault('TF_NUM_INTRAOP_THREADS', str(budget['intra_op_threads']))
+    os.environ.setdefault('TF_NUM_INTEROP_THREADS', str(budget['inter_op_threads']))
+
+    import cv2
+    cv2.setNumThreads(budget['cv2_threads'])
+    return budget
+
+def current_budget():
+    """The budget applied by configure(), computing it if configure() was not called"""
+    return _budget or thread_budget()
+
+def configure_tensorflow():
+    """Pin TensorFlow's pools to the budget; a no-op once TF has already initialized"""
+    import tensorflow as tf
+
+    budget = current_budget()
+    if not budget.get('applied', True):
+        return budget
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(budget['intra_op_threads'])
+        tf.config.threading.set_inter_op_parallelism_threads(budget['inter_op_threads'])
+    except RuntimeError:
+        pass  # Context already created; the TF_NUM_*_THREADS variables applied instead
+    return budget
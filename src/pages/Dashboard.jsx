@@ -31,6 +31,10 @@ import dashboardBg from '../assets/dashboard-bg.png';
 import CameraCapture from '../components/CameraCapture';
 import confetti from 'canvas-confetti';
 
+// Server defaults for one /predict/batch request
+const BATCH_MAX_FILES = 64;
+const BATCH_MAX_BYTES = 512 * 1024 * 1024;
+
 const Dashboard = () => {
     const { theme, toggleTheme } = useTheme();
     const { user, logout, connectionStatus, updateProfile, updatePassword } = useAuth();
@@ -173,87 +177,102 @@ const Dashboard = () => {
         const results = [];
         let processed = 0;
 
-        for (let i = 0; i < batchFiles.length; i++) {
-            const batchItem = batchFiles[i];
-            setCurrentBatchIndex(i);
+        const recordResult = (batchItem, result) => {
+            results.push(result);
+            processed++;
+            setCurrentBatchIndex(Math.min(processed, batchFiles.length - 1));
+            setBatchProgress((processed / batchFiles.length) * 100);
+            setBatchFiles(prev => prev.map(item =>
+                item.id === batchItem.id
+                    ? result
+                    : item
+            ));
+        };
 
-            try {
-                // Update status
-                setBatchFiles(prev => prev.map(item =>
-                    item.id === batchItem.id
-                        ? { ...item, status: 'processing' }
-                        : item
-                ));
-
-                // Convert file to base64
-                const base64 = await new Promise((resolve) => {
-                    const reader = new FileReader();
-                    reader.onload = (e) => resolve(e.target.result);
-                    reader.readAsDataURL(batchItem.file);
-                });
+        const failItem = (batchItem) => recordResult(batchItem, {
+            ...batchItem,
+            status: 'failed',
+            result: 'ERROR',
+            confidence: '0.0%'
+        });
+
+        setBatchFiles(prev => prev.map(item => ({ ...item, status: 'processing' })));
+
+        // Split the queue into requests within the server's /predict/batch
+        // limits (BATCH_PREDICT_MAX_FILES, BATCH_PREDICT_MAX_BYTES)
+        const chunks = [];
+        let chunk = [];
+        let chunkBytes = 0;
+        batchFiles.forEach(batchItem => {
+            if (chunk.length > 0 && (chunk.length >= BATCH_MAX_FILES || chunkBytes + batchItem.file.size > BATCH_MAX_BYTES)) {
+                chunks.push(chunk);
+                chunk = [];
+                chunkBytes = 0;
+            }
+            chunk.push(batchItem);
+            chunkBytes += batchItem.file.size;
+        });
+        if (chunk.length > 0) chunks.push(chunk);
 
-                // Analyze the image
-                const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:5002';
-                const response = await fetch(`${apiUrl}/predict`, {
+        const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:5002';
+        for (const chunkItems of chunks) {
+            try {
+                // One request per chunk; the server streams a line of NDJSON
+                // per file as soon as that file's result is ready
+                const formData = new FormData();
+                chunkItems.forEach(batchItem => formData.append('file', batchItem.file, batchItem.name));
+                const response = await fetch(`${apiUrl}/predict/batch`, {
                     method: 'POST',
-                    body: (() => {
-                        const formData = new FormData();
-                        formData.append('file', batchItem.file, batchItem.name);
-                        return formData;
-                    })()
+                    body: formData
                 });
 
                 if (!response.ok) {
                     throw new Error('Analysis failed');
                 }
 
-                const data = await response.json();
-
-                const result = {
-                    ...batchItem,
-                    status: 'completed',
-                    result: data.result,
-                    confidence: data.confidence,
-                    detection_method: data.detection_method,
-                    ai_model_confidence: data.ai_model_confidence,
-                    stats_score: data.stats_score
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffered = '';
+                const handleLine = (line) => {
+                    if (!line.trim()) return;
+                    const data = JSON.parse(line);
+                    if (data.type === 'summary') return;
+
+                    const batchItem = chunkItems[data.index];
+                    if (data.type === 'error') {
+                        console.error(`Failed to process ${batchItem.name}:`, data.error);
+                        failItem(batchItem);
+                        return;
+                    }
+                    recordResult(batchItem, {
+                        ...batchItem,
+                        status: 'completed',
+                        result: data.result,
+                        confidence: data.confidence,
+                        detection_method: data.detection_method,
+                        ai_model_confidence: data.ai_model_confidence,
+                        stats_score: data.stats_score
+                    });
                 };
 
-                results.push(result);
-                processed++;
-
-                // Update progress
-                const progress = ((processed / batchFiles.length) * 100);
-                setBatchProgress(progress);
-
-                // Update batch files status
-                setBatchFiles(prev => prev.map(item =>
-                    item.id === batchItem.id
-                        ? result
-                        : item
-                ));
-
+                for (;;) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+                    buffered += decoder.decode(value, { stream: true });
+                    const lines = buffered.split('\n');
+                    buffered = lines.pop();
+                    lines.forEach(handleLine);
+                }
+                handleLine(buffered);
             } catch (error) {
-                console.error(`Failed to process ${batchItem.name}:`, error);
-
-                const failedResult = {
-                    ...batchItem,
-                    status: 'failed',
-                    result: 'ERROR',
-                    confidence: '0.0%'
-                };
-
-                results.push(failedResult);
-                processed++;
-
-                setBatchFiles(prev => prev.map(item =>
-                    item.id === batchItem.id
-                        ? failedResult
-                        : item
-                ));
+                console.error('Batch analysis failed:', error);
             }
         }
 
+        // Anything the stream never reported on counts as failed
+        const reported = new Set(results.map(r => r.id));
+        batchFiles.filter(item => !reported.has(item.id)).forEach(failItem);
+
         setBatchResults(results);
         setIsBatchProcessing(false);
         setBatchProgress(100);
@@ -441,6 +460,24 @@ const Dashboard = () => {
             };
         }
 
+        if (method === 'perceptual_hash') {
+            return {
+                title: "🧬 Near-Duplicate Match",
+                explanation: "This image is a re-saved, resized or recompressed copy of an image in our known fake image database.",
+                technical_details: `Perceptual hash (dHash) differs from a known fake by ${data.hash_distance ?? 0} of 64 bits.`,
+                confidence_reason: "Perceptual hashes survive re-encoding, so a small Hamming distance indicates the same underlying image."
+            };
+        }
+
+        if (method === 'embedding_match') {
+            return {
+                title: "🧭 Known Fake Variant",
+                explanation: "This image closely resembles an image in our known fake image database, as a crop, edit or output of the same generator would.",
+                technical_details: `Deep feature (VGG16 embedding) cosine similarity to the closest known fake: ${data.embedding_similarity ?? 0}.`,
+                confidence_reason: "The features come from the same network pass as the AI verdict and stay close under cropping, resizing and light edits."
+            };
+        }
+
         const pixelStats = data.pixel_stats || {};
         const detailStr = pixelStats.noise ?
             `Forensic Data: Noise=${pixelStats.noise}, Edges=${pixelStats.edges}, Chroma=${pixelStats.chroma}` :
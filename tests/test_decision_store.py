@@ -0,0 +1,26 @@
+import numpy as np
+
+from decision import DEFAULT_DECISION_CONFIG
+from decision_store import COLUMNS, METHODS, VERDICTS, DecisionLog, load_decisions
+from replay_decisions import REPLAY_METHODS, replay
+
+
+def test_columns_missing_from_old_segments_keep_their_recorded_verdict(tmp_path):
+    log = DecisionLog(str(tmp_path))
+    log.record('ab' * 32, 'FAKE', model_score=0.9, stats={'hybrid_score': 0.8}, method='hybrid_ai_stats')
+    log.flush()
+    # A hybrid row from a segment written before model_score and label were stored
+    old = {name: np.zeros(1, dtype=dtype) for name, dtype in COLUMNS.items()
+           if name not in ('digest', 'model_score', 'label')}
+    old['result'][:] = VERDICTS.index('FAKE')
+    old['method'][:] = METHODS.index('hybrid_ai_stats')
+    np.savez_compressed(tmp_path / 'seg-old.npz', digest=np.zeros((1, 32), dtype=np.uint8), **old)
+
+    columns = load_decisions(str(tmp_path))
+    old_row = [i for i, at in enumerate(columns['recorded_at']) if at == 0][0]
+    assert np.isnan(columns['model_score'][old_row])
+    assert columns['label'][old_row] == -1
+
+    is_fake, methods = replay(columns, DEFAULT_DECISION_CONFIG, embedding_threshold=0.5)
+    assert is_fake.all()
+    assert REPLAY_METHODS[methods[old_row]] == 'recorded'
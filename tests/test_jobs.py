@@ -0,0 +1,69 @@
+import io
+import json
+import os
+import time
+import threading
+
+import pytest
+
+from jobs import JobManager
+
+
+def wait_for(manager, job_id, state, timeout=10.0):
+    deadline = time.time() + timeout
+    while manager.status(job_id)['state'] != state:
+        assert time.time() < deadline, f"job never reached {state}"
+        time.sleep(0.05)
+
+
+def make_manager(tmp_path, **kwargs):
+    return JobManager(str(tmp_path / 'jobs'), lambda path: {'result': 'REAL'},
+                      workers=1, poll_interval=0.05, **kwargs)
+
+
+def test_sweep_removes_expired_jobs(tmp_path):
+    manager = make_manager(tmp_path, retention=60)
+    job = manager.create_job(uploads=[('a.jpg', io.BytesIO(b'image'))])
+    wait_for(manager, job['id'], 'done')
+    job_dir = os.path.join(manager.jobs_dir, job['id'])
+    assert os.path.isdir(job_dir)
+
+    assert manager.sweep() == 0
+    assert manager.sweep(now=time.time() + 61) == 1
+    assert not os.path.exists(job_dir)
+    assert os.listdir(os.path.join(manager.jobs_dir, 'finished')) == []
+    with pytest.raises(KeyError):
+        manager.status(job['id'])
+
+
+def test_pending_jobs_come_from_the_queue_index(tmp_path):
+    release = threading.Event()
+    manager = JobManager(str(tmp_path / 'jobs'), lambda path: release.wait() and {'result': 'REAL'},
+                         workers=1, poll_interval=0.05, retention=60)
+    job = manager.create_job(uploads=[('a.jpg', io.BytesIO(b'image'))])
+    wait_for(manager, job['id'], 'running')
+
+    assert manager._pending_jobs() == [job['id']]
+    # Unfinished jobs are never swept
+    assert manager.sweep(now=time.time() + 61) == 0
+
+    release.set()
+    wait_for(manager, job['id'], 'done')
+    assert manager._pending_jobs() == []
+    assert os.listdir(os.path.join(manager.jobs_dir, 'queue')) == []
+
+
+def test_existing_jobs_are_indexed(tmp_path):
+    # A jobs directory from before queue/ and finished/ existed
+    jobs_dir = tmp_path / 'jobs'
+    now = time.time()
+    for job_id, state in (('a' * 32, 'done'), ('b' * 32, 'queued')):
+        (jobs_dir / job_id).mkdir(parents=True)
+        manifest = {'id': job_id, 'state': state, 'created_at': now, 'finished_at': now,
+                    'source': 'upload', 'total': 0, 'items': []}
+        (jobs_dir / job_id / 'manifest.json').write_text(json.dumps(manifest))
+
+    manager = make_manager(tmp_path, retention=60)
+    assert manager._pending_jobs() == ['b' * 32]
+    assert manager.sweep(now=now + 61) == 1
+    assert sorted(os.listdir(jobs_dir)) == ['b' * 32, 'finished', 'queue']
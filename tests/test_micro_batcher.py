@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+def echo_batches(sizes):
+    def predict(batch, key):
+        sizes.append(len(batch))
+        return batch.reshape(len(batch), -1)[:, :1]
+    return predict
+
+
+def test_group_larger_than_max_batch_runs_in_several_batches():
+    sizes = []
+    batcher = MicroBatcher(echo_batches(sizes), window_ms=1, max_batch=4, max_queue=16)
+    tensors = np.arange(10, dtype=np.float32).reshape(10, 1, 1, 1)
+
+    outputs = batcher.submit_many(tensors, timeout=5)
+
+    assert [float(row[0]) for row in outputs] == list(range(10))
+    assert max(sizes) <= 4
+    assert sum(sizes) == 10
+
+
+def test_group_larger_than_queue_is_rejected_up_front():
+    sizes = []
+    batcher = MicroBatcher(echo_batches(sizes), window_ms=1, max_batch=4, max_queue=8)
+
+    with pytest.raises(ValueError):
+        batcher.submit_many_async(np.zeros((9, 1, 1, 1), dtype=np.float32))
+    assert sizes == []
+    assert batcher.stats()['queue_depth'] == 0
@@ -0,0 +1,48 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+import preprocessing
+from preprocessing import decode_image
+
+
+def encoded(fmt, size=(320, 160), **save_args):
+    # Left half red, right half blue: any rotation changes the pixels
+    pixels = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    pixels[:, :size[0] // 2, 0] = 255
+    pixels[:, size[0] // 2:, 2] = 255
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, fmt, **save_args)
+    buf.seek(0)
+    return buf
+
+
+def decode_all(make_source, min_size):
+    return {
+        backend: np.asarray(decode_image(make_source(), backend, min_size=min_size)[0], dtype=np.int16)
+        for backend in ('pil', 'draft', 'cv2')
+    }
+
+
+def test_exif_orientation_is_ignored_on_every_backend():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Rotate 90 CW
+    data = encoded('JPEG', quality=95, exif=exif.tobytes()).getvalue()
+
+    decoded = decode_all(lambda: io.BytesIO(data), min_size=(320, 160))
+
+    for backend, pixels in decoded.items():
+        assert pixels.shape == (160, 320, 3), backend
+        assert np.abs(pixels - decoded['pil']).mean() < 2.0, backend
+
+
+def test_cv2_backend_falls_back_to_pil(monkeypatch):
+    # OpenCV builds without GIF support return None, as for any format they cannot read
+    monkeypatch.setattr(preprocessing, '_cv2_decode', lambda source, flags: None)
+    data = encoded('GIF').getvalue()
+
+    decoded = decode_all(lambda: io.BytesIO(data), min_size=(128, 128))
+
+    assert decoded['cv2'].shape == decoded['pil'].shape == (160, 320, 3)
+    assert np.array_equal(decoded['cv2'], decoded['pil'])